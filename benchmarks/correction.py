@@ -0,0 +1,49 @@
+"""Per-point cost of coordinate correction, for batches of 10^3 to 10^6 points, with
+and without a distortion grid
+
+Run with `python benchmarks/correction.py`
+"""
+
+import timeit
+
+import numpy as np
+
+from rtc6_fastcs.coordinates import CoordinateTransform, DistortionGrid
+
+AFFINE = np.array([[0.0, 1.0, 25.0], [1.0, 0.0, -25.0]])
+GRID_POINTS = 65
+TRANSFORMS = {
+    "affine": CoordinateTransform(AFFINE),
+    "grid": CoordinateTransform(
+        AFFINE,
+        DistortionGrid(
+            (-(2**19), -(2**19)),
+            (2**20 / (GRID_POINTS - 1),) * 2,
+            np.random.default_rng(1).normal(0, 50, (GRID_POINTS, GRID_POINTS, 2)),
+        ),
+    ),
+}
+
+
+def per_point_seconds(
+    transform: CoordinateTransform, n_points: int, repeats: int = 5
+) -> float:
+    points = np.random.default_rng(0).uniform(-1e5, 1e5, (n_points, 2))
+    number = max(1, 10**6 // n_points)
+    best = min(
+        timeit.repeat(lambda: transform.apply(points), number=number, repeat=repeats)
+    )
+    return best / number / n_points
+
+
+def main():
+    print(f"{'transform':>10} {'points':>10} {'ns/point':>10}")
+    for name, transform in TRANSFORMS.items():
+        for exponent in range(3, 7):
+            n_points = 10**exponent
+            seconds = per_point_seconds(transform, n_points)
+            print(f"{name:>10} {n_points:>10} {seconds * 1e9:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
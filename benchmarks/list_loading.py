@@ -0,0 +1,280 @@
+"""Throughput of the list loading path, against the simulated RTC6
+
+Reports segments/second, p50/p99 latency per segment and event loop lag for:
+
+- single: one ADDLINE X/Y/Proc per segment, as the original plan stubs did
+- bulk: ADDPOLYGON waveforms and one Proc per shape
+- streamed: ADDPOLYGON Append per shape then LIST:StreamList through both lists
+
+By default the IOC's controller is driven in-process, which measures everything on
+the IOC side of Channel Access. With --ca an IOC is started with `ioc --simulate`
+and driven through the Rtc6Eth ophyd-async device, so CA round trips are included.
+
+Run with `python benchmarks/list_loading.py --output results.json`
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+
+import numpy as np
+from fastcs.attributes import AttrW
+
+from rtc6_fastcs import __version__
+from rtc6_fastcs.segments import Opcode
+
+LAG_SAMPLE_PERIOD = 0.001
+# Fast enough, with no delays, that streamed jobs aren't limited by simulated
+# execution time
+SIMULATED_SPEED = 1e9
+
+
+@dataclass
+class Result:
+    mode: str
+    segments: int
+    seconds: float
+    segments_per_second: float
+    p50_segment_latency_us: float
+    p99_segment_latency_us: float
+    p50_event_loop_lag_ms: float
+    p99_event_loop_lag_ms: float
+    max_event_loop_lag_ms: float
+
+
+class LagMonitor:
+    """Measures how late the event loop wakes a task which sleeps repeatedly"""
+
+    def __init__(self) -> None:
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_SAMPLE_PERIOD)
+            self.lags.append(time.perf_counter() - start - LAG_SAMPLE_PERIOD)
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *args):
+        assert self._task is not None
+        self._task.cancel()
+
+
+async def measure(
+    mode: str,
+    operations: list[Callable[[], Awaitable[None]]],
+    segments_per_operation: int,
+) -> Result:
+    latencies = []
+    with LagMonitor() as lag:
+        start = time.perf_counter()
+        for operation in operations:
+            operation_start = time.perf_counter()
+            await operation()
+            latencies.append(
+                (time.perf_counter() - operation_start) / segments_per_operation
+            )
+        seconds = time.perf_counter() - start
+    segments = len(operations) * segments_per_operation
+    lags = np.array(lag.lags or [0.0]) * 1e3
+    return Result(
+        mode=mode,
+        segments=segments,
+        seconds=seconds,
+        segments_per_second=segments / seconds,
+        p50_segment_latency_us=float(np.percentile(latencies, 50) * 1e6),
+        p99_segment_latency_us=float(np.percentile(latencies, 99) * 1e6),
+        p50_event_loop_lag_ms=float(np.percentile(lags, 50)),
+        p99_event_loop_lag_ms=float(np.percentile(lags, 99)),
+        max_event_loop_lag_ms=float(lags.max()),
+    )
+
+
+def make_shape(n_segments: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A zig-zag of lines, starting with a jump"""
+    # float64, as the IOC's waveforms are
+    x = np.arange(n_segments, dtype=np.float64) * 10
+    y = np.where(np.arange(n_segments) % 2, 100.0, -100.0)
+    opcode = np.full(n_segments, Opcode.LINE, dtype=np.float64)
+    opcode[0] = Opcode.JUMP
+    return x, y, opcode
+
+
+async def run_in_process(
+    n_segments: int, n_shapes: int, shape_size: int
+) -> list[Result]:
+    from rtc6_fastcs.controller import RtcController
+
+    controller = RtcController("127.0.0.1", "", "", simulate=True)
+    # as the IOC's backend does before connecting
+    await controller.initialise()
+    await controller.attribute_initialise()
+    await controller.connect()
+    control = controller.get_sub_controllers()["CONTROL"]
+
+    async def put(attr: AttrW, value):
+        # as the IOC does on a CA put
+        await attr.sender.put(attr, value)
+
+    await put(control.jump_speed, SIMULATED_SPEED)
+    await put(control.mark_speed, SIMULATED_SPEED)
+    for delay in (control.jump_delay, control.mark_delay, control.polygon_delay):
+        await put(delay, 0)
+    list_ops = controller.get_sub_controllers()["LIST"]
+    add_line = list_ops.get_sub_controllers()["ADDLINE"]
+    add_polygon = list_ops.get_sub_controllers()["ADDPOLYGON"]
+    x, y, opcode = make_shape(shape_size)
+
+    async def single(i: int):
+        await add_line.x.set(i)
+        await add_line.y.set(i)
+        await add_line.proc()
+
+    async def set_polygon():
+        # different shapes each time so that the shape cache doesn't help
+        await add_polygon.x.set(x + time.perf_counter_ns() % 1000)
+        await add_polygon.y.set(y)
+        await add_polygon.opcode.set(opcode)
+        await add_polygon.angle.set(np.zeros(shape_size))
+
+    async def bulk():
+        await set_polygon()
+        await add_polygon.proc()
+
+    async def append():
+        await set_polygon()
+        await add_polygon.append()
+
+    async def stream():
+        await list_ops.stream_list()
+        await list_ops._stream_task  # noqa: SLF001
+
+    results = []
+    await list_ops.init_list()
+    results.append(
+        await measure(
+            "single",
+            [lambda i=i: single(i) for i in range(n_segments)],
+            1,
+        )
+    )
+    await list_ops.init_list()
+    results.append(await measure("bulk", [bulk] * n_shapes, shape_size))
+
+    async def streamed():
+        for _ in range(n_shapes):
+            await append()
+        await stream()
+
+    results.append(await measure("streamed", [streamed], n_shapes * shape_size))
+    await controller.close()
+    return results
+
+
+async def run_over_ca(n_segments: int, n_shapes: int, shape_size: int) -> list[Result]:
+    from ophyd_async.core import init_devices
+
+    from rtc6_fastcs.device import Rtc6Eth
+
+    prefix = f"RTC6BENCH{os.getpid()}"
+    ioc = subprocess.Popen(
+        [sys.executable, "-m", "rtc6_fastcs", "ioc", prefix, "--simulate"],
+        stdin=subprocess.PIPE,
+    )
+    try:
+        async with init_devices(timeout=30):
+            rtc6 = Rtc6Eth(prefix + ":")
+        await rtc6.control_settings.jump_speed.set(SIMULATED_SPEED)
+        await rtc6.control_settings.mark_speed.set(SIMULATED_SPEED)
+        control = rtc6.control_settings
+        for delay in (control.jump_delay, control.mark_delay, control.polygon_delay):
+            await delay.set(0)
+        x, y, opcode = make_shape(shape_size)
+        polygon = rtc6.list.add_polygon
+
+        async def single(i: int):
+            await rtc6.list.add_line.x.set(i)
+            await rtc6.list.add_line.y.set(i)
+            await rtc6.list.add_line.proc.trigger()
+
+        async def set_polygon():
+            await polygon.x.set(x + time.perf_counter_ns() % 1000)
+            await polygon.y.set(y)
+            await polygon.opcode.set(opcode)
+            await polygon.angle_deg.set(np.zeros(shape_size))
+
+        async def bulk():
+            await set_polygon()
+            await polygon.proc.trigger()
+
+        async def streamed():
+            for _ in range(n_shapes):
+                await set_polygon()
+                await polygon.append.trigger()
+            await rtc6.list.stream_list.trigger()
+            await asyncio.sleep(0.1)
+            while await rtc6.list.streaming.get_value():
+                await asyncio.sleep(0.01)
+
+        results = []
+        await rtc6.list.init_list.trigger()
+        results.append(
+            await measure(
+                "single_ca", [lambda i=i: single(i) for i in range(n_segments)], 1
+            )
+        )
+        await rtc6.list.init_list.trigger()
+        results.append(await measure("bulk_ca", [bulk] * n_shapes, shape_size))
+        results.append(await measure("streamed_ca", [streamed], n_shapes * shape_size))
+        return results
+    finally:
+        ioc.terminate()
+        ioc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--single-segments", type=int, default=2000)
+    parser.add_argument("--shapes", type=int, default=50)
+    parser.add_argument("--shape-size", type=int, default=2000)
+    parser.add_argument(
+        "--ca", action="store_true", help="drive an IOC over Channel Access"
+    )
+    parser.add_argument("--output", help="file to write JSON results to")
+    args = parser.parse_args()
+
+    run = run_over_ca if args.ca else run_in_process
+    results = asyncio.run(run(args.single_segments, args.shapes, args.shape_size))
+    report = {
+        "version": __version__,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(result) for result in results],
+    }
+    for result in results:
+        print(
+            f"{result.mode:>12}: {result.segments_per_second:12.0f} segments/s, "
+            f"p50 {result.p50_segment_latency_us:8.2f} us, "
+            f"p99 {result.p99_segment_latency_us:8.2f} us per segment, "
+            f"max loop lag {result.max_event_loop_lag_ms:6.2f} ms"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Time taken to start the rtc6-fastcs CLI and IOC
+
+Reports the median, min and max wall time of:
+
+- version: `rtc6-fastcs --version`, which only pays for the CLI's own imports
+- ioc_cold: `ioc --simulate` in an empty folder, until its first PV connects, which
+  includes generating index.bob
+- ioc_cached: the same again in the folder of a previous start, so index.bob is
+  reused as long as the controller hasn't changed
+
+Run with `python benchmarks/startup.py --output results.json`
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from rtc6_fastcs import __version__
+
+CONNECT_ATTEMPT_TIMEOUT = 0.5
+IOC_START_TIMEOUT = 60
+
+
+@dataclass
+class Result:
+    mode: str
+    runs: int
+    median_s: float
+    min_s: float
+    max_s: float
+
+
+def summarise(mode: str, seconds: list[float]) -> Result:
+    return Result(
+        mode=mode,
+        runs=len(seconds),
+        median_s=statistics.median(seconds),
+        min_s=min(seconds),
+        max_s=max(seconds),
+    )
+
+
+def time_version() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "rtc6_fastcs", "--version"],
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+async def time_ioc(output_path: Path) -> float:
+    """Seconds from starting the IOC until one of its PVs connects"""
+    from ophyd_async.epics.core import epics_signal_r
+
+    prefix = f"RTC6START{os.getpid()}"
+    start = time.perf_counter()
+    ioc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "rtc6_fastcs",
+            "ioc",
+            prefix,
+            "--simulate",
+            "--output-path",
+            str(output_path),
+        ],
+        stdin=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - start < IOC_START_TIMEOUT:
+            if ioc.poll() is not None:
+                raise RuntimeError(f"IOC exited with code {ioc.returncode}")
+            signal = epics_signal_r(int, prefix + ":INFO:SerialNumber")
+            try:
+                await signal.connect(timeout=CONNECT_ATTEMPT_TIMEOUT)
+            except Exception:
+                continue
+            return time.perf_counter() - start
+        raise TimeoutError(f"IOC didn't start within {IOC_START_TIMEOUT}s")
+    finally:
+        ioc.terminate()
+        ioc.wait()
+
+
+async def run(repeats: int) -> list[Result]:
+    results = [summarise("version", [time_version() for _ in range(repeats)])]
+    cold, cached = [], []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as folder:
+            cold.append(await time_ioc(Path(folder)))
+            cached.append(await time_ioc(Path(folder)))
+    results.append(summarise("ioc_cold", cold))
+    results.append(summarise("ioc_cached", cached))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="file to write JSON results to")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.repeats))
+    report = {
+        "version": __version__,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(result) for result in results],
+    }
+    for result in results:
+        print(
+            f"{result.mode:>10}: median {result.median_s:7.3f} s, "
+            f"min {result.min_s:7.3f} s, max {result.max_s:7.3f} s"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
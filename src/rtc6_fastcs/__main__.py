@@ -1,23 +1,30 @@
+import hashlib
 import logging
 import subprocess
 from functools import cache
+from importlib.metadata import version
 from pathlib import Path
-from typing import Annotated
-from fastcs.launch import FastCS
+from typing import TYPE_CHECKING, Annotated
 
-from fastcs.backend import Backend
 import typer
-from fastcs.transport.epics.options import EpicsIOCOptions, EpicsOptions
-
-from rtc6_fastcs.controller import RtcController
 
 from . import __version__
 
+# Everything else is imported by the command which needs it, so that e.g. --version
+# doesn't wait for fastcs, numpy and the bindings to load
+if TYPE_CHECKING:
+    from fastcs.controller import BaseController
+
+    from rtc6_fastcs.controller import RtcController
+
 LOGGER = logging.getLogger(__name__)
 
 __all__ = ["main"]
 
 CWD_AT_LOADING = Path.cwd()
+# Written next to index.bob and index.md, so they are only regenerated if the
+# controller's attributes have changed
+UI_HASH_FILE = "index.hash"
 app = typer.Typer()
 
 
@@ -47,21 +54,66 @@ def install_library():
     )
 
 
-def create_ui_and_docs(controller: RtcController, prefix: str, output_path: Path):
-    from fastcs.transport.epics.gui import EpicsGUI, EpicsGUIOptions
-    from fastcs.transport.epics.docs import EpicsDocs, EpicsDocsOptions
+def controller_schema_hash(controller: "BaseController", prefix: str) -> str:
+    """Hash of everything about a controller which appears in its GUI and docs: the
+    path, name, type and options of each attribute and command"""
+    from fastcs.backend import build_controller_api
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{prefix} fastcs {version('fastcs')}\n".encode())
+    for api in build_controller_api(controller).walk_api():
+        path = ":".join(api.path)
+        for name, attr in sorted(api.attributes.items()):
+            digest.update(
+                f"{path} {name} {type(attr).__name__} {attr.datatype!r} "
+                f"{attr.group} {attr.description}\n".encode()
+            )
+        for name, method in sorted(api.command_methods.items()):
+            digest.update(f"{path} {name} command {method.group}\n".encode())
+    return digest.hexdigest()
+
+
+def create_ui_and_docs(
+    controller: "RtcController", prefix: str, output_path: Path, force: bool = False
+) -> bool:
+    """Generate index.bob and index.md, unless those in `output_path` were made for
+    the same controller schema. Returns whether they were generated.
 
-    gui = EpicsGUI(controller, prefix)
+    Only index.bob is checked for, as some versions of fastcs don't write docs."""
+    schema_hash = controller_schema_hash(controller, prefix)
+    hash_file = output_path / UI_HASH_FILE
+    if (
+        not force
+        and (output_path / "index.bob").exists()
+        and hash_file.exists()
+        and hash_file.read_text().strip() == schema_hash
+    ):
+        LOGGER.info("GUI and docs are up to date, not regenerating them")
+        return False
+
+    from fastcs.backend import build_controller_api
+    from fastcs.transport.epics.docs import EpicsDocs
+    from fastcs.transport.epics.gui import EpicsGUI
+    from fastcs.transport.epics.options import EpicsDocsOptions, EpicsGUIOptions
+
+    controller_api = build_controller_api(controller)
+    gui = EpicsGUI(controller_api, prefix)
     gui.create_gui(EpicsGUIOptions(output_path / "index.bob"))
-    docs = EpicsDocs(controller)
+    docs = EpicsDocs(controller_api)
     docs.create_docs(EpicsDocsOptions(output_path / "index.md"))
+    hash_file.write_text(schema_hash + "\n")
+    return True
 
 
 @app.command()
 def ioc(
     pv_prefix: Annotated[str, typer.Argument(help="Name of the IOC")] = "RTC6ETH",
     box_ip: Annotated[
-        str, typer.Argument(help="IP Address of the RTC6 ethbox")
+        str,
+        typer.Argument(
+            help="IP Address of the RTC6 ethbox, or comma separated addresses of "
+            "several, each of which gets its PVs under CARDn:"
+        ),
     ] = "172.23.17.192",
     program_file_dir: Annotated[
         str, typer.Argument(help="Path to the directory of the RTC6 program files")
@@ -75,7 +127,9 @@ def ioc(
     coordinate_system_correction_file: Annotated[
         str,
         typer.Argument(
-            help="path to a numpy matrix to use to correct the coordinate system",
+            help="path to a numpy 2x2 matrix, or 2x3 affine matrix with an offset "
+            "column, or a .npz file which may also have a distortion grid, to use to "
+            "correct the coordinate system. Can be reloaded with TRANSFORM:Reload",
         ),
     ] = "./correction_files/coord_transform",
     retry_connect: Annotated[
@@ -84,6 +138,18 @@ def ioc(
             help="Retry connecting to the RTC6 if the initial attempt fails",
         ),
     ] = False,
+    simulate: Annotated[
+        bool,
+        typer.Option(
+            help="Use a simulated RTC6 instead of connecting to an ethbox",
+        ),
+    ] = False,
+    profiles_file: Annotated[
+        str,
+        typer.Option(
+            help="JSON file of named settings profiles, to apply with CONTROL:Profile",
+        ),
+    ] = "",
     output_path: Annotated[
         Path,
         typer.Option(
@@ -96,10 +162,20 @@ def ioc(
             resolve_path=True,
         ),
     ] = CWD_AT_LOADING,
+    regenerate_ui: Annotated[
+        bool,
+        typer.Option(
+            help="Generate index.bob and index.md even if the controller hasn't "
+            "changed since they were last generated",
+        ),
+    ] = False,
 ):
     """
     Start up the service
     """
+    from fastcs.launch import FastCS
+    from fastcs.transport.epics.ca.options import EpicsCAOptions
+    from fastcs.transport.epics.options import EpicsIOCOptions
 
     controller = get_controller(
         box_ip,
@@ -107,14 +183,91 @@ def ioc(
         correction_file,
         coordinate_system_correction_file,
         retry_connect,
+        simulate,
+        profiles_file,
     )
-    create_ui_and_docs(controller, pv_prefix, output_path)
+    create_ui_and_docs(controller, pv_prefix, output_path, regenerate_ui)
 
-    epics_options = EpicsOptions(ioc=EpicsIOCOptions(pv_prefix=pv_prefix))
-    fastcs = FastCS(controller, epics_options)
+    epics_options = EpicsCAOptions(ca_ioc=EpicsIOCOptions(pv_prefix=pv_prefix))
+    fastcs = FastCS(controller, [epics_options])
     fastcs.run()
 
 
+@app.command()
+def compile_job(
+    input_file: Annotated[
+        Path,
+        typer.Argument(
+            help="A .npy segment array in bits, or a text file with a Python list of "
+            "(x, y, laser_on) / (x, y, angle_deg) tuples in um",
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+    output_file: Annotated[Path, typer.Argument(help="Job file to write")],
+    bits_per_um: Annotated[
+        float, typer.Option(help="Scale of a list of points in um")
+    ] = 33,
+    transform: Annotated[
+        Path | None,
+        typer.Option(
+            help="A coordinate system transform to apply, as given to the IOC",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    jump_speed: Annotated[float | None, typer.Option(help="bits/ms")] = None,
+    mark_speed: Annotated[float | None, typer.Option(help="bits/ms")] = None,
+    jump_delay: Annotated[int | None, typer.Option(help="10us")] = None,
+    mark_delay: Annotated[int | None, typer.Option(help="10us")] = None,
+    polygon_delay: Annotated[int | None, typer.Option(help="10us")] = None,
+    description: Annotated[str, typer.Option()] = "",
+):
+    """
+    Compile a shape to a job file, to be loaded by the IOC with LIST:LoadJob
+    """
+    import ast
+
+    import numpy as np
+
+    from rtc6_fastcs.coordinates import CoordinateTransform
+    from rtc6_fastcs.job_file import write_job
+    from rtc6_fastcs.settings_profiles import SettingsProfile
+    from rtc6_fastcs.shape_cache import compile_shape
+
+    coordinates = None if transform is None else CoordinateTransform.load(transform)
+    scale: float | None = bits_per_um
+    if input_file.suffix == ".npy":
+        scale = None  # already in bits
+        segments = np.load(input_file, mmap_mode="r")
+        if coordinates is not None:
+            segments = np.array(segments)
+            corrected = coordinates.apply(
+                np.column_stack((segments["x"], segments["y"]))
+            )
+            segments["x"], segments["y"] = corrected.T
+    else:
+        points = ast.literal_eval(input_file.read_text())
+        segments = compile_shape(points, bits_per_um, coordinates)
+    # Only the settings given are stored, the IOC's are used for the rest
+    settings = SettingsProfile(
+        jump_speed=jump_speed,
+        mark_speed=mark_speed,
+        jump_delay=jump_delay,
+        mark_delay=mark_delay,
+        polygon_delay=polygon_delay,
+    )
+    header = write_job(
+        output_file,
+        segments,
+        settings if settings.to_dict() else None,
+        scale,
+        coordinates,
+        description,
+    )
+    typer.echo(f"Wrote {header.segment_count} segments to {output_file}")
+
+
 @cache
 def get_controller(
     box_ip: str,
@@ -122,13 +275,19 @@ def get_controller(
     correction_file: str,
     coordinate_system_correction_file: str,
     retry_connect: bool,
-) -> RtcController:
+    simulate: bool = False,
+    profiles_file: str = "",
+) -> "RtcController":
+    from rtc6_fastcs.controller import RtcController
+
     return RtcController(
         box_ip,
         program_file,
         correction_file,
         coordinate_system_correction_file,
         retry_connect,
+        simulate,
+        profiles_file,
     )
 
 
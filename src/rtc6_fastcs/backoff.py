@@ -0,0 +1,26 @@
+"""Delays between attempts to reconnect to the eth box"""
+
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Backoff:
+    """Exponential backoff with jitter: each delay is `factor` times the last, up to
+    `maximum`, less a random fraction of up to `jitter` of it so that retries from
+    several clients don't line up"""
+
+    initial: float = 0.5  # s
+    maximum: float = 30.0  # s
+    factor: float = 2.0
+    jitter: float = 0.5
+    rng: random.Random = field(default_factory=random.Random)
+    attempts: int = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.maximum, self.initial * self.factor**self.attempts)
+        self.attempts += 1
+        return delay * (1 - self.jitter * self.rng.random())
+
+    def reset(self) -> None:
+        self.attempts = 0
@@ -1,5 +1,7 @@
 #include <pybind11/pybind11.h>
+#include <algorithm>
 #include <cstdint>
+#include <mutex>
 #include <string>
 
 #include "scanlab/rtc6.h"
@@ -12,6 +14,8 @@ using boost::format;
 // Bindings from the rtc6 DLL to python
 // This should simplify some functions where possible,
 // but not hold state, since that is more the job of the IOC
+// Every function takes the number of the card it is for, so one process can drive
+// several eth boxes. Calls to different cards can be made from different threads.
 
 // Custom exceptions allow us to catch RtcError and derivatives in python-land
 // Examples for use of the RTC6 library often involve returning int error codes,
@@ -33,6 +37,7 @@ class RtcListError : public RtcError
 const uint ERROR_NO_ERROR = 0U;
 const uint ERROR_NO_CARD = 1U;
 const uint ERROR_VERSION_MISMATCH = 256U;
+const uint ERROR_LIST_REJECTED = 96U; // busy or invalid input pointer
 
 // Utilities for testing - TODO remove when things are working
 int add(int i, int j)
@@ -61,6 +66,10 @@ std::string ip_int_to_str(int ip) // remove this one from exposed functions
 
 void init_dll()
 {
+    // Initialising again would reset cards which are already connected
+    static std::once_flag initialised;
+    std::call_once(initialised, []()
+                   {
     const auto initLib = init_rtc6_dll();
     if (initLib != ERROR_NO_ERROR)
     {
@@ -72,7 +81,7 @@ void init_dll()
         {
             throw RtcError(str(format("Initialisation of the RTC6 library failed with error code: %1%") % initLib));
         }
-    }
+    } });
 }
 
 std::string failed_text(std::string task, int card, int errorCode)
@@ -141,38 +150,43 @@ int load_program_and_correction_files(uint card, char *programFilePath, char *co
 }
 
 // Real functions which we expect to use and expose
-void clear_all_errors() { reset_error(-1); }
+void clear_all_errors(uint card) { n_reset_error(card, -1); }
 
-void check_conection()
+void check_conection(uint card)
 {
-    const int connection = eth_check_connection();
+    const int connection = n_eth_check_connection(card);
     if (!connection) // 1 if connection OK
     {
-        const int error = get_error();
-        const std::string errorString = parse_error(get_error());
+        const int error = n_get_error(card);
+        const std::string errorString = parse_error(error);
         throw RtcConnectionError(str(format("Checking connection to the eth box failed! Result of check: %1%. Error %2%: %3%") % connection % error % errorString));
     }
 }
 
-std::string get_error_string()
+std::string get_error_string(uint card)
 {
-    return parse_error(get_error());
+    return parse_error(n_get_error(card));
 }
 
-int connect(const char *ipStr, char *programFilePath, char *correctionFilePath)
+int connect(const char *ipStr, char *programFilePath, char *correctionFilePath, uint card)
 {
     init_dll();
-    // The library allows for connecting to multiple cards, but we just use one
+    // Each eth box is given its own card number, used by every later call for it
     // See manual page 855 for info about the conversion of IP address to an int
-    int cardNo = eth_assign_card_ip(eth_convert_string_to_ip(ipStr), 0);
+    int cardNo = eth_assign_card_ip(eth_convert_string_to_ip(ipStr), card);
+    if (cardNo != static_cast<int>(card))
+    {
+        const int error = get_last_error();
+        throw RtcError(str(format("Could not assign card %1% to the eth box at %2%, got card %3%. Error code: %4%. Description: %5%") % card % ipStr % cardNo % error % parse_error(error)));
+    }
     int result = select_rtc(cardNo);
     if (result != cardNo)
     {
-        const int error = get_error();
+        const int error = n_get_error(card);
         throw RtcError(str(format("select_rtc for card %1% failed with result: %2%. Most likely, a card was not found at the given IP address: %3%. Alternatively, it may already be acquired by another process. Error code: %4%. Description: %5%") % cardNo % result % ipStr % error % parse_error(error)));
     }
     return load_program_and_correction_files(cardNo, programFilePath, correctionFilePath);
-    const int error = get_error();
+    const int error = n_get_error(card);
     if (error)
     {
         throw RtcError(str(format("Error loading program files: %1%") % parse_error(error)));
@@ -202,18 +216,18 @@ private:
     bool isAcquired;
 };
 
-CardInfo get_card_info()
+CardInfo get_card_info(uint card)
 {
-    check_conection();
+    check_conection(card);
     int32_t out[16];
     auto out_ptr = reinterpret_cast<std::uintptr_t>(&out);
-    eth_get_card_info(1, out_ptr);
+    eth_get_card_info(card, out_ptr);
     return CardInfo(out);
 }
 
-void init_list_loading(int listNo)
+void init_list_loading(int listNo, uint card)
 {
-    set_start_list(listNo);
+    n_set_start_list(card, listNo);
 }
 enum ListStatus
 {
@@ -236,10 +250,15 @@ enum LaserMode
     YAG5,
     LASER6,
 };
-py::list get_list_statuses()
+py::list get_list_statuses(uint card)
 {
     py::list result;
-    std::bitset<32> statuses(read_status());
+    uint status_bits;
+    {
+        py::gil_scoped_release release;
+        status_bits = n_read_status(card);
+    }
+    std::bitset<32> statuses(status_bits);
     for (int status = 0; status != 8; status++)
     {
         if (statuses[status])
@@ -250,17 +269,199 @@ py::list get_list_statuses()
     return result;
 }
 
-void close_connection()
+// One entry of a segment array, must match SEGMENT_DTYPE in rtc6_fastcs/segments.py
+struct Segment
+{
+    int32_t opcode;
+    int32_t x;
+    int32_t y;
+    double angle;
+};
+enum Opcode
+{
+    JUMP,
+    LINE,
+    ARC,
+};
+
+const Segment *segment_data(const py::buffer_info &info)
+{
+    if (info.ndim != 1 || info.itemsize != sizeof(Segment) || (info.shape[0] > 1 && info.strides[0] != sizeof(Segment)))
+    {
+        throw RtcListError(str(format("Segments must be a contiguous 1D array of %1% byte segments, got %2%D array of %3% byte items") % sizeof(Segment) % info.ndim % info.itemsize));
+    }
+    return static_cast<const Segment *>(info.ptr);
+}
+
+// Adds up to count segments to whichever list or subroutine is being loaded, stopping
+// at the first unknown opcode. Must be called without the GIL.
+size_t add_segments(uint card, const Segment *data, size_t count, int32_t &badOpcode)
+{
+    size_t consumed = 0;
+    for (; consumed != count && badOpcode == -1; consumed++)
+    {
+        const Segment &segment = data[consumed];
+        switch (segment.opcode)
+        {
+        case Opcode::JUMP:
+            n_jump_abs(card, segment.x, segment.y);
+            break;
+        case Opcode::LINE:
+            n_mark_abs(card, segment.x, segment.y);
+            break;
+        case Opcode::ARC:
+            n_arc_abs(card, segment.x, segment.y, segment.angle);
+            break;
+        default:
+            badOpcode = segment.opcode;
+        }
+    }
+    return consumed;
+}
+
+size_t load_segments(py::buffer segments, uint card)
+{
+    // Read the numpy array in place through the buffer protocol rather than copying
+    const py::buffer_info info = segments.request();
+    const auto *data = segment_data(info);
+    const size_t count = static_cast<size_t>(info.shape[0]);
+    size_t consumed = 0;
+    int32_t badOpcode = -1;
+    {
+        // Nothing in here touches python objects, so let the event loop keep going
+        py::gil_scoped_release release;
+        consumed = add_segments(card, data, std::min(count, static_cast<size_t>(n_get_list_space(card))), badOpcode);
+    }
+    if (badOpcode != -1)
+    {
+        throw RtcListError(str(format("Unknown opcode %1% in segment %2%, %3% segments were loaded before it") % badOpcode % (consumed - 1) % (consumed - 1)));
+    }
+    return consumed;
+}
+
+// Subroutines live in the memory after lists 1 and 2. Loading one moves the input
+// pointer there, so it is put back afterwards.
+void load_subroutine(uint index, py::buffer segments, uint card)
 {
-    // TODO: check if there is anything to release
-    int releasedCard = release_rtc(1);
+    const py::buffer_info info = segments.request();
+    const auto *data = segment_data(info);
+    const size_t count = static_cast<size_t>(info.shape[0]);
+    int32_t badOpcode = -1;
+    uint error;
+    {
+        py::gil_scoped_release release;
+        uint listNo, position;
+        n_get_list_pointer(card, &listNo, &position);
+        n_load_sub(card, index);
+        add_segments(card, data, count, badOpcode);
+        n_list_return(card);
+        n_load_list(card, listNo, position);
+        error = n_get_error(card) & ERROR_LIST_REJECTED;
+    }
+    if (badOpcode != -1)
+    {
+        throw RtcListError(str(format("Unknown opcode %1% in subroutine %2%") % badOpcode % index));
+    }
+    if (error)
+    {
+        throw RtcListError(str(format("Loading subroutine %1% failed with error %2%: %3%") % index % error % parse_error(error)));
+    }
+}
+
+// One site of a step and repeat, must match a row of an (N, 2) int32 array
+struct Offset
+{
+    int32_t x;
+    int32_t y;
+};
+
+size_t load_subroutine_calls(uint index, py::buffer offsets, uint passes, uint card)
+{
+    const py::buffer_info info = offsets.request();
+    if (info.ndim != 2 || info.itemsize != sizeof(int32_t) || info.shape[1] != 2 || (info.shape[0] > 1 && info.strides[0] != sizeof(Offset)))
+    {
+        throw RtcListError(str(format("Offsets must be a contiguous (N, 2) array of 4 byte ints, got %1%D array of %2% byte items") % info.ndim % info.itemsize));
+    }
+    const auto *data = static_cast<const Offset *>(info.ptr);
+    const size_t count = static_cast<size_t>(info.shape[0]);
+    size_t consumed = 0;
+    {
+        py::gil_scoped_release release;
+        // Each site is an offset and a call per pass, with room to reset the offset
+        const size_t space = n_get_list_space(card);
+        const size_t toLoad = space ? std::min(count, (space - 1) / (1 + passes)) : 0;
+        for (; consumed != toLoad; consumed++)
+        {
+            n_set_offset_list(card, 1, data[consumed].x, data[consumed].y, 0);
+            for (uint pass = 0; pass != passes; pass++)
+            {
+                n_sub_call(card, index);
+            }
+        }
+        if (consumed)
+        {
+            n_set_offset_list(card, 1, 0, 0, 0);
+        }
+    }
+    return consumed;
+}
+
+// Traces record up to 8 signals into the measurement memory every period, see
+// set_trigger8. Signal numbers are those of the manual's table.
+void add_trace_start(uint period, py::list signals, uint card)
+{
+    uint s[8] = {0, 0, 0, 0, 0, 0, 0, 0};
+    if (signals.size() > 8)
+    {
+        throw RtcListError(str(format("A trace can record at most 8 signals, got %1%") % signals.size()));
+    }
+    for (size_t i = 0; i != signals.size(); i++)
+    {
+        s[i] = signals[i].cast<uint>();
+    }
+    py::gil_scoped_release release;
+    n_set_trigger8(card, period, s[0], s[1], s[2], s[3], s[4], s[5], s[6], s[7]);
+}
+
+void add_trace_stop(uint card)
+{
+    n_set_trigger8(card, 0, 0, 0, 0, 0, 0, 0, 0, 0);
+}
+
+py::tuple get_trace_status(uint card)
+{
+    uint busy, samples;
+    {
+        py::gil_scoped_release release;
+        n_measurement_status(card, &busy, &samples);
+    }
+    return py::make_tuple(busy != 0, samples);
+}
+
+void read_trace(uint channel, uint offset, py::buffer out, uint card)
+{
+    // Written in place through the buffer protocol, e.g. into a row of a ring buffer
+    const py::buffer_info info = out.request(true);
+    if (info.ndim != 1 || info.itemsize != sizeof(int32_t) || (info.shape[0] > 1 && info.strides[0] != sizeof(int32_t)))
+    {
+        throw RtcError(str(format("read_trace needs a contiguous 1D array of 4 byte ints, got %1%D array of %2% byte items") % info.ndim % info.itemsize));
+    }
+    const uint count = static_cast<uint>(info.shape[0]);
+    auto out_ptr = reinterpret_cast<std::uintptr_t>(info.ptr);
+    py::gil_scoped_release release;
+    n_get_waveform_offset(card, channel, offset, count, out_ptr);
+}
+
+void close_connection(uint card)
+{
+    int releasedCard = release_rtc(card);
     if (!releasedCard)
     {
         throw RtcConnectionError("Could not release card - maybe it was not acquired?");
     }
 }
 
-void set_laser_mode_by_enum_string(std::string mode)
+void set_laser_mode_by_enum_string(std::string mode, uint card)
 {
     static std::unordered_map<std::string, LaserMode> const table = {
         {"CO2", LaserMode::CO2},
@@ -274,7 +475,7 @@ void set_laser_mode_by_enum_string(std::string mode)
     auto m = table.find(mode);
     if (m != table.end())
     {
-        set_laser_mode(m->second);
+        n_set_laser_mode(card, m->second);
     }
     else
     {
@@ -282,6 +483,38 @@ void set_laser_mode_by_enum_string(std::string mode)
     }
 }
 
+// Library functions exposed as they are, for the given card. These are in their own
+// namespace as most share a name with the library's single card versions.
+namespace for_card
+{
+void add_arc_to(int x, int y, double angle, uint card) { n_arc_abs(card, x, y, angle); }
+void add_jump_to(int x, int y, uint card) { n_jump_abs(card, x, y); }
+void add_line_to(int x, int y, uint card) { n_mark_abs(card, x, y); }
+void add_list_repeat(uint card) { n_list_repeat(card); }
+void add_list_until(uint number, uint card) { n_list_until(card, number); }
+void add_laser_on(uint time, uint card) { n_laser_on_list(card, time); }
+uint get_error(uint card) { return n_get_error(card); }
+uint get_last_error(uint card) { return n_get_last_error(card); }
+void set_laser_control(uint settings, uint card) { n_set_laser_control(card, settings); }
+uint get_input_pointer(uint card) { return n_get_input_pointer(card); }
+uint get_out_pointer(uint card) { return n_get_out_pointer(card); }
+void config_list_memory(uint list1, uint list2, uint card) { n_config_list(card, list1, list2); }
+uint load_list(uint listNo, uint position, uint card) { return n_load_list(card, listNo, position); }
+void set_end_of_list(uint card) { n_set_end_of_list(card); }
+void set_mark_speed_ctrl(double speed, uint card) { n_set_mark_speed_ctrl(card, speed); }
+void set_jump_speed_ctrl(double speed, uint card) { n_set_jump_speed_ctrl(card, speed); }
+void set_sky_writing_mode(uint mode, uint card) { n_set_sky_writing_mode(card, mode); }
+void set_scanner_delays(uint jump, uint mark, uint polygon, uint card) { n_set_scanner_delays_ctrl(card, jump, mark, polygon); }
+void execute_list(uint listNo, uint card) { n_execute_list(card, listNo); }
+void goto_xy(int x, int y, uint card) { n_goto_xy(card, x, y); }
+void auto_change(uint card) { n_auto_change(card); }
+uint get_io_status(uint card) { return n_get_io_status(card); }
+uint get_list_space(uint card) { return n_get_list_space(card); }
+uint get_config_list(uint card) { return n_get_config_list(card); }
+uint get_rtc_mode(uint card) { return n_get_rtc_mode(card); }
+double get_temperature(uint card) { return n_get_temperature(card); }
+} // namespace for_card
+
 // Definition of our exposed python module - things must be registered here to be accessible
 PYBIND11_MODULE(rtc6_bindings, m)
 {
@@ -317,40 +550,57 @@ PYBIND11_MODULE(rtc6_bindings, m)
         .value("LASER6", LaserMode::LASER6);
 
     // Real functions which are intended to be used
-    m.def("check_connection", &check_conection, "check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.");
-    m.def("connect", &connect, "connect to the eth-box at the given IP", py::arg("ip_string"), py::arg("program_file_path"), py::arg("correction_file_path"));
-    m.def("close", &close_connection, "close the open connection, if any");
-    m.def("get_card_info", &get_card_info, "get info for the connected card; throws RtcConnectionError on failure");
-    m.def("init_list_loading", &init_list_loading, "initialise the given list (1 or 2)");
-    m.def("get_list_statuses", &get_list_statuses, "get the statuses of the command lists");
-    m.def("get_error", &get_error, "get the current error code. 0 is no error. table of errors is on p387, get_error_string() can be called for a human-readable version.");
-    m.def("get_error_string", &get_error_string, "get human-readable error info");
-    m.def("clear_errors", &clear_all_errors, "clear errors in the RTC6 library");
-
-    m.def("add_arc_to", &arc_abs, py::arg("x"), py::arg("y"), py::arg("angle"));
-    m.def("add_jump_to", &jump_abs, py::arg("x"), py::arg("y"));
-    m.def("add_line_to", &mark_abs, py::arg("x"), py::arg("y"));
-    m.def("add_laser_on", &laser_on_list, "turn the laser on for n bits of time, see page 450 ", py::arg("time_10us"));
+    // Most of these block on the ethernet connection, so release the GIL while they
+    // run. The library is not thread safe, so calls for each card should all come
+    // from one thread. Every function takes the card number last, 1 by default.
+    const auto release_gil = py::call_guard<py::gil_scoped_release>();
+    const auto card = py::arg("card") = 1U;
+    m.def("check_connection", &check_conection, "check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.", card, release_gil);
+    m.def("connect", &connect, "connect to the eth-box at the given IP as card number card", py::arg("ip_string"), py::arg("program_file_path"), py::arg("correction_file_path"), card, release_gil);
+    m.def("close", &close_connection, "close the open connection, if any", card, release_gil);
+    m.def("get_card_info", &get_card_info, "get info for the connected card; throws RtcConnectionError on failure", card, release_gil);
+    m.def("init_list_loading", &init_list_loading, "initialise the given list (1 or 2)", py::arg("list_no"), card, release_gil);
+    m.def("get_list_statuses", &get_list_statuses, "get the statuses of the command lists", card);
+    m.def("get_error", &for_card::get_error, "get the current error code. 0 is no error. table of errors is on p387, get_error_string() can be called for a human-readable version.", card, release_gil);
+    m.def("get_error_string", &get_error_string, "get human-readable error info", card, release_gil);
+    m.def("clear_errors", &clear_all_errors, "clear errors in the RTC6 library", card, release_gil);
+
+    m.def("add_arc_to", &for_card::add_arc_to, py::arg("x"), py::arg("y"), py::arg("angle"), card, release_gil);
+    m.def("add_jump_to", &for_card::add_jump_to, py::arg("x"), py::arg("y"), card, release_gil);
+    m.def("add_line_to", &for_card::add_line_to, py::arg("x"), py::arg("y"), card, release_gil);
+    m.def("load_segments", &load_segments, "add a contiguous numpy array of segments (opcode, x, y, angle) to the current list without copying it. Stops when the list is full, returns the number of segments loaded", py::arg("segments"), card);
+    m.def("load_subroutine", &load_subroutine, "load a contiguous numpy array of segments as subroutine index, in the memory after the lists. The list being loaded carries on from where it was", py::arg("index"), py::arg("segments"), card);
+    m.def("load_subroutine_calls", &load_subroutine_calls, "for each row of an (N, 2) int32 array of offsets, add the offset then call subroutine index passes times, and reset the offset at the end. Stops when the list is full, returns the number of offsets loaded", py::arg("index"), py::arg("offsets"), py::arg("passes"), card);
+    m.def("add_trace_start", &add_trace_start, "start recording up to 8 signals, by number from the table of set_trigger8, every period in 10us", py::arg("period"), py::arg("signals"), card);
+    m.def("add_trace_stop", &add_trace_stop, "stop recording signals", card, release_gil);
+    m.def("add_list_repeat", &for_card::add_list_repeat, "mark the start of a block of list commands to be repeated by add_list_until, see p459", card, release_gil);
+    m.def("add_list_until", &for_card::add_list_until, "repeat the list commands since add_list_repeat, number times in total, see p460", py::arg("number"), card, release_gil);
+    m.def("add_laser_on", &for_card::add_laser_on, "turn the laser on for n bits of time, see page 450 ", py::arg("time_10us"), card, release_gil);
 
     // Taken directly from the library, might need to be updated with better typing, enums etc.
-    m.def("get_last_error", &get_last_error, "get the last error for an ethernet command");
-    m.def("set_laser_mode", &set_laser_mode_by_enum_string, "set the mode of the laser, see p645", py::arg("mode"));
-    m.def("set_laser_control", &set_laser_control, "set the control settings of the laser, see p641", py::arg("settings"));
-    m.def("get_input_pointer", &get_input_pointer, "get the pointer of list input");
-    m.def("config_list_memory", &config_list, "set the memory for each position list, see p330", py::arg("list_1_mem"), py::arg("list_2_mem"));
-    m.def("load_list", &load_list, "set the pointer to load at position of list_no, see p330", py::arg("list_no"), py::arg("position"));
-    m.def("set_end_of_list", &set_end_of_list, "set the end of the list to be at the current pointer position");
+    m.def("get_last_error", &for_card::get_last_error, "get the last error for an ethernet command", card, release_gil);
+    m.def("set_laser_mode", &set_laser_mode_by_enum_string, "set the mode of the laser, see p645", py::arg("mode"), card, release_gil);
+    m.def("set_laser_control", &for_card::set_laser_control, "set the control settings of the laser, see p641", py::arg("settings"), card, release_gil);
+    m.def("get_input_pointer", &for_card::get_input_pointer, "get the pointer of list input", card, release_gil);
+    m.def("get_out_pointer", &for_card::get_out_pointer, "get the list position currently being executed, see p401", card, release_gil);
+    m.def("config_list_memory", &for_card::config_list_memory, "set the memory for each position list, see p330", py::arg("list_1_mem"), py::arg("list_2_mem"), card, release_gil);
+    m.def("load_list", &for_card::load_list, "set the pointer to load at position of list_no, see p330", py::arg("list_no"), py::arg("position"), card, release_gil);
+    m.def("set_end_of_list", &for_card::set_end_of_list, "set the end of the list to be at the current pointer position", card, release_gil);
 
     // simple control commands
-    m.def("set_mark_speed_ctrl", &set_mark_speed_ctrl, "set the speed for marks", py::arg("speed"));
-    m.def("set_jump_speed_ctrl", &set_jump_speed_ctrl, "set the speed for jumps", py::arg("speed"));
-    m.def("set_sky_writing_mode", &set_sky_writing_mode, "set the skywriting mode", py::arg("speed"));
-    m.def("set_scanner_delays", &set_scanner_delays_ctrl, "set the scanner delays, in 10us increments", py::arg("jump"), py::arg("mark"), py::arg("polygon"));
-    m.def("execute_list", &execute_list, "execute the current list");
-
-    m.def("get_io_status", &get_io_status, "---");
-    m.def("get_list_space", &get_list_space, "---");
-    m.def("get_config_list", &get_config_list, "---");
-    m.def("get_rtc_mode", &get_rtc_mode, "---");
-    m.def("get_temperature", &get_temperature, "---");
+    m.def("set_mark_speed_ctrl", &for_card::set_mark_speed_ctrl, "set the speed for marks", py::arg("speed"), card, release_gil);
+    m.def("set_jump_speed_ctrl", &for_card::set_jump_speed_ctrl, "set the speed for jumps", py::arg("speed"), card, release_gil);
+    m.def("set_sky_writing_mode", &for_card::set_sky_writing_mode, "set the skywriting mode", py::arg("speed"), card, release_gil);
+    m.def("set_scanner_delays", &for_card::set_scanner_delays, "set the scanner delays, in 10us increments", py::arg("jump"), py::arg("mark"), py::arg("polygon"), card, release_gil);
+    m.def("execute_list", &for_card::execute_list, "execute the current list", py::arg("list_no"), card, release_gil);
+    m.def("goto_xy", &for_card::goto_xy, "jump straight to x, y without loading a list, ignored while a list is executing", py::arg("x"), py::arg("y"), card, release_gil);
+    m.def("auto_change", &for_card::auto_change, "start the other list automatically when the currently executing list finishes, see p316", card, release_gil);
+
+    m.def("get_trace_status", &get_trace_status, "whether a trace is recording, and how many samples of each signal it has recorded", card);
+    m.def("read_trace", &read_trace, "read samples offset onwards of the channel-th signal of the trace (from 1) into a contiguous int32 array, filling it", py::arg("channel"), py::arg("offset"), py::arg("out"), card);
+    m.def("get_io_status", &for_card::get_io_status, "---", card, release_gil);
+    m.def("get_list_space", &for_card::get_list_space, "---", card, release_gil);
+    m.def("get_config_list", &for_card::get_config_list, "get the size of list 1 in positions, as set by config_list_memory; list 2 has the rest of the list memory left to the lists", card, release_gil);
+    m.def("get_rtc_mode", &for_card::get_rtc_mode, "---", card, release_gil);
+    m.def("get_temperature", &for_card::get_temperature, "---", card, release_gil);
 }
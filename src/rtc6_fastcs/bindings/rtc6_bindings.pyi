@@ -4,6 +4,7 @@ bindings for the scanlab rtc6 ethernet laser controller
 
 from __future__ import annotations
 import typing
+import typing_extensions
 
 __all__ = [
     "CardInfo",
@@ -16,6 +17,11 @@ __all__ = [
     "add_jump_to",
     "add_laser_on",
     "add_line_to",
+    "add_list_repeat",
+    "add_list_until",
+    "add_trace_start",
+    "add_trace_stop",
+    "auto_change",
     "check_connection",
     "clear_errors",
     "close",
@@ -31,10 +37,17 @@ __all__ = [
     "get_last_error",
     "get_list_space",
     "get_list_statuses",
+    "get_out_pointer",
     "get_rtc_mode",
     "get_temperature",
+    "get_trace_status",
+    "goto_xy",
     "init_list_loading",
     "load_list",
+    "load_segments",
+    "load_subroutine",
+    "load_subroutine_calls",
+    "read_trace",
     "set_end_of_list",
     "set_jump_speed_ctrl",
     "set_laser_control",
@@ -160,140 +173,208 @@ class RtcError(Exception):
 class RtcListError(Exception):
     pass
 
-def add_arc_to(x: int, y: int, angle: float) -> None: ...
-def add_jump_to(x: int, y: int) -> None: ...
-def add_laser_on(time_10us: int) -> None:
+def add_arc_to(x: int, y: int, angle: float, card: int = 1) -> None: ...
+def add_jump_to(x: int, y: int, card: int = 1) -> None: ...
+def add_laser_on(time_10us: int, card: int = 1) -> None:
     """
     turn the laser on for n bits of time, see page 450
     """
 
-def add_line_to(x: int, y: int) -> None: ...
-def check_connection() -> None:
+def add_line_to(x: int, y: int, card: int = 1) -> None: ...
+def add_list_repeat(card: int = 1) -> None:
+    """
+    mark the start of a block of list commands to be repeated by add_list_until, see p459
+    """
+
+def add_list_until(number: int, card: int = 1) -> None:
+    """
+    repeat the list commands since add_list_repeat, number times in total, see p460
+    """
+
+def add_trace_start(period: int, signals: list, card: int = 1) -> None:
+    """
+    start recording up to 8 signals, by number from the table of set_trigger8, every period in 10us
+    """
+
+def add_trace_stop(card: int = 1) -> None:
+    """
+    stop recording signals
+    """
+
+def auto_change(card: int = 1) -> None:
+    """
+    start the other list automatically when the currently executing list finishes, see p316
+    """
+
+def check_connection(card: int = 1) -> None:
     """
     check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.
     """
 
-def clear_errors() -> None:
+def clear_errors(card: int = 1) -> None:
     """
     clear errors in the RTC6 library
     """
 
-def close() -> None:
+def close(card: int = 1) -> None:
     """
     close the open connection, if any
     """
 
-def config_list_memory(list_1_mem: int, list_2_mem: int) -> None:
+def config_list_memory(list_1_mem: int, list_2_mem: int, card: int = 1) -> None:
     """
     set the memory for each position list, see p330
     """
 
-def connect(ip_string: str, program_file_path: str, correction_file_path: str) -> int:
+def connect(
+    ip_string: str, program_file_path: str, correction_file_path: str, card: int = 1
+) -> int:
     """
-    connect to the eth-box at the given IP
+    connect to the eth-box at the given IP as card number card
     """
 
-def execute_list(arg0: int) -> None:
+def execute_list(list_no: int, card: int = 1) -> None:
     """
     execute the current list
     """
 
-def get_card_info() -> CardInfo:
+def get_card_info(card: int = 1) -> CardInfo:
     """
     get info for the connected card; throws RtcConnectionError on failure
     """
 
-def get_config_list() -> None:
+def get_config_list(card: int = 1) -> int:
     """
-    ---
+    get the size of list 1 in positions, as set by config_list_memory; list 2 has the rest of the list memory left to the lists
     """
 
-def get_error() -> int:
+def get_error(card: int = 1) -> int:
     """
     get the current error code. 0 is no error. table of errors is on p387, get_error_string() can be called for a human-readable version.
     """
 
-def get_error_string() -> str:
+def get_error_string(card: int = 1) -> str:
     """
     get human-readable error info
     """
 
-def get_input_pointer() -> int:
+def get_input_pointer(card: int = 1) -> int:
     """
     get the pointer of list input
     """
 
-def get_io_status() -> int:
+def get_io_status(card: int = 1) -> int:
     """
     ---
     """
 
-def get_last_error() -> int:
+def get_last_error(card: int = 1) -> int:
     """
     get the last error for an ethernet command
     """
 
-def get_list_space() -> int:
+def get_list_space(card: int = 1) -> int:
     """
     ---
     """
 
-def get_list_statuses() -> list:
+def get_list_statuses(card: int = 1) -> list:
     """
     get the statuses of the command lists
     """
 
-def get_rtc_mode() -> int:
+def get_out_pointer(card: int = 1) -> int:
+    """
+    get the list position currently being executed, see p401
+    """
+
+def get_rtc_mode(card: int = 1) -> int:
     """
     ---
     """
 
-def get_temperature() -> float:
+def get_temperature(card: int = 1) -> float:
     """
     ---
     """
 
-def init_list_loading(arg0: int) -> None:
+def get_trace_status(card: int = 1) -> tuple:
+    """
+    whether a trace is recording, and how many samples of each signal it has recorded
+    """
+
+def goto_xy(x: int, y: int, card: int = 1) -> None:
+    """
+    jump straight to x, y without loading a list, ignored while a list is executing
+    """
+
+def init_list_loading(list_no: int, card: int = 1) -> None:
     """
     initialise the given list (1 or 2)
     """
 
-def load_list(list_no: int, position: int) -> int:
+def load_list(list_no: int, position: int, card: int = 1) -> int:
     """
     set the pointer to load at position of list_no, see p330
     """
 
-def set_end_of_list() -> None:
+def load_segments(segments: typing_extensions.Buffer, card: int = 1) -> int:
+    """
+    add a contiguous numpy array of segments (opcode, x, y, angle) to the current list without copying it. Stops when the list is full, returns the number of segments loaded
+    """
+
+def load_subroutine(
+    index: int, segments: typing_extensions.Buffer, card: int = 1
+) -> None:
+    """
+    load a contiguous numpy array of segments as subroutine index, in the memory after the lists. The list being loaded carries on from where it was
+    """
+
+def load_subroutine_calls(
+    index: int, offsets: typing_extensions.Buffer, passes: int, card: int = 1
+) -> int:
+    """
+    for each row of an (N, 2) int32 array of offsets, add the offset then call subroutine index passes times, and reset the offset at the end. Stops when the list is full, returns the number of offsets loaded
+    """
+
+def read_trace(
+    channel: int, offset: int, out: typing_extensions.Buffer, card: int = 1
+) -> None:
+    """
+    read samples offset onwards of the channel-th signal of the trace (from 1) into a contiguous int32 array, filling it
+    """
+
+def set_end_of_list(card: int = 1) -> None:
     """
     set the end of the list to be at the current pointer position
     """
 
-def set_jump_speed_ctrl(speed: float) -> None:
+def set_jump_speed_ctrl(speed: float, card: int = 1) -> None:
     """
     set the speed for jumps
     """
 
-def set_laser_control(settings: int) -> None:
+def set_laser_control(settings: int, card: int = 1) -> None:
     """
     set the control settings of the laser, see p641
     """
 
-def set_laser_mode(mode: str) -> None:
+def set_laser_mode(mode: str, card: int = 1) -> None:
     """
     set the mode of the laser, see p645
     """
 
-def set_mark_speed_ctrl(speed: float) -> None:
+def set_mark_speed_ctrl(speed: float, card: int = 1) -> None:
     """
     set the speed for marks
     """
 
-def set_scanner_delays(jump: int, mark: int, polygon: int) -> None:
+def set_scanner_delays(jump: int, mark: int, polygon: int, card: int = 1) -> None:
     """
     set the scanner delays, in 10us increments
     """
 
-def set_sky_writing_mode(speed: int) -> None:
+def set_sky_writing_mode(speed: int, card: int = 1) -> None:
     """
     set the skywriting mode
     """
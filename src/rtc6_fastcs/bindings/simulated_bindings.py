@@ -0,0 +1,723 @@
+"""
+Hardware-free simulation of the rtc6_bindings module, for tests and benchmarks
+
+This implements the same API as rtc6_bindings.pyi against in-memory cards, one per
+card number. Lists are stored as segment arrays, and execution takes as long as the
+card would take to draw them at the current speeds and delays, with list statuses
+updated accordingly.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from enum import IntEnum
+
+import numpy as np
+
+from rtc6_fastcs.capture import Signal
+from rtc6_fastcs.estimation import (
+    DEFAULT_JUMP_SPEED,
+    DEFAULT_MARK_SPEED,
+    DELAY_UNIT,
+    ControlSettings,
+    segment_times,
+)
+from rtc6_fastcs.segments import SEGMENT_DTYPE, Opcode, segment_ends
+
+# Error bits, see parse_error in rtc6_bindings.cpp
+ERROR_NO_RESPONSE = 1 << 3
+ERROR_INVALID_PARAMETER = 1 << 4
+ERROR_BUSY = 1 << 5
+ERROR_INVALID_INPUT_POINTER = 1 << 6
+
+# Positions shared by lists 1 and 2, with whatever they leave for subroutines
+LIST_MEMORY = 1 << 23
+DEFAULT_LIST_MEMORY = 1 << 20
+SIMULATED_SERIAL_NUMBER = 999999
+SIMULATED_FIRMWARE_VERSION = 600
+# How far the simulated scan head lags behind the positions sent to it
+TRACKING_DELAY = 2e-4  # s
+
+
+class RtcError(Exception):
+    pass
+
+
+# Derived from RtcError as in the real bindings
+class RtcConnectionError(RtcError):
+    pass
+
+
+class RtcListError(RtcError):
+    pass
+
+
+class LaserMode(IntEnum):
+    CO2 = 0
+    YAG1 = 1
+    YAG2 = 2
+    YAG3 = 3
+    LASER4 = 4
+    YAG5 = 5
+    LASER6 = 6
+
+
+class ListStatus(IntEnum):
+    LOAD1 = 0
+    LOAD2 = 1
+    READY1 = 2
+    READY2 = 3
+    BUSY1 = 4
+    BUSY2 = 5
+    USED1 = 6
+    USED2 = 7
+
+
+class CardInfo:
+    def __init__(self, ip_address: str, is_acquired: bool) -> None:
+        self.firmware_version = SIMULATED_FIRMWARE_VERSION
+        self.serial_number = SIMULATED_SERIAL_NUMBER
+        self.ip_address = ip_address
+        self.is_acquired = is_acquired
+
+
+class _Repeat:
+    """Marks the start of a list_repeat block"""
+
+
+class _Until:
+    def __init__(self, number: int) -> None:
+        self.number = number
+
+
+class _Pause:
+    """A list command which takes time but doesn't move the scanner"""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+
+class _Offset:
+    """Shifts everything after it in the list, see set_offset_list"""
+
+    def __init__(self, x: int, y: int) -> None:
+        self.x = x
+        self.y = y
+
+
+class _Call:
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+class _TraceStart:
+    def __init__(self, period: int, signals: list[int]) -> None:
+        self.period = period
+        self.signals = signals
+
+
+class _TraceStop:
+    """Stops recording signals"""
+
+
+ListEntry = (
+    np.ndarray | _Repeat | _Until | _Pause | _Offset | _Call | _TraceStart | _TraceStop
+)
+
+
+class _Trace:
+    """Signals recorded while a list executes, worked out from the path the list
+    takes: `times` of breakpoints, from the start of the list, at which the scanner
+    is sent to `positions`, with the laser on for `laser_on` until the next one"""
+
+    def __init__(
+        self,
+        list_start: float,
+        trace_start: float,
+        trace_end: float,
+        start: _TraceStart,
+        times: np.ndarray,
+        positions: np.ndarray,
+        laser_on: np.ndarray,
+    ) -> None:
+        self.start = list_start + trace_start
+        self.end = list_start + trace_end
+        self.period = start.period * DELAY_UNIT
+        self.signals = start.signals
+        self._offset = trace_start
+        self._times = times
+        self._positions = positions
+        self._laser_on = np.concatenate(([0], laser_on, [0]))
+
+    def samples(self, now: float) -> int:
+        if now < self.start:
+            return 0
+        return int((min(now, self.end) - self.start) / self.period) + 1
+
+    def read(self, channel: int, offset: int, count: int) -> np.ndarray:
+        times = self._offset + (offset + np.arange(count)) * self.period
+        signal = self.signals[channel - 1] if channel <= len(self.signals) else 0
+        if signal in (Signal.STATUS_AX, Signal.STATUS_AY):
+            times = times - TRACKING_DELAY
+        if signal in (Signal.STATUS_AX, Signal.SAMPLE_X):
+            values = np.interp(times, self._times, self._positions[:, 0])
+        elif signal in (Signal.STATUS_AY, Signal.SAMPLE_Y):
+            values = np.interp(times, self._times, self._positions[:, 1])
+        elif signal == Signal.LASER_ON:
+            values = self._laser_on[np.searchsorted(self._times, times, "right")]
+        else:
+            values = np.zeros(count)
+        return np.rint(values).astype(np.int32)
+
+
+def _entry_length(entry: ListEntry) -> int:
+    return len(entry) if isinstance(entry, np.ndarray) else 1
+
+
+class SimulatedRtc6:
+    """State of one simulated card"""
+
+    def __init__(self) -> None:
+        self.ip_address = ""
+        self.connected = False
+        self.error = 0
+        self.last_error = 0
+        self.laser_mode = LaserMode.YAG5
+        self.laser_control = 0
+        self.sky_writing_mode = 0
+        self.jump_speed = DEFAULT_JUMP_SPEED
+        self.mark_speed = DEFAULT_MARK_SPEED
+        self.jump_delay = 0  # 10us
+        self.mark_delay = 0  # 10us
+        self.polygon_delay = 0  # 10us
+        self.list_memory = {1: DEFAULT_LIST_MEMORY, 2: DEFAULT_LIST_MEMORY}
+        self.lists: dict[int, list[ListEntry]] = {1: [], 2: []}
+        # Subroutines are kept apart from the lists, and not limited by list memory
+        self.subroutines: dict[int, np.ndarray] = {}
+        self.ready = {1: False, 2: False}
+        self.used = {1: False, 2: False}
+        self.loading_list = 1
+        self.input_pointer = 0
+        self.position = (0.0, 0.0)
+        # (list_no, start time, duration, end position) of executing/queued lists
+        self.executions: list[tuple[int, float, float, tuple[float, float]]] = []
+        self.auto_change = False
+        self.trace: _Trace | None = None
+        self.lock = threading.Lock()
+
+    # Execution timing
+
+    @property
+    def settings(self) -> ControlSettings:
+        return ControlSettings(
+            self.jump_speed,
+            self.mark_speed,
+            self.jump_delay,
+            self.mark_delay,
+            self.polygon_delay,
+        )
+
+    def segment_times(
+        self,
+        segments: np.ndarray,
+        start: tuple[float, float],
+        offset: tuple[int, int] = (0, 0),
+    ) -> tuple[np.ndarray, tuple[float, float]]:
+        """Time in seconds to execute each segment, moved by `offset`, starting from
+        `start`"""
+        if offset != (0, 0):
+            segments = segments.copy()
+            segments["x"] += offset[0]
+            segments["y"] += offset[1]
+        return segment_times(segments, self.settings, start)
+
+    def list_duration(
+        self, list_no: int, start: tuple[float, float]
+    ) -> tuple[float, tuple[float, float]]:
+        """Time to execute a list, and the position at the end of it"""
+        total = 0.0
+        repeat_from: tuple[float, tuple[float, float]] | None = None
+        position = start
+        offset = (0, 0)
+        for entry in self.lists[list_no]:
+            if isinstance(entry, _Call):
+                entry = self.subroutines[entry.index]
+            if isinstance(entry, np.ndarray):
+                times, position = self.segment_times(entry, position, offset)
+                total += float(times.sum())
+            elif isinstance(entry, _Offset):
+                offset = (entry.x, entry.y)
+            elif isinstance(entry, _Pause):
+                total += entry.seconds
+            elif isinstance(entry, _Repeat):
+                repeat_from = (total, position)
+            elif isinstance(entry, _Until) and repeat_from is not None:
+                # Assume later passes start from where the first one did
+                total += (total - repeat_from[0]) * (entry.number - 1)
+                repeat_from = None
+        return total, position
+
+    def flatten(self, list_no: int) -> list[ListEntry]:
+        """Entries of a list in the order they execute, with repeats and subroutine
+        calls expanded and offsets applied to the segments"""
+        flat: list[ListEntry] = []
+        repeat_from = 0
+        offset = (0, 0)
+        for entry in self.lists[list_no]:
+            if isinstance(entry, _Call):
+                entry = self.subroutines[entry.index]
+            if isinstance(entry, np.ndarray):
+                if offset != (0, 0):
+                    entry = entry.copy()
+                    entry["x"] += offset[0]
+                    entry["y"] += offset[1]
+                flat.append(entry)
+            elif isinstance(entry, _Offset):
+                offset = (entry.x, entry.y)
+            elif isinstance(entry, _Repeat):
+                repeat_from = len(flat)
+            elif isinstance(entry, _Until):
+                flat.extend(flat[repeat_from:] * (entry.number - 1))
+            else:
+                flat.append(entry)
+        return flat
+
+    def plan_trace(self, list_no: int, at: float) -> _Trace | None:
+        """The trace recorded by executing a list from `at`, if it starts one"""
+        times, positions, laser_on = [0.0], [self.position], []
+        trace_start: _TraceStart | None = None
+        trace_from = trace_to = None
+        for entry in self.flatten(list_no):
+            if isinstance(entry, np.ndarray) and len(entry):
+                seconds, _ = self.segment_times(entry, positions[-1])
+                times.extend(times[-1] + np.cumsum(seconds))
+                positions.extend(map(tuple, segment_ends(entry, positions[-1])))
+                laser_on.extend(entry["opcode"] != Opcode.JUMP)
+            elif isinstance(entry, _Pause):
+                times.append(times[-1] + entry.seconds)
+                positions.append(positions[-1])
+                laser_on.append(True)
+            elif isinstance(entry, _TraceStart):
+                trace_start, trace_from, trace_to = entry, times[-1], None
+            elif isinstance(entry, _TraceStop) and trace_start is not None:
+                trace_to = times[-1]
+        if trace_start is None or trace_from is None:
+            return None
+        return _Trace(
+            at,
+            trace_from,
+            times[-1] if trace_to is None else trace_to,
+            trace_start,
+            np.array(times),
+            np.array(positions, dtype=np.float64),
+            np.array(laser_on, dtype=np.int32),
+        )
+
+    def update(self, now: float | None = None) -> None:
+        """Retire executions which have finished by `now`"""
+        now = time.monotonic() if now is None else now
+        while self.executions and (
+            self.executions[0][1] + self.executions[0][2] <= now
+        ):
+            list_no, start, duration, end = self.executions.pop(0)
+            self.used[list_no] = True
+            self.position = end
+            if self.auto_change and not self.executions:
+                self.auto_change = False
+                self.start(3 - list_no, start + duration)
+
+    def start(self, list_no: int, at: float) -> None:
+        trace = self.plan_trace(list_no, at)
+        if trace is not None:
+            self.trace = trace
+        duration, end = self.list_duration(list_no, self.position)
+        self.used[list_no] = False
+        self.executions.append((list_no, at, duration, end))
+
+    def busy_list(self) -> int | None:
+        self.update()
+        return self.executions[0][0] if self.executions else None
+
+    # List loading
+
+    def add(self, entry: ListEntry) -> bool:
+        with self.lock:
+            if self.busy_list() == self.loading_list:
+                self.error |= ERROR_BUSY
+                return False
+            if (
+                self.input_pointer + _entry_length(entry)
+                > self.list_memory[self.loading_list]
+            ):
+                self.error |= ERROR_INVALID_INPUT_POINTER
+                return False
+            self.lists[self.loading_list].append(entry)
+            self.input_pointer += _entry_length(entry)
+            return True
+
+    def load(self, list_no: int, position: int) -> int:
+        with self.lock:
+            if list_no not in self.lists or self.busy_list() == list_no:
+                self.error |= ERROR_BUSY
+                return 0
+            if position == 0:
+                self.lists[list_no] = []
+            self.loading_list = list_no
+            self.input_pointer = position
+            self.ready[list_no] = False
+            return list_no
+
+
+# Simulated cards by card number, each created when first used
+_cards: dict[int, SimulatedRtc6] = {}
+_cards_lock = threading.Lock()
+
+
+def reset() -> None:
+    """Reset every simulated card to its power-on state"""
+    with _cards_lock:
+        _cards.clear()
+
+
+def get_simulated_card(card: int = 1) -> SimulatedRtc6:
+    with _cards_lock:
+        if card not in _cards:
+            _cards[card] = SimulatedRtc6()
+        return _cards[card]
+
+
+def _check_connected(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if not rtc.connected:
+        rtc.error |= ERROR_NO_RESPONSE
+        raise RtcConnectionError("Checking connection to the eth box failed!")
+
+
+# Real functions which are intended to be used
+
+
+def check_connection(card: int = 1) -> None:
+    _check_connected(card)
+
+
+def connect(
+    ip_string: str, program_file_path: str, correction_file_path: str, card: int = 1
+) -> int:
+    rtc = get_simulated_card(card)
+    rtc.ip_address = ip_string
+    rtc.connected = True
+    return SIMULATED_SERIAL_NUMBER
+
+
+def close(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if not rtc.connected:
+        raise RtcConnectionError("Could not release card - maybe it was not acquired?")
+    rtc.connected = False
+
+
+def get_card_info(card: int = 1) -> CardInfo:
+    rtc = get_simulated_card(card)
+    _check_connected(card)
+    return CardInfo(rtc.ip_address, rtc.connected)
+
+
+def init_list_loading(list_no: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.load(list_no, 0)
+
+
+def get_list_statuses(card: int = 1) -> list:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        busy = rtc.busy_list()
+        statuses = []
+        for list_no in (1, 2):
+            if rtc.loading_list == list_no and not rtc.ready[list_no]:
+                statuses.append(ListStatus(list_no - 1))  # LOADn
+            if rtc.ready[list_no]:
+                statuses.append(ListStatus(list_no + 1))  # READYn
+            if busy == list_no:
+                statuses.append(ListStatus(list_no + 3))  # BUSYn
+            if rtc.used[list_no]:
+                statuses.append(ListStatus(list_no + 5))  # USEDn
+        return sorted(statuses)
+
+
+def get_error(card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    return rtc.error
+
+
+def get_error_string(card: int = 1) -> str:
+    rtc = get_simulated_card(card)
+    return "" if not rtc.error else f"Simulated error {rtc.error}"
+
+
+def clear_errors(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.error = 0
+
+
+def add_arc_to(x: int, y: int, angle: float, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(np.array([(Opcode.ARC, x, y, angle)], dtype=SEGMENT_DTYPE))
+
+
+def add_jump_to(x: int, y: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(np.array([(Opcode.JUMP, x, y, 0)], dtype=SEGMENT_DTYPE))
+
+
+def add_line_to(x: int, y: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(np.array([(Opcode.LINE, x, y, 0)], dtype=SEGMENT_DTYPE))
+
+
+def _segment_array(segments: np.ndarray) -> np.ndarray:
+    if (
+        not isinstance(segments, np.ndarray)
+        or segments.ndim != 1
+        or segments.dtype.itemsize != SEGMENT_DTYPE.itemsize
+    ):
+        raise RtcListError("Segments must be a contiguous 1D array of segments")
+    segments = segments.view(SEGMENT_DTYPE)
+    if len(segments) and (
+        segments["opcode"].min() < min(Opcode) or segments["opcode"].max() > max(Opcode)
+    ):
+        raise RtcListError(f"Unknown opcode in {np.unique(segments['opcode'])}")
+    return segments
+
+
+def load_segments(segments: np.ndarray, card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    segments = _segment_array(segments)
+    to_load = min(len(segments), get_list_space(card))
+    if to_load:
+        rtc.add(segments[:to_load].copy())
+    return to_load
+
+
+def load_subroutine(index: int, segments: np.ndarray, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    segments = _segment_array(segments)
+    # Each subroutine takes its segments and a list_return
+    used = sum(
+        len(subroutine) + 1
+        for other, subroutine in rtc.subroutines.items()
+        if other != index
+    )
+    free = LIST_MEMORY - sum(rtc.list_memory.values()) - used
+    if len(segments) + 1 > free:
+        rtc.error |= ERROR_INVALID_INPUT_POINTER
+        raise RtcListError(
+            f"Subroutine {index} needs {len(segments) + 1} positions, only {free} "
+            "are left after the lists"
+        )
+    rtc.subroutines[index] = segments.copy()
+
+
+def load_subroutine_calls(
+    index: int, offsets: np.ndarray, passes: int, card: int = 1
+) -> int:
+    rtc = get_simulated_card(card)
+    if (
+        not isinstance(offsets, np.ndarray)
+        or offsets.ndim != 2
+        or offsets.shape[1] != 2
+        or offsets.dtype.itemsize != 4
+    ):
+        raise RtcListError("Offsets must be a contiguous (N, 2) array of 4 byte ints")
+    if index not in rtc.subroutines:
+        raise RtcListError(f"Subroutine {index} has not been loaded")
+    space = get_list_space(card)
+    to_load = min(len(offsets), (space - 1) // (1 + passes)) if space else 0
+    for x, y in offsets[:to_load].tolist():
+        rtc.add(_Offset(x, y))
+        for _ in range(passes):
+            rtc.add(_Call(index))
+    if to_load:
+        rtc.add(_Offset(0, 0))
+    return to_load
+
+
+def add_list_repeat(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(_Repeat())
+
+
+def add_list_until(number: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(_Until(number))
+
+
+def add_laser_on(time_10us: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(_Pause(time_10us * 1e-5))
+
+
+# Taken directly from the library
+
+
+def get_last_error(card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    return rtc.last_error
+
+
+def set_laser_mode(mode: str, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if mode not in LaserMode.__members__:
+        raise RtcError(f"Failed to set laser mode with unknown mode {mode} ")
+    rtc.laser_mode = LaserMode[mode]
+
+
+def set_laser_control(settings: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.laser_control = settings
+
+
+def get_input_pointer(card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    return rtc.input_pointer
+
+
+def get_out_pointer(card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        rtc.update()
+        if not rtc.executions:
+            return 0
+        list_no, start, duration, _ = rtc.executions[0]
+        length = sum(_entry_length(entry) for entry in rtc.lists[list_no])
+        if duration <= 0:
+            return length
+        fraction = min(1.0, (time.monotonic() - start) / duration)
+        return int(length * fraction)
+
+
+def config_list_memory(list_1_mem: int, list_2_mem: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if list_1_mem < 1 or list_2_mem < 1 or list_1_mem + list_2_mem > LIST_MEMORY:
+        rtc.error |= ERROR_INVALID_PARAMETER
+        raise RtcListError(
+            f"Lists of {list_1_mem} and {list_2_mem} positions don't fit in the "
+            f"{LIST_MEMORY} positions of list memory"
+        )
+    rtc.list_memory = {1: list_1_mem, 2: list_2_mem}
+
+
+def load_list(list_no: int, position: int, card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    return rtc.load(list_no, position)
+
+
+def set_end_of_list(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.ready[rtc.loading_list] = True
+
+
+# simple control commands
+
+
+def set_mark_speed_ctrl(speed: float, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.mark_speed = speed
+
+
+def set_jump_speed_ctrl(speed: float, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.jump_speed = speed
+
+
+def set_sky_writing_mode(speed: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.sky_writing_mode = speed
+
+
+def set_scanner_delays(jump: int, mark: int, polygon: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.jump_delay, rtc.mark_delay, rtc.polygon_delay = jump, mark, polygon
+
+
+def goto_xy(x: int, y: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        if rtc.busy_list() is not None:
+            rtc.error |= ERROR_BUSY
+            return
+        rtc.position = (float(x), float(y))
+
+
+def execute_list(list_no: int, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        if rtc.busy_list() is not None:
+            rtc.error |= ERROR_BUSY
+            return
+        rtc.ready[list_no] = False
+        rtc.start(list_no, time.monotonic())
+
+
+def auto_change(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        if rtc.busy_list() is not None:
+            rtc.auto_change = True
+
+
+def add_trace_start(period: int, signals: list, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if len(signals) > 8:
+        raise RtcListError(f"A trace can record at most 8 signals, got {len(signals)}")
+    rtc.add(_TraceStart(period, list(signals)))
+
+
+def add_trace_stop(card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    rtc.add(_TraceStop())
+
+
+def get_trace_status(card: int = 1) -> tuple:
+    rtc = get_simulated_card(card)
+    with rtc.lock:
+        trace = rtc.trace
+        if trace is None:
+            return False, 0
+        now = time.monotonic()
+        return now < trace.end, trace.samples(now)
+
+
+def read_trace(channel: int, offset: int, out: np.ndarray, card: int = 1) -> None:
+    rtc = get_simulated_card(card)
+    if (
+        not isinstance(out, np.ndarray)
+        or out.ndim != 1
+        or out.dtype.itemsize != 4
+        or not out.flags.c_contiguous
+    ):
+        raise RtcError("read_trace needs a contiguous 1D array of 4 byte ints")
+    with rtc.lock:
+        if rtc.trace is not None:
+            out[:] = rtc.trace.read(channel, offset, len(out))
+
+
+def get_io_status(card: int = 1) -> int:
+    return 0
+
+
+def get_list_space(card: int = 1) -> int:
+    rtc = get_simulated_card(card)
+    return rtc.list_memory[rtc.loading_list] - rtc.input_pointer
+
+
+def get_config_list(card: int = 1) -> int:
+    return get_simulated_card(card).list_memory[1]
+
+
+def get_rtc_mode(card: int = 1) -> int:
+    return 0
+
+
+def get_temperature(card: int = 1) -> float:
+    return 25.0
@@ -0,0 +1,105 @@
+"""Recording what the scanner actually did while a list executed
+
+The RTC6 samples signals into its measurement memory at a fixed period once a trace
+is started from a list. `CaptureBuffer` holds the samples read back from it in a
+preallocated ring, one int32 row per signal, so that they can be read straight into
+place by the bindings and published as waveforms without copying.
+"""
+
+from collections.abc import Callable
+from enum import IntEnum
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CAPTURE_LENGTH = 100000
+MAX_TRACE_SIGNALS = 8  # set_trigger8
+
+
+class Signal(IntEnum):
+    """Signals which can be recorded, numbered as in the set_trigger table of the
+    manual. Actual positions need scan heads with position feedback."""
+
+    STATUS_AX = 1  # actual x position of the scan head
+    STATUS_AY = 2  # actual y position of the scan head
+    LASER_ON = 4  # 1 while the laser is switched on
+    SAMPLE_X = 7  # x position sent to the scan head
+    SAMPLE_Y = 8  # y position sent to the scan head
+
+
+# Rows of a capture, and the signal recorded for each
+CAPTURE_SIGNALS = {
+    "actual_x": Signal.STATUS_AX,
+    "actual_y": Signal.STATUS_AY,
+    "target_x": Signal.SAMPLE_X,
+    "target_y": Signal.SAMPLE_Y,
+    "laser_on": Signal.LASER_ON,
+}
+CAPTURE_FIELDS = list(CAPTURE_SIGNALS)
+
+# Fills out[:, :n] with samples first to first + n - 1 of the trace
+TraceReader = Callable[[np.ndarray, int], None]
+
+
+class CaptureBuffer:
+    """The last `capacity` samples of each of `CAPTURE_FIELDS`"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPTURE_LENGTH) -> None:
+        self.capacity = capacity
+        self._data = np.zeros((len(CAPTURE_FIELDS), capacity), dtype=np.int32)
+        self._next = 0  # column the next sample goes in
+        self.total = 0  # samples added since the last clear
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def clear(self) -> None:
+        self._next = 0
+        self.total = 0
+
+    def extend_from(self, count: int, read: TraceReader) -> None:
+        """Add the next `count` samples of the trace, by calling `read` with each
+        contiguous region of the ring they go in. If there are more than fit, only
+        the last `capacity` of them are read."""
+        skipped = max(0, count - self.capacity)
+        first = skipped
+        self._next = (self._next + skipped) % self.capacity
+        while first < count:
+            n = min(count - first, self.capacity - self._next)
+            read(self._data[:, self._next : self._next + n], self.total + first)
+            first += n
+            self._next = (self._next + n) % self.capacity
+        self.total += count
+
+    def samples(self) -> np.ndarray:
+        """The samples held, oldest first, as a (fields, samples) array"""
+        if self.total <= self.capacity:
+            return self._data[:, : self.total].copy()
+        return np.roll(self._data, -self._next, axis=1)
+
+    def field(self, name: str) -> np.ndarray:
+        return self.samples()[CAPTURE_FIELDS.index(name)]
+
+
+def following_error(samples: np.ndarray) -> np.ndarray:
+    """Distance in bits between where each sample was sent and where the scan head
+    was, for a (fields, samples) array"""
+    actual_x, actual_y, target_x, target_y, _ = samples.astype(np.float64)
+    return np.hypot(actual_x - target_x, actual_y - target_y)
+
+
+def save_capture(path: str | Path, samples: np.ndarray, period: float) -> None:
+    """Write samples to a compressed .npz file with one array per field, and the
+    sample `period` in seconds"""
+    np.savez_compressed(
+        path,
+        period=period,
+        **{name: samples[index] for index, name in enumerate(CAPTURE_FIELDS)},
+    )
+
+
+def load_capture(path: str | Path) -> tuple[np.ndarray, float]:
+    """Read a file written by `save_capture`, returning the samples and period"""
+    with np.load(path) as data:
+        samples = np.stack([data[name] for name in CAPTURE_FIELDS])
+        return samples, float(data["period"])
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from enum import Enum
+
+from rtc6_fastcs.backoff import Backoff
+from rtc6_fastcs.controller.rtc_connection import RtcConnection
+
+LOGGER = logging.getLogger(__name__)
+
+HEALTH_CHECK_PERIOD = 2.0
+
+
+class ConnectionState(Enum):
+    CONNECTED = "Connected"
+    DISCONNECTED = "Disconnected"
+    RECONNECTING = "Reconnecting"
+
+
+class ConnectionSupervisor:
+    """Checks the connection to the eth box in the background, and reconnects with
+    exponential backoff when it is lost.
+
+    Checks go through the RTC6 worker thread like every other call, so they never
+    block the event loop. After reconnecting, the control settings last sent to the
+    card are sent again; the program and correction files are reloaded by connecting.
+    """
+
+    def __init__(
+        self,
+        conn: RtcConnection,
+        period: float = HEALTH_CHECK_PERIOD,
+        backoff: Backoff | None = None,
+    ) -> None:
+        self._conn = conn
+        self.period = period
+        self._backoff = backoff or Backoff()
+        self._task: asyncio.Task | None = None
+        self.state = ConnectionState.CONNECTED
+        self.latency = 0.0  # s, round trip of the last successful check
+        self.reconnects = 0
+        self.last_error = ""
+
+    async def check(self) -> bool:
+        """Check the connection once, returning whether it is up"""
+        try:
+            self.latency = await self._conn.check_connection()
+        except Exception as e:
+            self.last_error = str(e)
+            LOGGER.warning(f"Lost connection to the eth box: {e}")
+            self.state = ConnectionState.DISCONNECTED
+            return False
+        self.state = ConnectionState.CONNECTED
+        return True
+
+    async def reconnect(self) -> None:
+        """Try to reconnect until it works, waiting longer after each failure"""
+        self.state = ConnectionState.RECONNECTING
+        self._backoff.reset()
+        while True:
+            try:
+                await self._conn.reconnect()
+            except Exception as e:
+                self.last_error = str(e)
+            else:
+                self.reconnects += 1
+                LOGGER.info("Reconnected to the eth box")
+                if await self.check():
+                    return
+                self.state = ConnectionState.RECONNECTING
+            delay = self._backoff.next_delay()
+            LOGGER.warning(
+                f"Reconnecting failed: {self.last_error}, retry in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def run(self) -> None:
+        while True:
+            if not await self.check():
+                await self.reconnect()
+            await asyncio.sleep(self.period)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
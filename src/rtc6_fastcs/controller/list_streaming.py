@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+
+import numpy as np
+
+from rtc6_fastcs.controller.rtc_connection import RtcConnection
+from rtc6_fastcs.segments import SEGMENT_DTYPE
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100000
+# Room in each list for set_end_of_list etc. on top of the segments
+LIST_OVERHEAD = 16
+STATUS_POLL_PERIOD = 0.01
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]  # chunks loaded, total
+ListStartedCallback = Callable[[Any, int], Awaitable[None]]  # tag, chunk index
+
+
+class ListStreamer:
+    """Streams segments through both RTC6 lists, so that one list can be loaded while
+    the other executes and jobs can be larger than the list memory.
+
+    Segments are queued with `append` and sent with `stream`. Each chunk is loaded
+    into whichever list has finished executing, and started with `auto_change` so
+    that it follows the running list without a gap.
+
+    Several batches of segments can follow each other the same way, by calling
+    `start`, then `send` for each, then `finish`. Chunks sent with a tag are passed
+    to `on_list_started` with it when they start executing.
+    """
+
+    def __init__(self, conn: RtcConnection) -> None:
+        self._conn = conn
+        self._pending: list[np.ndarray] = []
+        self._queued_list: int | None = None
+        self._next_list = 1
+        # Tag and chunk index of what is loaded in each list
+        self._tags: dict[int, tuple[Any, int]] = {}
+        self.on_list_started: ListStartedCallback | None = None
+
+    @property
+    def pending_segments(self) -> int:
+        return sum(len(segments) for segments in self._pending)
+
+    def append(self, segments: np.ndarray) -> None:
+        """Queue already corrected segments to be sent by the next `stream`. They
+        aren't copied, so a memory mapped job is only read as it is sent."""
+        self._pending.append(np.asarray(segments, dtype=SEGMENT_DTYPE))
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+    @staticmethod
+    def _chunks(pending: list[np.ndarray], chunk_size: int) -> Iterator[np.ndarray]:
+        """Split the queued arrays into chunks, only copying where a chunk spans
+        more than one of them"""
+        partial: list[np.ndarray] = []
+        partial_length = 0
+        for segments in pending:
+            start = 0
+            if partial:
+                start = chunk_size - partial_length
+                partial.append(segments[:start])
+                partial_length += len(partial[-1])
+                if partial_length < chunk_size:
+                    continue
+                yield np.concatenate(partial)
+                partial, partial_length = [], 0
+            while len(segments) - start >= chunk_size:
+                yield segments[start : start + chunk_size]
+                start += chunk_size
+            if start < len(segments):
+                partial, partial_length = [segments[start:]], len(segments) - start
+        if partial:
+            yield np.concatenate(partial)
+
+    def _busy_lists(self, statuses: list) -> set[int]:
+        list_status = self._conn.get_bindings().ListStatus
+        return {
+            list_no
+            for list_no, busy in ((1, list_status.BUSY1), (2, list_status.BUSY2))
+            if busy in statuses
+        }
+
+    async def _started(self, list_no: int) -> None:
+        tag = self._tags.pop(list_no, None)
+        if tag is not None and tag[0] is not None and self.on_list_started:
+            await self.on_list_started(*tag)
+
+    async def _wait_until_free(self, list_no: int | None) -> None:
+        """Wait until `list_no` has executed and can be reloaded, or with None, until
+        everything queued has executed"""
+        bindings = self._conn.get_bindings()
+        while True:
+            busy = self._busy_lists(await self._conn.call(bindings.get_list_statuses))
+            if self._queued_list is not None:
+                queued, self._queued_list = self._queued_list, None
+                if queued in busy:
+                    await self._started(queued)
+                elif not busy:
+                    # The previous list finished before auto_change was called
+                    LOGGER.warning(f"Gap in execution before list {queued}")
+                    await self._conn.call(bindings.execute_list, queued)
+                    await self._started(queued)
+                    continue
+                else:
+                    self._queued_list = queued
+            waiting_for = busy if list_no is None else busy & {list_no}
+            if self._queued_list is None and not waiting_for:
+                return
+            await asyncio.sleep(STATUS_POLL_PERIOD)
+
+    def _load_chunk(self, list_no: int, chunk: np.ndarray) -> bool:
+        """Load and start one chunk, all on the RTC6 worker thread. Returns whether it
+        was queued to follow the running list rather than started straight away"""
+        bindings = self._conn.get_bindings()
+        if bindings.load_list(list_no, 0) != list_no:
+            raise bindings.RtcListError(
+                f"Could not load list {list_no}: {bindings.get_error_string()}"
+            )
+        loaded = bindings.load_segments(chunk)
+        if loaded != len(chunk):
+            raise bindings.RtcListError(
+                f"Only {loaded} of {len(chunk)} segments fitted in list {list_no}"
+            )
+        bindings.set_end_of_list()
+        if self._busy_lists(bindings.get_list_statuses()):
+            bindings.auto_change()
+            return True
+        bindings.execute_list(list_no)
+        return False
+
+    async def start(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """Size both lists for chunks of `chunk_size` before `send`"""
+        await self._conn.config_list_memory(
+            chunk_size + LIST_OVERHEAD, chunk_size + LIST_OVERHEAD
+        )
+        self._queued_list = None
+        self._next_list = 1
+        self._tags.clear()
+
+    async def send(
+        self,
+        pending: list[np.ndarray],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_progress: ProgressCallback | None = None,
+        tag: Any = None,
+    ) -> float:
+        """Load segments into whichever list is free in turn, following on from
+        anything sent before, without waiting for the last of them to start. Returns
+        the seconds spent loading, not counting waiting for a list to be free."""
+        total_chunks = -(-sum(len(segments) for segments in pending) // chunk_size)
+        loading = 0.0
+        for index, chunk in enumerate(self._chunks(pending, chunk_size)):
+            list_no, self._next_list = self._next_list, 3 - self._next_list
+            await self._wait_until_free(list_no)
+            self._tags[list_no] = (tag, index)
+            start = time.perf_counter()
+            queued = await self._conn.call(self._load_chunk, list_no, chunk)
+            loading += time.perf_counter() - start
+            if queued:
+                self._queued_list = list_no
+            else:
+                await self._started(list_no)
+            if on_progress is not None:
+                await on_progress(index + 1, total_chunks)
+        return loading
+
+    async def finish(self) -> None:
+        """Wait for everything sent to finish executing"""
+        await self._wait_until_free(None)
+
+    async def stream(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_progress: ProgressCallback | None = None,
+    ) -> int:
+        """Send all queued segments, alternating lists 1 and 2, and wait for them to
+        finish executing. Returns the number of segments sent."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        total_segments = sum(len(segments) for segments in pending)
+        LOGGER.info(
+            f"Streaming {total_segments} segments in "
+            f"{-(-total_segments // chunk_size)} chunks"
+        )
+        await self.start(chunk_size)
+        await self.send(pending, chunk_size, on_progress)
+        await self.finish()
+        return total_segments
@@ -1,9 +1,49 @@
 import asyncio
+import functools
 import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from rtc6_fastcs.bindings.rtc6_bindings import CardInfo, RtcError
+import numpy as np
+
+from rtc6_fastcs.backoff import Backoff
+from rtc6_fastcs.coordinates import CoordinateTransform
+from rtc6_fastcs.diagnostics import Diagnostics, SampledLogger
+from rtc6_fastcs.estimation import ControlSettings
+from rtc6_fastcs.settings_profiles import DELAYS, SETTING_COMMANDS, SettingsProfile
+
+if TYPE_CHECKING:
+    from rtc6_fastcs.bindings.rtc6_bindings import CardInfo
 
 LOGGER = logging.getLogger(__name__)
+SAMPLED_LOGGER = SampledLogger(LOGGER)
+
+T = TypeVar("T")
+
+# Positions of list memory, shared by lists 1 and 2, with the rest for subroutines
+LIST_MEMORY = 2**23
+
+
+class CardBindings:
+    """A bindings module with the card number filled in on every function, so that
+    code using a connection can call them as if its card were the only one"""
+
+    def __init__(self, bindings: Any, card: int) -> None:
+        self._bindings = bindings
+        self.card = card
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._bindings, name)
+        if callable(value) and not isinstance(value, type):
+            # Keeps the function's name, which diagnostics are recorded under
+            value = functools.update_wrapper(
+                functools.partial(value, card=self.card), value
+            )
+        setattr(self, name, value)
+        return value
 
 
 class RtcConnection:
@@ -13,36 +53,211 @@ class RtcConnection:
         program_file: str,
         correction_file: str,
         retry_connect: bool = False,
+        simulate: bool = False,
+        card: int = 1,
     ) -> None:
-        from rtc6_fastcs.bindings import rtc6_bindings as bindings
+        if simulate:
+            from rtc6_fastcs.bindings import simulated_bindings as bindings
+        else:
+            from rtc6_fastcs.bindings import rtc6_bindings as bindings
 
-        self._bindings = bindings
+        self._bindings = CardBindings(bindings, card)
+        self.card = card
         self._ip = box_ip
         self._program_file = program_file
         self._correction_file = correction_file
         self._retry_connect = retry_connect
+        # The RTC6 library is not thread safe, so all calls for a card go through one
+        # worker. Other cards have their own, so they can be driven in parallel.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"rtc6-card{card}"
+        )
+        self.diagnostics = Diagnostics()
+        # Speeds and delays last sent to the card, for execution time estimates
+        self.settings = ControlSettings()
+        # Everything last sent to the card, so unchanged values aren't sent again
+        self.applied_settings = SettingsProfile()
+        # Sizes of lists 1 and 2, which are only configured again if they change
+        self.list_memory: tuple[int, int] | None = None
+        # Keys of the shapes loaded as each subroutine, so they are only loaded once
+        self.subroutines: dict[int, bytes] = {}
+        # Shared by every sub-controller, so a reload applies to all of them
+        self.transform = CoordinateTransform.identity()
 
     def set_retry_connect(self, value: bool):
         self._retry_connect = value
 
-    def get_card_info(self) -> CardInfo:
+    def get_card_info(self) -> "CardInfo":
         return self._bindings.get_card_info()
 
     def get_bindings(self):
         return self._bindings
 
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a (usually blocking) bindings call on the RTC6 worker thread, so that
+        the event loop keeps running. Calls are executed one at a time in order.
+
+        The time taken, including waiting for earlier calls, is recorded in
+        `diagnostics` as bindings:<function name>."""
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self.diagnostics.record(
+                f"bindings:{getattr(fn, '__name__', 'unknown')}",
+                time.perf_counter() - start,
+            )
+
+    async def config_list_memory(self, list_1: int, list_2: int) -> None:
+        """Set the sizes of the two lists, unless they are already those sizes"""
+        if list_1 + list_2 > LIST_MEMORY:
+            raise ValueError(
+                f"Lists of {list_1} and {list_2} positions don't fit in the "
+                f"{LIST_MEMORY} positions of list memory"
+            )
+        if self.list_memory != (list_1, list_2):
+            await self.call(self._bindings.config_list_memory, list_1, list_2)
+            self.list_memory = (list_1, list_2)
+            # Subroutines are stored after the lists, so they have moved
+            self.subroutines.clear()
+
+    async def load_subroutine(
+        self, index: int, key: bytes, segments: np.ndarray
+    ) -> bool:
+        """Load segments as subroutine `index`, unless the shape with `key` already
+        is that subroutine. Returns whether they were loaded."""
+        if self.subroutines.get(index) == key:
+            return False
+        await self.call(self._bindings.load_subroutine, index, segments)
+        self.subroutines[index] = key
+        return True
+
+    def _send_settings(self, changes: SettingsProfile) -> None:
+        for name, value in changes.to_dict().items():
+            if name in SETTING_COMMANDS:
+                getattr(self._bindings, SETTING_COMMANDS[name])(value)
+        if changes.jump_delay is not None:
+            self._bindings.set_scanner_delays(
+                changes.jump_delay, changes.mark_delay, changes.polygon_delay
+            )
+
+    async def apply_settings(self, profile: SettingsProfile) -> SettingsProfile:
+        """Send the values in `profile` which differ from those last sent, all in one
+        call on the worker thread. Returns the values which were sent."""
+        changes = profile.changes_from(self.applied_settings)
+        if any(getattr(changes, name) is not None for name in DELAYS):
+            # The delays are set together, so fill in the ones which didn't change
+            settings = changes.control_settings(self.settings)
+            changes = replace(
+                changes, **{name: getattr(settings, name) for name in DELAYS}
+            )
+        if not changes.to_dict():
+            return changes
+        await self.call(self._send_settings, changes)
+        self.applied_settings = self.applied_settings.updated_with(changes)
+        self.settings = changes.control_settings(self.settings)
+        SAMPLED_LOGGER.debug("applied_settings", **changes.to_dict())
+        return changes
+
+    async def check_connection(self) -> float:
+        """Check the eth box is still there, raising if not. Returns the round trip
+        time in seconds."""
+        start = time.perf_counter()
+        await self.call(self._bindings.check_connection)
+        return time.perf_counter() - start
+
     async def connect(self) -> None:
+        # Connecting resets the card, so nothing set before can be relied on
+        self.list_memory = None
+        self.subroutines.clear()
+        self.applied_settings = SettingsProfile()
+        backoff = Backoff()
         connected = 0
         while not connected:
             try:
-                connected = self._bindings.connect(
-                    self._ip, self._program_file, self._correction_file
+                connected = await self.call(
+                    self._bindings.connect,
+                    self._ip,
+                    self._program_file,
+                    self._correction_file,
                 )
-            except RtcError as e:
+            except self._bindings.RtcError as e:
                 if not self._retry_connect:
                     raise Exception("Not retrying failed connection") from e
-                LOGGER.warning(f"Connection failed: {e.args[0]}! Retrying...")
-                await asyncio.sleep(1)
+                delay = backoff.next_delay()
+                LOGGER.warning(
+                    f"Connection failed: {e.args[0]}! Retrying in {delay:.1f}s..."
+                )
+                await asyncio.sleep(delay)
+
+    async def reconnect(self) -> None:
+        """Connect again once, which reloads the program and correction files, and
+        send the settings which were applied before the connection was lost"""
+        applied = self.applied_settings
+        try:
+            await self.call(self._bindings.close)
+        except self._bindings.RtcError:
+            pass  # the old connection may already have gone
+        self.list_memory = None
+        self.subroutines.clear()
+        if not await self.call(
+            self._bindings.connect,
+            self._ip,
+            self._program_file,
+            self._correction_file,
+        ):
+            raise self._bindings.RtcConnectionError(f"Could not connect to {self._ip}")
+        self.applied_settings = SettingsProfile()
+        try:
+            await self.apply_settings(applied)
+        except Exception:
+            # Keep them to send after the next attempt
+            self.applied_settings = applied
+            raise
+
+    async def close(self) -> None:
+        await self.call(self._bindings.close)
+
+
+class ConnectionPool:
+    """Connections to one or more eth boxes, keyed by IP address. Each box is given
+    the next card number as it is added, and its connection has its own worker, so
+    that uploads to different boxes run at the same time."""
+
+    def __init__(
+        self,
+        program_file: str,
+        correction_file: str,
+        retry_connect: bool = False,
+        simulate: bool = False,
+    ) -> None:
+        self._program_file = program_file
+        self._correction_file = correction_file
+        self._retry_connect = retry_connect
+        self._simulate = simulate
+        self._connections: dict[str, RtcConnection] = {}
+
+    def get(self, box_ip: str) -> RtcConnection:
+        """The connection to `box_ip`, created if there isn't one yet"""
+        if box_ip not in self._connections:
+            self._connections[box_ip] = RtcConnection(
+                box_ip,
+                self._program_file,
+                self._correction_file,
+                self._retry_connect,
+                self._simulate,
+                card=len(self._connections) + 1,
+            )
+        return self._connections[box_ip]
+
+    @property
+    def connections(self) -> list[RtcConnection]:
+        return list(self._connections.values())
+
+    async def connect(self) -> None:
+        await asyncio.gather(*(conn.connect() for conn in self._connections.values()))
 
     async def close(self) -> None:
-        self._bindings.close()
+        await asyncio.gather(*(conn.close() for conn in self._connections.values()))
@@ -1,20 +1,91 @@
 import asyncio
 from collections.abc import Callable
+from contextlib import AbstractContextManager
 from dataclasses import dataclass
+import enum
 import logging
-from typing import Any
+import time
+from typing import Any, TypeVar
 
-from fastcs.attributes import AttrMode, AttrR, AttrW, AttrRW, Handler, Sender
-from fastcs.controller import Controller, SubController
-from fastcs.datatypes import Bool, DataType, Float, Int, String
-from fastcs.wrappers import command
+from fastcs.attributes import AttrHandlerRW, AttrHandlerW, AttrR, AttrW, AttrRW
+from fastcs.controller import BaseController, Controller, SubController
+from fastcs.datatypes import Bool, Enum, Float, Int, String, Waveform
+from fastcs.wrappers import command, scan
 
-from rtc6_fastcs.controller.rtc_connection import RtcConnection
-from rtc6_fastcs.bindings import rtc6_bindings as rtc6
+from rtc6_fastcs.capture import (
+    CAPTURE_FIELDS,
+    CAPTURE_SIGNALS,
+    DEFAULT_CAPTURE_LENGTH,
+    CaptureBuffer,
+    following_error,
+    save_capture,
+)
+from rtc6_fastcs.controller.connection_supervisor import ConnectionSupervisor
+from rtc6_fastcs.controller.list_streaming import DEFAULT_CHUNK_SIZE, ListStreamer
+from rtc6_fastcs.controller.rtc_connection import (
+    LIST_MEMORY,
+    ConnectionPool,
+    RtcConnection,
+)
+from rtc6_fastcs.coordinates import CoordinateTransform
+from rtc6_fastcs.diagnostics import (
+    HISTOGRAM_BUCKETS,
+    SampledLogger,
+    timed_handler,
+)
+from rtc6_fastcs.estimation import DELAY_UNIT, ControlSettings, segment_times
+from rtc6_fastcs.job_file import check_transform, read_job
+from rtc6_fastcs.job_queue import JobQueue, JobTiming, QueuedJob
+from rtc6_fastcs.segments import Opcode, make_segments
+from rtc6_fastcs.settings_profiles import (
+    DELAYS,
+    SettingsProfile,
+    load_profiles,
+    parse_profile,
+)
+from rtc6_fastcs.shape_cache import ShapeCache, cache_key
 
 import numpy as np
 
 LOGGER = logging.getLogger(__name__)
+SAMPLED_LOGGER = SampledLogger(LOGGER)
+
+T = TypeVar("T")
+
+# fastcs makes every Waveform attribute a DOUBLE waveform record, so the integer
+# arrays are float64 too, which holds any int32 exactly
+WAVEFORM_DTYPE = np.float64
+# Maximum number of segments which can be sent in one polygon upload
+MAX_POLYGON_LENGTH = 10000
+# Maximum number of sites in one step and repeat
+MAX_SITES = 10000
+# Memory left after lists 1 and 2 by InitList, for subroutines
+SUBROUTINE_MEMORY = 100000
+# Subroutine holding the shape drawn by STEPREPEAT
+STEP_AND_REPEAT_SUBROUTINE = 0
+# List status is polled quickly while a list is executing, and slowly otherwise
+BUSY_POLL_PERIOD = 0.05
+IDLE_POLL_PERIOD = 1.0
+DIAGNOSTICS_UPDATE_PERIOD = 1.0
+CONNECTION_UPDATE_PERIOD = 0.5
+# Captured waveforms are published at most this often while a trace is recording
+CAPTURE_PUBLISH_PERIOD = 1.0
+DEFAULT_CAPTURE_FILE = "rtc6_capture.npz"
+# Segments estimated at a time, so a memory mapped job is never all in memory
+ESTIMATE_CHUNK_SIZE = 1000000
+DEFAULT_DIAGNOSTICS_FILE = "rtc6_diagnostics.json"
+
+
+class LaserMode(enum.StrEnum):
+    """Names of the LaserMode enum in the bindings, see p645 of the manual"""
+
+    CO2 = "CO2"
+    YAG1 = "YAG1"
+    YAG2 = "YAG2"
+    YAG3 = "YAG3"
+    LASER4 = "LASER4"
+    YAG5 = "YAG5"
+    LASER6 = "LASER6"
 
 
 class ConnectedSubController(SubController):
@@ -22,15 +93,36 @@ class ConnectedSubController(SubController):
         super().__init__()
         self._conn = conn
 
+    def get_bindings(self):
+        return self._conn.get_bindings()
+
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a bindings function on the RTC6 worker thread"""
+        return await self._conn.call(fn, *args)
+
+    @property
+    def settings(self) -> ControlSettings:
+        """Speeds and delays last sent to the card"""
+        return self._conn.settings
+
+    def timed(self, name: str) -> AbstractContextManager[None]:
+        """Record the time taken by a block in the connection's diagnostics"""
+        return self._conn.diagnostics.timed(name)
+
+    async def apply_settings(self, profile: SettingsProfile) -> SettingsProfile:
+        """Send the values in `profile` which have changed, see RtcConnection"""
+        return await self._conn.apply_settings(profile)
+
 
 class RtcInfoController(ConnectedSubController):
     firmware_version = AttrR(Int(), group="Information")
     serial_number = AttrR(Int(), group="Information")
     ip_address = AttrR(String(), group="Information")
-    is_acquired = AttrR(Bool(znam="False", onam="True"), group="Information")
+    is_acquired = AttrR(Bool(), group="Information")
 
+    @timed_handler
     async def proc_cardinfo(self) -> None:
-        info = self._conn.get_card_info()
+        info = await self.call(self._conn.get_card_info)
         await asyncio.gather(
             self.firmware_version.set(info.firmware_version),
             self.serial_number.set(info.serial_number),
@@ -40,49 +132,68 @@ class RtcInfoController(ConnectedSubController):
 
 
 class RtcControlSettings(ConnectedSubController):
-    @dataclass
-    class ControlSettingsHandler(Sender):
-        cmd: Callable
+    class SettingsHandler(AttrHandlerW):
+        """Base of the handlers below, which act on the controller they belong to"""
+
+        _controller: "RtcControlSettings | None" = None
 
-        async def put(
-            self, controller: ConnectedSubController, attr: AttrW, value: Any
-        ):
-            self.cmd(value)
+        async def initialise(self, controller: BaseController) -> None:
+            assert isinstance(controller, RtcControlSettings)
+            self._controller = controller
+
+        @property
+        def controller(self) -> "RtcControlSettings":
+            if self._controller is None:
+                raise RuntimeError("Handler not initialised")
+            return self._controller
 
     @dataclass
-    class DelaysHandler(Sender):
-        update_period: float | None = None
-
-        async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
-            rtc6.set_scanner_delays(
-                controller.jump_delay.get(),
-                controller.mark_delay.get(),
-                controller.polygon_delay.get(),
-            )
+    class ControlSettingsHandler(SettingsHandler):
+        setting: str  # field of SettingsProfile which the attribute sets
+
+        async def put(self, attr: AttrW, value: Any):
+            with self.controller.timed(f"handler:{self.setting}"):
+                await self.controller.apply_settings(
+                    SettingsProfile.from_dict({self.setting: value})
+                )
 
-        async def update(self, controller: "RtcControlSettings", attr: AttrR): ...
+    class DelaysHandler(SettingsHandler, AttrHandlerRW):
+        async def put(self, attr: AttrW, value: Any):
+            controller = self.controller
+            with controller.timed("handler:set_scanner_delays"):
+                await controller.apply_settings(
+                    SettingsProfile(
+                        jump_delay=controller.jump_delay.get(),
+                        mark_delay=controller.mark_delay.get(),
+                        polygon_delay=controller.polygon_delay.get(),
+                    )
+                )
+
+    class ProfileHandler(SettingsHandler):
+        async def put(self, attr: AttrW, value: Any):
+            with self.controller.timed("handler:profile"):
+                await self.controller.apply_profile(value)
 
     # Page 645 of the manual
     laser_mode = AttrW(
-        String(),
+        Enum(LaserMode),
         group="LaserControl",
-        allowed_values=[rtc6.LaserMode(i).name for i in range(7)],
-        handler=ControlSettingsHandler(rtc6.set_laser_mode),
+        handler=ControlSettingsHandler("laser_mode"),
     )
     laser_control = AttrW(
         Int(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_laser_control),
+        handler=ControlSettingsHandler("laser_control"),
     )
     jump_speed = AttrW(
         Float(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_mark_speed_ctrl),
+        handler=ControlSettingsHandler("jump_speed"),
     )  # set_jump_speed_ctrl
     mark_speed = AttrW(
         Float(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_jump_speed_ctrl),
+        handler=ControlSettingsHandler("mark_speed"),
     )  # set_mark_speed_ctrl
     # set_scanner_delays(jump, mark, polygon) in 10us increments
     # need to all be set at once - special handler
@@ -104,128 +215,1014 @@ class RtcControlSettings(ConnectedSubController):
     sky_writing_mode = AttrW(
         Int(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_sky_writing_mode),
+        handler=ControlSettingsHandler("sky_writing_mode"),
     )
+    # A profile name from the profiles file, or a JSON object of settings, which is
+    # applied in one put, only sending the values which have changed
+    profile = AttrW(String(), group="Profiles", handler=ProfileHandler())
+    profile_names = AttrR(String(), group="Profiles")
+    last_profile = AttrR(String(), group="Profiles")
+    # Number of values the last profile changed on the card
+    settings_sent = AttrR(Int(), group="Profiles")
+
+    def __init__(self, conn: RtcConnection, profiles_file: str = "") -> None:
+        super().__init__(conn)
+        self.profiles: dict[str, SettingsProfile] = {}
+        if profiles_file:
+            try:
+                self.profiles = load_profiles(profiles_file)
+            except Exception as e:
+                LOGGER.warning(
+                    f"Failed to load settings profiles from {profiles_file!r}: {e}"
+                )
+
+    async def initialise(self) -> None:
+        await self.profile_names.set(" ".join(self.profiles))
+
+    async def apply_profile(self, value: str) -> None:
+        profile = parse_profile(value, self.profiles)
+        changes = await self.apply_settings(profile)
+        # Keep the readbacks of the delays in step with the card
+        await asyncio.gather(
+            *(
+                getattr(self, name).set(getattr(changes, name))
+                for name in DELAYS
+                if getattr(changes, name) is not None
+            ),
+            self.last_profile.set(value if value in self.profiles else "custom"),
+            self.settings_sent.set(len(changes.to_dict())),
+        )
+
+
+class RtcTransform(ConnectedSubController):
+    """The coordinate transform from requested points to bits, which can be
+    reloaded from TransformFile while the IOC is running"""
+
+    transform_file = AttrRW(String(), group="Transform")
+    description = AttrR(String(), group="Transform")
+
+    def __init__(self, conn: RtcConnection, transform_file: str) -> None:
+        super().__init__(conn)
+        self._initial_file = transform_file
+        # Falls back to identity so that the IOC can start without a transform file
+        try:
+            conn.transform = CoordinateTransform.load(transform_file)
+        except Exception as e:
+            LOGGER.warning(
+                f"Failed to load coordinate system transform from "
+                f"{transform_file!r}, defaulting to identity: {e}"
+            )
+            conn.transform = CoordinateTransform.identity()
+
+    async def initialise(self) -> None:
+        await asyncio.gather(
+            self.transform_file.set(self._initial_file),
+            self.description.set(self._conn.transform.describe()),
+        )
+
+    @command(group="Transform")
+    @timed_handler
+    async def reload(self):
+        """Load TransformFile, used for everything added to lists from now on"""
+        transform = CoordinateTransform.load(self.transform_file.get())
+        self._conn.transform = transform
+        LOGGER.info(f"Loaded {transform.describe()} coordinate transform")
+        await self.description.set(transform.describe())
 
 
 class XYCorrectedConnectedSubController(ConnectedSubController):
+    @property
+    def transform(self) -> CoordinateTransform:
+        """The coordinate transform shared by the controller, see TRANSFORM"""
+        return self._conn.transform
+
+    def correct_xy(self, x: int, y: int) -> tuple[int, int]:
+        """Correct for transformations in the laser / oav optics"""
+        corrected = self.correct_xy_array(np.array([[x, y]]))
+        return int(corrected[0, 0]), int(corrected[0, 1])
+
+    def correct_xy_array(self, points: np.ndarray) -> np.ndarray:
+        """Correct an (N, 2) array of points for transformations in the laser / oav
+        optics, returning an (N, 2) int32 array in RTC6 bits"""
+        corrected = self.transform.apply(points)
+        SAMPLED_LOGGER.debug("corrected_points", points=len(corrected))
+        return corrected
+
+
+class ListCommandController(XYCorrectedConnectedSubController):
+    """A sub-controller of LIST which adds commands to the list"""
+
     def __init__(
-        self, conn: RtcConnection, coordinate_correction_matrix: np.ndarray
+        self, conn: RtcConnection, list_operations: "RtcListOperations"
     ) -> None:
         super().__init__(conn)
-        self.coordinate_correction_matrix = coordinate_correction_matrix
+        self._list_operations = list_operations
 
-    def correct_xy(self, x: int, y: int) -> tuple[int, int]:
-        """Correct for transformations in the laser / oav optics"""
-        print(f"Correcting {(x,y)} by {self.coordinate_correction_matrix}")
-        corrected = np.matmul(self.coordinate_correction_matrix, [x, y])
-        as_ints = (int(corrected[0]), int(corrected[1]))
-        print(f"Result: {corrected} => {as_ints}")
-        return as_ints
+
+class ShapeCommandController(ListCommandController):
+    """A sub-controller of LIST which takes a whole shape of jumps, lines and arcs,
+    with one write per waveform"""
+
+    x = AttrRW(Waveform(WAVEFORM_DTYPE, shape=(MAX_POLYGON_LENGTH,)), group="ListOps")
+    y = AttrRW(Waveform(WAVEFORM_DTYPE, shape=(MAX_POLYGON_LENGTH,)), group="ListOps")
+    opcode = AttrRW(
+        Waveform(WAVEFORM_DTYPE, shape=(MAX_POLYGON_LENGTH,)), group="ListOps"
+    )
+    angle = AttrRW(Waveform(np.float64, shape=(MAX_POLYGON_LENGTH,)), group="ListOps")
+    # Number of times to draw the shape, repeated by the card rather than by
+    # sending the shape multiple times. Checked by _passes, as fastcs can't give the
+    # readback of an AttrRW a minimum.
+    passes = AttrRW(Int(), group="ListOps", initial_value=1)
+
+    def _correct_segments(
+        self, x: np.ndarray, y: np.ndarray, opcode: np.ndarray, angle: np.ndarray
+    ) -> np.ndarray:
+        segments = make_segments(x, y, opcode, angle)
+        corrected = self.correct_xy_array(
+            np.column_stack((segments["x"], segments["y"]))
+        )
+        segments["x"], segments["y"] = corrected.T
+        return segments
+
+    async def _corrected_segments(self) -> tuple[bytes, np.ndarray]:
+        """The shape corrected to bits, and the key it is cached under"""
+        arrays = (self.x.get(), self.y.get(), self.opcode.get(), self.angle.get())
+        key = cache_key(*arrays, self.transform.key)
+        segments = await self._list_operations.get_or_compile_segments(
+            key, lambda: self._correct_segments(*arrays)
+        )
+        return key, segments
+
+    def _passes(self) -> int:
+        passes = self.passes.get()
+        if passes < 1:
+            raise ValueError(f"Passes must be at least 1, not {passes}")
+        return passes
+
+
+class RtcPosition(XYCorrectedConnectedSubController):
+    """Moving the scanners straight away, without building and executing a list"""
+
+    x = AttrRW(Int(), group="Goto")
+    y = AttrRW(Int(), group="Goto")
+
+    def _goto(self, x: int, y: int) -> None:
+        bindings = self.get_bindings()
+        statuses = bindings.get_list_statuses()
+        if {bindings.ListStatus.BUSY1, bindings.ListStatus.BUSY2} & set(statuses):
+            raise bindings.RtcListError("Can't jump while a list is executing")
+        bindings.goto_xy(x, y)
+
+    @command(group="Goto")
+    @timed_handler
+    async def goto(self):
+        """Jump to X, Y, which is rejected while a list is executing"""
+        x, y = self.correct_xy(self.x.get(), self.y.get())
+        await self.call(self._goto, x, y)
+        SAMPLED_LOGGER.debug("goto", x=x, y=y)
 
 
 class RtcListOperations(XYCorrectedConnectedSubController):
-    list_pointer_position = AttrR(Int(), group="ListInfo")
+    list_pointer_position = AttrR(Int(), group="ListInfo")  # get_input_pointer
+    output_position = AttrR(Int(), group="ListInfo")  # get_out_pointer
+    list_status = AttrR(String(), group="ListInfo")
+    busy = AttrR(Bool(), group="ListInfo")
+    # Predicted time to execute everything loaded since InitList
+    estimated_time = AttrR(Float(units="s", prec=6), group="ListInfo")
+    stream_chunk_size = AttrRW(
+        Int(), group="Streaming", initial_value=DEFAULT_CHUNK_SIZE
+    )
+    stream_pending_segments = AttrR(Int(), group="Streaming")
+    stream_chunks_loaded = AttrR(Int(), group="Streaming")
+    stream_chunks_total = AttrR(Int(), group="Streaming")
+    streaming = AttrR(Bool(), group="Streaming")
+    # Predicted time to execute everything queued for the next StreamList
+    stream_estimated_time = AttrR(Float(units="s", prec=6), group="Streaming")
+    # A job file from rtc6-fastcs compile-job, queued for streaming by LoadJob
+    job_file = AttrRW(String(), group="Job")
+    job_segments = AttrR(Int(), group="Job")
+    job_description = AttrR(String(), group="Job")
+    shape_cache_hits = AttrR(Int(), group="ShapeCache")
+    shape_cache_misses = AttrR(Int(), group="ShapeCache")
+    shape_cache_segments = AttrR(Int(), group="ShapeCache")
+    # Job files submitted with an ID and priority, and run back to back
+    queue_job_file = AttrRW(String(), group="Queue")
+    queue_job_id = AttrRW(String(), group="Queue")
+    queue_job_priority = AttrRW(Int(), group="Queue")
+    queue_depth = AttrR(Int(), group="Queue")
+    queued_job_ids = AttrR(String(), group="Queue")
+    queue_running = AttrR(Bool(), group="Queue")
+    current_job_id = AttrR(String(), group="Queue")
+    jobs_completed = AttrR(Int(), group="Queue")
+    last_job_id = AttrR(String(), group="QueueTimings")
+    last_job_wait_time = AttrR(Float(units="s", prec=3), group="QueueTimings")
+    last_job_upload_time = AttrR(Float(units="s", prec=3), group="QueueTimings")
+    last_job_execution_time = AttrR(Float(units="s", prec=3), group="QueueTimings")
 
-    class AddJump(XYCorrectedConnectedSubController):
+    def __init__(self, conn: RtcConnection) -> None:
+        super().__init__(conn)
+        self.streamer = ListStreamer(conn)
+        self.streamer.on_list_started = self._job_started
+        self.shape_cache = ShapeCache()
+        self.job_queue = JobQueue()
+        self._stream_task: asyncio.Task | None = None
+        self._queue_task: asyncio.Task | None = None
+        self._running_job: JobTiming | None = None
+        self._last_status_poll = 0.0
+        self._estimate_position = (0.0, 0.0)
+        # Estimates follow on from where the last one ended, so they can't overlap
+        # while one for streaming runs in a thread
+        self._estimate_lock = asyncio.Lock()
+        # The estimates are summed here, as the attributes round what they are set to
+        # and a single segment can take less than their precision
+        self._estimated_seconds = 0.0
+        self._stream_estimated_seconds = 0.0
+
+    class AddJump(ListCommandController):
         x = AttrRW(Int(), group="ListOps")
         y = AttrRW(Int(), group="ListOps")
 
         @command(group="ListOps")
+        @timed_handler
         async def proc(self):
-            print("adding jump")
             bindings = self._conn.get_bindings()
             x, y = self.correct_xy(self.x.get(), self.y.get())
-            bindings.add_jump_to(x, y)
-            print("---")
+            await self.call(bindings.add_jump_to, x, y)
+            await self._list_operations.add_estimated_time(Opcode.JUMP, x, y)
+            SAMPLED_LOGGER.debug("added_jump", x=x, y=y)
 
-    class AddArc(XYCorrectedConnectedSubController):
+    class AddArc(ListCommandController):
         x = AttrRW(Int(), group="ListOps")
         y = AttrRW(Int(), group="ListOps")
         angle = AttrRW(Float(), group="ListOps")
 
         @command()
+        @timed_handler
         async def proc(self):
-            print("adding arc")
             bindings = self._conn.get_bindings()
             x, y = self.correct_xy(self.x.get(), self.y.get())
-            bindings.add_arc_to(x, y, self.angle.get())
-            print("---")
+            await self.call(bindings.add_arc_to, x, y, self.angle.get())
+            await self._list_operations.add_estimated_time(
+                Opcode.ARC, x, y, self.angle.get()
+            )
+            SAMPLED_LOGGER.debug("added_arc", x=x, y=y, angle=self.angle.get())
 
-    class AddLine(XYCorrectedConnectedSubController):
+    class AddLine(ListCommandController):
         x = AttrRW(Int(), group="ListOps")
         y = AttrRW(Int(), group="ListOps")
 
         @command()
+        @timed_handler
         async def proc(self):
-            print("adding line")
             bindings = self._conn.get_bindings()
-            bindings.add_line_to(*self.correct_xy(self.x.get(), self.y.get()))
-            print("---")
+            x, y = self.correct_xy(self.x.get(), self.y.get())
+            await self.call(bindings.add_line_to, x, y)
+            await self._list_operations.add_estimated_time(Opcode.LINE, x, y)
+            SAMPLED_LOGGER.debug("added_line", x=x, y=y)
+
+    class AddPolygon(ShapeCommandController):
+        """Add a whole shape of jumps, lines and arcs to the list with one write per
+        waveform and one proc, rather than one set of PV puts per vertex"""
+
+        def _load_segments(self, segments: np.ndarray, passes: int) -> None:
+            bindings = self._conn.get_bindings()
+            if passes > 1:
+                bindings.add_list_repeat()
+            loaded = bindings.load_segments(segments)
+            if loaded != len(segments):
+                raise bindings.RtcListError(
+                    f"Only {loaded} of {len(segments)} segments fitted in the list"
+                )
+            if passes > 1:
+                bindings.add_list_until(passes)
+
+        @command(group="ListOps")
+        @timed_handler
+        async def proc(self):
+            _, segments = await self._corrected_segments()
+            passes = self._passes()
+            LOGGER.info(f"Adding a polygon of {len(segments)} segments x{passes}")
+            await self.call(self._load_segments, segments, passes)
+            await self._list_operations.add_estimated_segments_time(segments, passes)
+
+        @command(group="ListOps")
+        @timed_handler
+        async def append(self):
+            """Queue the polygon to be sent by the next LIST:StreamList"""
+            # A repeat can't span the two lists, so passes are queued individually
+            _, segments = await self._corrected_segments()
+            segments = np.tile(segments, self._passes())
+            LOGGER.info(f"Queued a polygon of {len(segments)} segments for streaming")
+            await self._list_operations.queue_for_streaming(segments)
+
+    class StepAndRepeat(ShapeCommandController):
+        """Draw one shape at many sites. The shape is loaded into the card once as a
+        subroutine, and the list only holds an offset and a call for each site."""
+
+        # Where the origin of the shape is drawn, in the same units as X and Y
+        site_x = AttrRW(Waveform(WAVEFORM_DTYPE, shape=(MAX_SITES,)), group="Sites")
+        site_y = AttrRW(Waveform(WAVEFORM_DTYPE, shape=(MAX_SITES,)), group="Sites")
+        # Whether the last Proc had to load the shape, rather than reusing it
+        shape_loaded = AttrR(Bool(), group="Sites")
+
+        def _offsets(self) -> np.ndarray:
+            site_x, site_y = self.site_x.get(), self.site_y.get()
+            if len(site_x) != len(site_y):
+                raise ValueError(
+                    f"Got {len(site_x)} site x and {len(site_y)} site y positions"
+                )
+            return self.transform.site_offsets(np.column_stack((site_x, site_y)))
+
+        def _load_calls(self, offsets: np.ndarray, passes: int) -> None:
+            bindings = self._conn.get_bindings()
+            loaded = bindings.load_subroutine_calls(
+                STEP_AND_REPEAT_SUBROUTINE, offsets, passes
+            )
+            if loaded != len(offsets):
+                raise bindings.RtcListError(
+                    f"Only {loaded} of {len(offsets)} sites fitted in the list"
+                )
+
+        @command(group="ListOps")
+        @timed_handler
+        async def proc(self):
+            key, segments = await self._corrected_segments()
+            if len(segments) and segments["opcode"][0] != Opcode.JUMP:
+                # Otherwise it would mark from the end of one site to the next
+                raise ValueError("A step and repeat shape must start with a jump")
+            offsets = self._offsets()
+            passes = self._passes()
+            loaded = await self._conn.load_subroutine(
+                STEP_AND_REPEAT_SUBROUTINE, key, segments
+            )
+            LOGGER.info(
+                f"Adding a shape of {len(segments)} segments x{passes} at "
+                f"{len(offsets)} sites, {'loading' if loaded else 'reusing'} it"
+            )
+            await self.call(self._load_calls, offsets, passes)
+            await asyncio.gather(
+                self.shape_loaded.set(loaded),
+                self._list_operations.add_estimated_step_and_repeat_time(
+                    segments, offsets, passes
+                ),
+            )
 
     @command()
+    @timed_handler
     async def init_list(self):
         rtc6 = self._conn.get_bindings()
-        rtc6.config_list_memory(10000000, 1)  # Just put everything on list one
-        rtc6.init_list_loading(1)
+        # All on list one, apart from room for subroutines
+        await self._conn.config_list_memory(LIST_MEMORY - 1 - SUBROUTINE_MEMORY, 1)
+        await self.call(rtc6.init_list_loading, 1)
+        await self._set_estimated_time(0.0)
 
     @command()
+    @timed_handler
     async def end_list(self):
         rtc6 = self._conn.get_bindings()
-        rtc6.set_end_of_list()
+        await self.call(rtc6.set_end_of_list)
 
     @command()
+    @timed_handler
     async def execute_list(self):
         rtc6 = self._conn.get_bindings()
-        rtc6.execute_list(1)
+        await self.call(rtc6.execute_list, 1)
+        # Report busy straight away so that waiting for idle can't miss a short list
+        await self.busy.set(True)
 
+    def _read_list_status(self) -> tuple[list, int, int]:
+        rtc6 = self._conn.get_bindings()
+        return (
+            rtc6.get_list_statuses(),
+            rtc6.get_input_pointer(),
+            rtc6.get_out_pointer(),
+        )
 
-class RtcController(Controller):
-    def __init__(
-        self,
-        box_ip: str,
-        program_file_dir: str,
-        correction_file: str,
-        coordinate_system_correction_file: str = "",
-        retry_connect: bool = False,
-    ) -> None:
-        super().__init__()
+    @scan(BUSY_POLL_PERIOD)
+    async def update_list_status(self):
+        now = time.monotonic()
+        if not self.busy.get() and now - self._last_status_poll < IDLE_POLL_PERIOD:
+            return
+        await self._update_list_status(now)
+
+    @timed_handler
+    async def _update_list_status(self, now: float):
+        self._last_status_poll = now
+        rtc6 = self._conn.get_bindings()
+        statuses, input_pointer, output_position = await self.call(
+            self._read_list_status
+        )
+        await asyncio.gather(
+            self.list_status.set(" ".join(status.name for status in statuses)),
+            self.busy.set(
+                rtc6.ListStatus.BUSY1 in statuses or rtc6.ListStatus.BUSY2 in statuses
+            ),
+            self.list_pointer_position.set(input_pointer),
+            self.output_position.set(output_position),
+        )
+
+    async def get_or_compile_segments(
+        self, key: bytes, compile: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """Look up corrected segments in the shape cache, compiling them on a miss"""
+        segments = self.shape_cache.get_or_compile(key, compile)
+        await asyncio.gather(
+            self.shape_cache_hits.set(self.shape_cache.hits),
+            self.shape_cache_misses.set(self.shape_cache.misses),
+            self.shape_cache_segments.set(self.shape_cache.segments),
+        )
+        return segments
+
+    @command(group="ShapeCache")
+    @timed_handler
+    async def clear_shape_cache(self):
+        self.shape_cache.clear()
+        await self.shape_cache_segments.set(0)
+
+    def _estimate_pass(
+        self, segments: np.ndarray, start: tuple[float, float]
+    ) -> tuple[float, tuple[float, float]]:
+        seconds = 0.0
+        for index in range(0, len(segments), ESTIMATE_CHUNK_SIZE):
+            times, start = segment_times(
+                segments[index : index + ESTIMATE_CHUNK_SIZE], self.settings, start
+            )
+            seconds += float(times.sum())
+        return seconds, start
+
+    def _estimate(self, segments: np.ndarray, passes: int = 1) -> float:
+        """Estimate the time to execute segments following the last ones added"""
+        seconds, end = self._estimate_pass(segments, self._estimate_position)
+        if passes > 1:
+            # Later passes start from where the first one ended
+            repeat_seconds, _ = self._estimate_pass(segments, end)
+            seconds += repeat_seconds * (passes - 1)
+        self._estimate_position = end
+        return seconds
+
+    async def _set_estimated_time(self, seconds: float):
+        self._estimated_seconds = seconds
+        await self.estimated_time.set(seconds)
+
+    async def _set_stream_estimated_time(self, seconds: float):
+        self._stream_estimated_seconds = seconds
+        await self.stream_estimated_time.set(seconds)
+
+    async def add_estimated_segments_time(self, segments: np.ndarray, passes: int):
+        async with self._estimate_lock:
+            await self._set_estimated_time(
+                self._estimated_seconds + self._estimate(segments, passes)
+            )
+
+    def _estimate_step_and_repeat(
+        self, segments: np.ndarray, offsets: np.ndarray, passes: int
+    ) -> float:
+        """Estimate the time to draw segments, starting with a jump, at each offset"""
+        if not len(segments) or not len(offsets):
+            return 0.0
+        first = (float(segments["x"][0]), float(segments["y"][0]))
+        # The shape takes the same time at every site, apart from the jump onto it
+        site_seconds, end = self._estimate_pass(segments[1:], first)
+        if passes > 1:
+            repeat_seconds, _ = self._estimate_pass(segments, end)
+            site_seconds += repeat_seconds * (passes - 1)
+        # Jumps to the start of each site, from the end of the one before
+        targets = np.stack((offsets + first, offsets + end), axis=1).reshape(-1, 2)
+        jumps = make_segments(
+            targets[:, 0], targets[:, 1], np.full(len(targets), Opcode.JUMP)
+        )
+        jump_times, self._estimate_position = segment_times(
+            jumps, self.settings, self._estimate_position
+        )
+        return site_seconds * len(offsets) + float(jump_times[::2].sum())
+
+    async def add_estimated_step_and_repeat_time(
+        self, segments: np.ndarray, offsets: np.ndarray, passes: int
+    ):
+        async with self._estimate_lock:
+            await self._set_estimated_time(
+                self._estimated_seconds
+                + self._estimate_step_and_repeat(segments, offsets, passes)
+            )
+
+    async def add_estimated_time(
+        self, opcode: Opcode, x: int, y: int, angle: float = 0.0
+    ):
+        segment = make_segments(np.array([x]), np.array([y]), np.array([opcode]))
+        segment["angle"] = angle
+        await self.add_estimated_segments_time(segment, 1)
+
+    async def queue_for_streaming(self, segments: np.ndarray):
+        self.streamer.append(segments)
+        await self.stream_pending_segments.set(self.streamer.pending_segments)
+        # A job can be millions of segments read from its file as they are estimated,
+        # which would hold up every other PV if it were done on the event loop
+        async with self._estimate_lock:
+            seconds = await asyncio.to_thread(self._estimate, segments)
+            await self._set_stream_estimated_time(
+                self._stream_estimated_seconds + seconds
+            )
+
+    async def _update_stream_progress(self, loaded: int, total: int):
+        await asyncio.gather(
+            self.stream_chunks_loaded.set(loaded),
+            self.stream_chunks_total.set(total),
+            self.stream_pending_segments.set(self.streamer.pending_segments),
+        )
+
+    async def _stream(self):
         try:
-            self.coordinate_system_transform = np.loadtxt(
-                coordinate_system_correction_file
+            await self.streaming.set(True)
+            await self.busy.set(True)
+            await self._update_stream_progress(0, 0)
+            await self.streamer.stream(
+                self.stream_chunk_size.get(), self._update_stream_progress
             )
         except Exception:
-            LOGGER.warning(
-                "Failed to open coordinate system transformation file, defaulting to identity matrix."
+            LOGGER.exception("Streaming the list failed")
+        finally:
+            await self.streaming.set(False)
+            await self._set_stream_estimated_time(0.0)
+
+    def _streaming(self) -> bool:
+        return any(
+            task is not None and not task.done()
+            for task in (self._stream_task, self._queue_task)
+        )
+
+    @command(group="Streaming")
+    @timed_handler
+    async def stream_list(self):
+        """Send everything queued with ADDPOLYGON:Append through lists 1 and 2,
+        loading each while the other executes"""
+        if self._streaming():
+            raise RuntimeError("Already streaming a list")
+        self._stream_task = asyncio.create_task(self._stream())
+
+    @command(group="Job")
+    @timed_handler
+    async def load_job(self):
+        """Apply the settings in JobFile and queue its segments for the next
+        StreamList. The segments are mapped from the file, not read into memory."""
+        job = read_job(self.job_file.get())
+        check_transform(job.header, self.transform)
+        if job.header.settings is not None:
+            await self.apply_settings(job.header.settings)
+        LOGGER.info(f"Loaded a job of {job.header.segment_count} segments")
+        await asyncio.gather(
+            self.job_segments.set(job.header.segment_count),
+            self.job_description.set(job.header.description),
+        )
+        await self.queue_for_streaming(job.segments)
+
+    @command(group="Streaming")
+    @timed_handler
+    async def clear_stream(self):
+        self.streamer.clear()
+        await self.stream_pending_segments.set(0)
+        await self._set_stream_estimated_time(0.0)
+
+    async def _publish_queue(self):
+        await asyncio.gather(
+            self.queue_depth.set(len(self.job_queue)),
+            self.queued_job_ids.set(" ".join(self.job_queue.job_ids())),
+        )
+
+    async def _job_started(self, timing: JobTiming, chunk: int):
+        """Called as each list of a queued job starts executing"""
+        if chunk != 0:
+            return
+        await self._job_finished()
+        timing.started = time.monotonic()
+        self._running_job = timing
+        await self.current_job_id.set(timing.job_id)
+
+    async def _job_finished(self):
+        """Record the timings of the running job, once the card has moved on"""
+        timing, self._running_job = self._running_job, None
+        if timing is None or timing.started is None:
+            return
+        timing.execution = time.monotonic() - timing.started
+        LOGGER.info(
+            f"Job {timing.job_id} finished: waited {timing.waited:.3f}s, uploaded "
+            f"in {timing.upload:.3f}s, executed in {timing.execution:.3f}s"
+        )
+        await asyncio.gather(
+            self.current_job_id.set(""),
+            self.jobs_completed.set(self.jobs_completed.get() + 1),
+            self.last_job_id.set(timing.job_id),
+            self.last_job_wait_time.set(timing.waited),
+            self.last_job_upload_time.set(timing.upload),
+            self.last_job_execution_time.set(timing.execution),
+        )
+
+    async def _run_queue(self):
+        """Send queued jobs one after another, each into whichever list is free, so
+        that the next job is loaded while the one before it executes"""
+        try:
+            await self.queue_running.set(True)
+            await self.busy.set(True)
+            chunk_size = self.stream_chunk_size.get()
+            await self.streamer.start(chunk_size)
+            while True:
+                queued = self.job_queue.pop()
+                if queued is None:
+                    await self.streamer.finish()
+                    await self._job_finished()
+                    if not self.job_queue:
+                        break
+                    continue  # submitted while the last job was finishing
+                await self._publish_queue()
+                try:
+                    job = read_job(queued.path)
+                    check_transform(job.header, self.transform)
+                except Exception:
+                    LOGGER.exception(f"Skipping job {queued.job_id}")
+                    continue
+                if job.header.settings is not None:
+                    profile = job.header.settings
+                    if profile.changes_from(self._conn.applied_settings).to_dict():
+                        # Speeds and delays take effect straight away, so they can
+                        # only change once the jobs before have finished
+                        await self.streamer.finish()
+                        await self._job_finished()
+                        await self.apply_settings(profile)
+                timing = JobTiming(
+                    queued.job_id, waited=time.monotonic() - queued.submitted
+                )
+                timing.upload = await self.streamer.send(
+                    [job.segments], chunk_size, tag=timing
+                )
+        except Exception:
+            LOGGER.exception("Running the job queue failed")
+        finally:
+            self._running_job = None
+            await asyncio.gather(
+                self.queue_running.set(False),
+                self.current_job_id.set(""),
+                self._publish_queue(),
+            )
+
+    @command(group="Queue")
+    @timed_handler
+    async def submit_job(self):
+        """Queue QueueJobFile as QueueJobId, to run after any jobs with the same or
+        higher QueueJobPriority. The queue starts running if it isn't already."""
+        queue_idle = self._queue_task is None or self._queue_task.done()
+        if queue_idle and self._streaming():
+            raise RuntimeError("Can't run queued jobs while streaming a list")
+        header = read_job(self.queue_job_file.get()).header
+        check_transform(header, self.transform)
+        self.job_queue.submit(
+            QueuedJob(
+                self.queue_job_id.get(),
+                self.queue_job_file.get(),
+                self.queue_job_priority.get(),
             )
-            self.coordinate_system_transform = np.array([[1, 0], [0, 1]])
-        self._conn = RtcConnection(
-            box_ip, program_file_dir, correction_file, retry_connect
         )
+        LOGGER.info(
+            f"Submitted job {self.queue_job_id.get()} of "
+            f"{header.segment_count} segments"
+        )
+        await self._publish_queue()
+        if queue_idle:
+            self._queue_task = asyncio.create_task(self._run_queue())
+
+    @command(group="Queue")
+    @timed_handler
+    async def cancel_job(self):
+        """Take QueueJobId out of the queue, if it hasn't started loading yet"""
+        if not self.job_queue.remove(self.queue_job_id.get()):
+            raise ValueError(f"Job {self.queue_job_id.get()} is not queued")
+        await self._publish_queue()
+
+    @command(group="Queue")
+    @timed_handler
+    async def clear_queue(self):
+        self.job_queue.clear()
+        await self._publish_queue()
+
+
+class RtcCapture(ConnectedSubController):
+    """Recording of the actual and target scanner positions and laser state while a
+    list executes, started by Arm in the list. Samples are read from the card into a
+    ring buffer of the last CaptureLength of them, as it executes."""
+
+    # Sample period in 10us increments
+    period = AttrRW(Int(), group="Capture", initial_value=10)
+    capturing = AttrR(Bool(), group="Capture")
+    samples = AttrR(Int(), group="Capture")  # recorded by the card so far
+    following_error_rms = AttrR(Float(units="bits", prec=2), group="Capture")
+    following_error_max = AttrR(Float(units="bits", prec=2), group="Capture")
+    actual_x = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(DEFAULT_CAPTURE_LENGTH,)), group="Data"
+    )
+    actual_y = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(DEFAULT_CAPTURE_LENGTH,)), group="Data"
+    )
+    target_x = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(DEFAULT_CAPTURE_LENGTH,)), group="Data"
+    )
+    target_y = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(DEFAULT_CAPTURE_LENGTH,)), group="Data"
+    )
+    laser_on = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(DEFAULT_CAPTURE_LENGTH,)), group="Data"
+    )
+    save_file = AttrRW(String(), group="Save", initial_value=DEFAULT_CAPTURE_FILE)
+
+    def __init__(self, conn: RtcConnection) -> None:
+        super().__init__(conn)
+        self.buffer = CaptureBuffer(DEFAULT_CAPTURE_LENGTH)
+        self._armed = False
+        self._read = 0  # samples read from the card
+        self._last_publish = 0.0
+        self._sample_period = 0.0  # s, of the trace being read
+        # Samples of the last trace, which the card reports until the armed one starts
+        self._stale_samples: int | None = None
 
-        self._info_controller = RtcInfoController(self._conn)
-        self.register_sub_controller("INFO", self._info_controller)
-        self.register_sub_controller("CONTROL", RtcControlSettings(self._conn))
-        list_controller = RtcListOperations(
-            self._conn, self.coordinate_system_transform
+    def _start_trace(self, period: int, signals: list[int]) -> int:
+        """Add the start of a trace to the list being loaded, all on the worker
+        thread. Returns the samples the card reports for the trace before it."""
+        bindings = self.get_bindings()
+        bindings.add_trace_start(period, signals)
+        _, recorded = bindings.get_trace_status()
+        return recorded
+
+    def _read_into(self, out: np.ndarray, first: int) -> None:
+        bindings = self.get_bindings()
+        for channel, row in enumerate(out, start=1):
+            bindings.read_trace(channel, first, row)
+
+    def _read_new_samples(self) -> tuple[bool, int]:
+        """Read the samples the card has recorded since last time, all on the worker
+        thread. Returns whether the trace is still recording, and the samples."""
+        busy, recorded = self.get_bindings().get_trace_status()
+        if self._stale_samples is not None:
+            if not busy and recorded == self._stale_samples:
+                return False, 0
+            self._stale_samples = None
+        if recorded > self._read:
+            self.buffer.extend_from(recorded - self._read, self._read_into)
+            self._read = recorded
+        return busy, recorded
+
+    @command(group="Capture")
+    @timed_handler
+    async def arm(self):
+        """Start recording from this point in the list being loaded"""
+        period = self.period.get()
+        if period < 1:
+            raise ValueError(f"Period must be at least 1, not {period}")
+        self.buffer.clear()
+        self._read = 0
+        self._sample_period = period * DELAY_UNIT
+        self._stale_samples = await self.call(
+            self._start_trace,
+            period,
+            [int(signal) for signal in CAPTURE_SIGNALS.values()],
+        )
+        self._armed = True
+        await asyncio.gather(self.samples.set(0), self.capturing.set(True))
+
+    @command(group="Capture")
+    @timed_handler
+    async def stop(self):
+        """Stop recording at this point in the list being loaded"""
+        await self.call(self.get_bindings().add_trace_stop)
+
+    async def publish(self):
+        samples = self.buffer.samples()
+        error = following_error(samples)
+        await asyncio.gather(
+            *(
+                getattr(self, name).set(samples[index].astype(WAVEFORM_DTYPE))
+                for index, name in enumerate(CAPTURE_FIELDS)
+            ),
+            self.following_error_rms.set(
+                float(np.sqrt(np.mean(error**2))) if len(error) else 0.0
+            ),
+            self.following_error_max.set(float(error.max()) if len(error) else 0.0),
+        )
+
+    @scan(BUSY_POLL_PERIOD)
+    async def update(self):
+        if not self._armed:
+            return
+        await self._update()
+
+    @timed_handler
+    async def _update(self):
+        busy, recorded = await self.call(self._read_new_samples)
+        await self.samples.set(recorded)
+        # Not recording before the list reaches the start of the trace either
+        finished = not busy and recorded > 0
+        now = time.monotonic()
+        if finished or now - self._last_publish >= CAPTURE_PUBLISH_PERIOD:
+            self._last_publish = now
+            await self.publish()
+        if finished:
+            self._armed = False
+            await self.capturing.set(False)
+            LOGGER.info(f"Captured a trace of {recorded} samples")
+
+    @command(group="Save")
+    @timed_handler
+    async def save(self):
+        """Write the captured samples to SaveFile, see `save_capture`"""
+        # Compressing a full buffer takes long enough to hold up the other scans
+        await asyncio.to_thread(
+            save_capture,
+            self.save_file.get(),
+            self.buffer.samples(),
+            self._sample_period,
+        )
+
+
+class RtcConnectionStatus(ConnectedSubController):
+    """Health of the connection to the eth box, see `ConnectionSupervisor`"""
+
+    state = AttrR(String(), group="Connection")
+    latency = AttrR(Float(units="s", prec=6), group="Connection")
+    reconnects = AttrR(Int(), group="Connection")
+    last_error = AttrR(String(), group="Connection")
+
+    def __init__(self, conn: RtcConnection, supervisor: ConnectionSupervisor) -> None:
+        super().__init__(conn)
+        self._supervisor = supervisor
+
+    @scan(CONNECTION_UPDATE_PERIOD)
+    async def update(self):
+        supervisor = self._supervisor
+        await asyncio.gather(
+            self.state.set(supervisor.state.value),
+            self.latency.set(supervisor.latency),
+            self.reconnects.set(supervisor.reconnects),
+            self.last_error.set(supervisor.last_error),
+        )
+
+
+class RtcDiagnostics(ConnectedSubController):
+    """Timing of bindings calls and handlers, see `rtc6_fastcs.diagnostics`"""
+
+    bindings_calls = AttrR(Int(), group="Bindings")
+    bindings_time = AttrR(Float(units="s", prec=6), group="Bindings")
+    bindings_histogram = AttrR(
+        Waveform(WAVEFORM_DTYPE, shape=(HISTOGRAM_BUCKETS,)), group="Bindings"
+    )
+    handler_calls = AttrR(Int(), group="Handlers")
+    handler_time = AttrR(Float(units="s", prec=6), group="Handlers")
+    slowest_call = AttrR(String(), group="Handlers")
+    slowest_call_p99 = AttrR(Float(units="s", prec=6), group="Handlers")
+    dump_file = AttrRW(String(), group="Dump", initial_value=DEFAULT_DIAGNOSTICS_FILE)
+
+    @scan(DIAGNOSTICS_UPDATE_PERIOD)
+    async def update(self):
+        diagnostics = self._conn.diagnostics
+        bindings = diagnostics.matching("bindings:")
+        handlers = diagnostics.matching("handler:")
+        histogram = np.zeros(HISTOGRAM_BUCKETS, dtype=WAVEFORM_DTYPE)
+        for stats in bindings:
+            histogram += stats.histogram
+        slowest_name, slowest_p99 = max(
+            ((name, stats.percentile(99)) for name, stats in diagnostics.stats.items()),
+            key=lambda name_and_p99: name_and_p99[1],
+            default=("", 0.0),
+        )
+        await asyncio.gather(
+            self.bindings_calls.set(sum(stats.count for stats in bindings)),
+            self.bindings_time.set(sum((stats.total for stats in bindings), 0.0)),
+            self.bindings_histogram.set(histogram),
+            self.handler_calls.set(sum(stats.count for stats in handlers)),
+            self.handler_time.set(sum((stats.total for stats in handlers), 0.0)),
+            self.slowest_call.set(slowest_name),
+            self.slowest_call_p99.set(slowest_p99),
+        )
+
+    @command(group="Dump")
+    async def dump(self):
+        """Write all timing statistics to DumpFile as JSON"""
+        self._conn.diagnostics.dump(self.dump_file.get())
+
+    @command(group="Dump")
+    async def reset(self):
+        self._conn.diagnostics.reset()
+        await self.update()
+
+
+class RtcCard:
+    """The sub-controllers for one card, registered on `parent`"""
+
+    def __init__(
+        self,
+        parent: BaseController,
+        conn: RtcConnection,
+        coordinate_system_correction_file: str = "",
+        profiles_file: str = "",
+    ) -> None:
+        self.conn = conn
+        self._transform_controller = RtcTransform(
+            conn, coordinate_system_correction_file
+        )
+
+        self._info_controller = RtcInfoController(conn)
+        parent.register_sub_controller("INFO", self._info_controller)
+        self._control_settings = RtcControlSettings(conn, profiles_file)
+        parent.register_sub_controller("CONTROL", self._control_settings)
+        parent.register_sub_controller("TRANSFORM", self._transform_controller)
+        parent.register_sub_controller("DIAG", RtcDiagnostics(conn))
+        self._supervisor = ConnectionSupervisor(conn)
+        parent.register_sub_controller(
+            "CONNECTION", RtcConnectionStatus(conn, self._supervisor)
+        )
+        list_controller = RtcListOperations(conn)
+        self.list_controller = list_controller
+        parent.register_sub_controller("LIST", list_controller)
+        parent.register_sub_controller("POSITION", RtcPosition(conn))
+        parent.register_sub_controller("CAPTURE", RtcCapture(conn))
+        list_controller.register_sub_controller(
+            "ADDJUMP", list_controller.AddJump(conn, list_controller)
+        )
+        list_controller.register_sub_controller(
+            "ADDARC", list_controller.AddArc(conn, list_controller)
         )
-        self.register_sub_controller("LIST", list_controller)
         list_controller.register_sub_controller(
-            "ADDJUMP",
-            list_controller.AddJump(self._conn, self.coordinate_system_transform),
+            "ADDLINE", list_controller.AddLine(conn, list_controller)
         )
         list_controller.register_sub_controller(
-            "ADDARC",
-            list_controller.AddArc(self._conn, self.coordinate_system_transform),
+            "ADDPOLYGON", list_controller.AddPolygon(conn, list_controller)
         )
         list_controller.register_sub_controller(
-            "ADDLINE",
-            list_controller.AddLine(self._conn, self.coordinate_system_transform),
+            "STEPREPEAT", list_controller.StepAndRepeat(conn, list_controller)
         )
 
+    async def initialise(self) -> None:
+        await self._transform_controller.initialise()
+        await self._control_settings.initialise()
+
     async def connect(self) -> None:
-        await self._conn.connect()
+        await self.conn.connect()
         await self._info_controller.proc_cardinfo()
+        self._supervisor.start()
+
+    async def close(self) -> None:
+        await self._supervisor.stop()
+        await self.conn.close()
+
+
+class RtcController(Controller):
+    """Controls the RTC6 in one or more eth boxes.
+
+    `box_ip` is a comma separated list of IP addresses. With one box its PVs are at
+    the top level, e.g. LIST:ExecuteList; with more, those of the nth box are under
+    CARDn, e.g. CARD2:LIST:ExecuteList. Each box has its own worker thread, so
+    lists are loaded onto them in parallel.
+    """
+
+    def __init__(
+        self,
+        box_ip: str,
+        program_file_dir: str,
+        correction_file: str,
+        coordinate_system_correction_file: str = "",
+        retry_connect: bool = False,
+        simulate: bool = False,
+        profiles_file: str = "",
+    ) -> None:
+        super().__init__()
+        self._pool = ConnectionPool(
+            program_file_dir, correction_file, retry_connect, simulate
+        )
+        box_ips = [ip.strip() for ip in box_ip.split(",") if ip.strip()]
+        if len(set(box_ips)) != len(box_ips):
+            raise ValueError(f"Each eth box can only be given once, got {box_ip}")
+        self._cards: list[RtcCard] = []
+        for ip in box_ips:
+            conn = self._pool.get(ip)
+            parent: BaseController = self
+            if len(box_ips) > 1:
+                parent = SubController()
+                self.register_sub_controller(f"CARD{conn.card}", parent)
+            self._cards.append(
+                RtcCard(parent, conn, coordinate_system_correction_file, profiles_file)
+            )
+
+    @property
+    def cards(self) -> list[RtcCard]:
+        return self._cards
+
+    @command()
+    async def execute_all(self):
+        """Execute list 1 on every card at once"""
+        await asyncio.gather(
+            *(card.list_controller.execute_list() for card in self._cards)
+        )
+
+    async def initialise(self) -> None:
+        await asyncio.gather(*(card.initialise() for card in self._cards))
+
+    async def connect(self) -> None:
+        await asyncio.gather(*(card.connect() for card in self._cards))
 
     async def close(self) -> None:
-        await self._conn.close()
+        await asyncio.gather(*(card.close() for card in self._cards))
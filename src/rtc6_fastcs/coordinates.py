@@ -0,0 +1,182 @@
+"""Conversion of requested coordinates into the bit space of the RTC6
+
+A `CoordinateTransform` is an affine transform, optionally followed by a correction
+for distortion of the field measured on a grid. Everything which doesn't depend on
+the points is worked out when the transform is loaded, so applying it is a few array
+operations however many points there are.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+# The RTC6 works in 20 bit signed coordinates, see the manual page 80
+RTC_MIN_BITS = -(2**19)
+RTC_MAX_BITS = 2**19 - 1
+# Fixed point iterations used to undo a distortion grid
+INVERSE_ITERATIONS = 8
+
+
+class DistortionGrid:
+    """Offsets in bits measured at regularly spaced points of the field, which are
+    added to transformed points by bilinear interpolation. Points outside the grid
+    get the offset at its edge."""
+
+    def __init__(
+        self,
+        origin: np.ndarray | tuple[float, float],
+        spacing: np.ndarray | tuple[float, float],
+        offsets: np.ndarray,
+    ) -> None:
+        self.origin = np.asarray(origin, dtype=np.float64).reshape(2)
+        self.spacing = np.asarray(spacing, dtype=np.float64).reshape(2)
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        if self.offsets.ndim != 3 or self.offsets.shape[2] != 2:
+            raise ValueError(
+                f"Grid offsets must be (ny, nx, 2), got shape {self.offsets.shape}"
+            )
+        if min(self.offsets.shape[:2]) < 2:
+            raise ValueError("A distortion grid needs at least 2x2 points")
+        if (self.spacing <= 0).any():
+            raise ValueError(f"Grid spacing must be positive, got {self.spacing}")
+        # Bilinear coefficients for each cell, so that the offset at (u, v) in [0, 1]
+        # across a cell is c[0] + c[1] * u + c[2] * v + c[3] * u * v
+        c00 = self.offsets[:-1, :-1]
+        c10 = self.offsets[:-1, 1:]
+        c01 = self.offsets[1:, :-1]
+        c11 = self.offsets[1:, 1:]
+        coefficients = np.stack((c00, c10 - c00, c01 - c00, c11 - c10 - c01 + c00), 2)
+        # One row of 8 per cell, so a lookup is a single gather
+        self._cells = np.array(coefficients.shape[1::-1])  # x, y
+        self._coefficients = np.ascontiguousarray(coefficients.reshape(-1, 8))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        ny, nx, _ = self.offsets.shape
+        return ny, nx
+
+    def offsets_at(self, points: np.ndarray) -> np.ndarray:
+        """Interpolated offsets at an (N, 2) array of points in bits"""
+        position = (points - self.origin) / self.spacing
+        cell = np.clip(np.floor(position), 0, self._cells - 1)
+        uv = np.clip(position - cell, 0, 1)
+        cell = cell.astype(np.intp)
+        c = self._coefficients.take(cell[:, 1] * self._cells[0] + cell[:, 0], axis=0)
+        u, v = uv[:, :1], uv[:, 1:]
+        return c[:, 0:2] + c[:, 2:4] * u + (c[:, 4:6] + c[:, 6:8] * u) * v
+
+
+class CoordinateTransform:
+    """Converts requested x, y points to RTC6 bits.
+
+    `affine` is either a 2x2 matrix, or a 2x3 affine matrix whose last column is an
+    offset added after the matrix multiplication. If a `grid` is given, its offsets
+    are added to the result.
+    """
+
+    def __init__(self, affine: np.ndarray, grid: DistortionGrid | None = None) -> None:
+        affine = np.asarray(affine, dtype=np.float64)
+        if affine.shape not in ((2, 2), (2, 3)):
+            raise ValueError(
+                f"Coordinate transform must be 2x2 or 2x3, got shape {affine.shape}"
+            )
+        self.affine = np.zeros((2, 3))
+        self.affine[:, : affine.shape[1]] = affine
+        self.grid = grid
+        self._matrix = np.ascontiguousarray(self.affine[:, :2].T)
+        self._offset = self.affine[:, 2].copy()
+        self._has_offset = bool(self._offset.any())
+        try:
+            self._inverse_matrix = np.linalg.inv(self._matrix)
+        except np.linalg.LinAlgError:
+            self._inverse_matrix = None
+        parts = [self.affine]
+        if grid is not None:
+            parts += [grid.origin, grid.spacing, grid.offsets]
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(np.ascontiguousarray(part).data)
+        self.key = digest.digest()
+
+    @classmethod
+    def identity(cls) -> "CoordinateTransform":
+        return cls(np.eye(2))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CoordinateTransform":
+        """Load a transform from a text file holding the affine matrix, as read by
+        np.loadtxt, or a .npz file with an `affine` matrix and optionally a grid
+        given by `origin`, `spacing` and `offsets`"""
+        if Path(path).suffix != ".npz":
+            return cls(np.loadtxt(path))
+        with np.load(path) as data:
+            affine = data["affine"] if "affine" in data else np.eye(2)
+            grid = None
+            if "offsets" in data:
+                grid = DistortionGrid(data["origin"], data["spacing"], data["offsets"])
+        return cls(affine, grid)
+
+    def describe(self) -> str:
+        description = "affine" if self._has_offset else "linear"
+        if self.grid is not None:
+            ny, nx = self.grid.shape
+            description += f" with {nx}x{ny} distortion grid"
+        return description
+
+    def transform(self, points: np.ndarray) -> np.ndarray:
+        """Apply the transform to an (N, 2) array of points, without rounding"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        transformed = points @ self._matrix
+        if self._has_offset:
+            transformed += self._offset
+        if self.grid is not None:
+            transformed += self.grid.offsets_at(transformed)
+        return transformed
+
+    def apply(self, points: np.ndarray) -> np.ndarray:
+        """Transform an (N, 2) array of points, rounded to the nearest bit and
+        clipped to the range of the RTC6, as an (N, 2) int32 array"""
+        transformed = self.transform(points)
+        np.rint(transformed, out=transformed)
+        np.clip(transformed, RTC_MIN_BITS, RTC_MAX_BITS, out=transformed)
+        return transformed.astype(np.int32)
+
+    def site_offsets(self, sites: np.ndarray) -> np.ndarray:
+        """Offsets in bits which move a shape transformed about the origin to each of
+        an (N, 2) array of sites, as an (N, 2) int32 array. This is exact for an
+        affine transform; with a grid, the distortion is only followed at the site
+        itself, not across the shape."""
+        offsets = self.transform(sites) - self.transform(np.zeros((1, 2)))
+        np.rint(offsets, out=offsets)
+        np.clip(offsets, RTC_MIN_BITS, RTC_MAX_BITS, out=offsets)
+        return offsets.astype(np.int32)
+
+    def invert(self, points: np.ndarray) -> np.ndarray:
+        """Requested coordinates which would be transformed to an (N, 2) array of
+        points in bits, e.g. to report positions read back from the card"""
+        if self._inverse_matrix is None:
+            raise ValueError("The coordinate transform is singular")
+        bits = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        undistorted = bits
+        if self.grid is not None:
+            # The offsets vary slowly, so look them up where the last guess lands
+            for _ in range(INVERSE_ITERATIONS):
+                undistorted = bits - self.grid.offsets_at(undistorted)
+        if self._has_offset:
+            undistorted = undistorted - self._offset
+        return undistorted @ self._inverse_matrix
+
+
+def correct_points(
+    points: np.ndarray, transform: "np.ndarray | CoordinateTransform"
+) -> np.ndarray:
+    """Apply a coordinate system transform to an (N, 2) array of x, y points.
+
+    `transform` is a `CoordinateTransform`, or a 2x2 matrix or 2x3 affine matrix as
+    accepted by one. Results are rounded to the nearest bit and clipped to the range
+    of the RTC6, and returned as an (N, 2) int32 array.
+    """
+    if not isinstance(transform, CoordinateTransform):
+        transform = CoordinateTransform(transform)
+    return transform.apply(points)
@@ -0,0 +1,166 @@
+"""Segment arrays for curves, generated for many curves at once
+
+Circles are drawn with native arcs unless a tolerance is given. Other curves are
+flattened to lines whose chords stay within `tolerance` bits of the true curve (before
+rounding to whole bits). Coordinates are given in any unit and multiplied by `scale`
+to get bits, as in `segments_from_points`. Every curve starts with a jump to its first
+point, so the result can be sent with `plan_stubs.polygon_segments` or optimised as
+contours.
+"""
+
+import math
+
+import numpy as np
+
+from rtc6_fastcs.segments import SEGMENT_DTYPE, Opcode
+
+DEFAULT_TOLERANCE = 1.0  # bits
+MIN_SEGMENTS = 3  # per closed curve
+
+
+def _chords_for_radius(
+    radius: np.ndarray, angle: np.ndarray | float, tolerance: float
+) -> np.ndarray:
+    """Number of chords needed to follow an arc of `angle` radians, such that the
+    chords are never more than `tolerance` from it"""
+    half_step = np.arccos(np.clip(1 - tolerance / np.maximum(radius, 1e-12), -1, 1))
+    return np.maximum(np.ceil(np.abs(angle) / (2 * half_step)), 1).astype(np.intp)
+
+
+def _sample(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """For curves split into `counts` pieces, the curve index and parameter t in
+    [0, 1] of each of the counts + 1 points, and whether each point starts a curve"""
+    points = counts + 1
+    curve = np.repeat(np.arange(len(counts)), points)
+    first = np.cumsum(points) - points
+    index = np.arange(points.sum()) - first[curve]
+    return curve, index / counts[curve], index == 0
+
+
+def _polylines(xy: np.ndarray, is_first: np.ndarray) -> np.ndarray:
+    """Segments which jump to the first point of each curve and mark the rest"""
+    segments = np.zeros(len(xy), dtype=SEGMENT_DTYPE)
+    segments["opcode"] = np.where(is_first, Opcode.JUMP, Opcode.LINE)
+    rounded = np.rint(xy)
+    segments["x"] = rounded[:, 0]
+    segments["y"] = rounded[:, 1]
+    return segments
+
+
+def circles(
+    centres: np.ndarray,
+    radii: np.ndarray | float,
+    scale: float = 1,
+    tolerance: float | None = None,
+) -> np.ndarray:
+    """Full circles about (N, 2) `centres`, each starting at its rightmost point.
+    Drawn as one native arc each, or as lines if a `tolerance` is given."""
+    centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2) * scale
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64) * scale, len(centres))
+    if tolerance is None:
+        segments = np.zeros(2 * len(centres), dtype=SEGMENT_DTYPE)
+        segments["opcode"][0::2] = Opcode.JUMP
+        segments["x"][0::2] = np.rint(centres[:, 0] + radii)
+        segments["y"][0::2] = np.rint(centres[:, 1])
+        segments["opcode"][1::2] = Opcode.ARC
+        segments["x"][1::2] = np.rint(centres[:, 0])
+        segments["y"][1::2] = np.rint(centres[:, 1])
+        segments["angle"][1::2] = 360
+        return segments
+    return ellipses(centres, radii, radii, tolerance=tolerance)
+
+
+def ellipses(
+    centres: np.ndarray,
+    radii_x: np.ndarray | float,
+    radii_y: np.ndarray | float,
+    rotation_deg: np.ndarray | float = 0,
+    scale: float = 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> np.ndarray:
+    """Closed ellipses about (N, 2) `centres`, with x and y radii before rotating
+    anticlockwise by `rotation_deg`, flattened to lines"""
+    centres = np.asarray(centres, dtype=np.float64).reshape(-1, 2) * scale
+    n = len(centres)
+    radii_x = np.broadcast_to(np.asarray(radii_x, dtype=np.float64) * scale, n)
+    radii_y = np.broadcast_to(np.asarray(radii_y, dtype=np.float64) * scale, n)
+    rotation = np.broadcast_to(np.deg2rad(rotation_deg), n)
+    counts = np.maximum(
+        _chords_for_radius(np.maximum(radii_x, radii_y), 2 * np.pi, tolerance),
+        MIN_SEGMENTS,
+    )
+    curve, t, is_first = _sample(counts)
+    theta = 2 * np.pi * t
+    x = radii_x[curve] * np.cos(theta)
+    y = radii_y[curve] * np.sin(theta)
+    cos, sin = np.cos(rotation[curve]), np.sin(rotation[curve])
+    xy = centres[curve] + np.column_stack((x * cos - y * sin, x * sin + y * cos))
+    return _polylines(xy, is_first)
+
+
+def beziers(
+    control_points: np.ndarray,
+    scale: float = 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> np.ndarray:
+    """Bezier curves from (N, order + 1, 2) `control_points`, e.g. (N, 4, 2) for
+    cubics, flattened to lines"""
+    control_points = np.asarray(control_points, dtype=np.float64) * scale
+    if control_points.ndim == 2:
+        control_points = control_points[np.newaxis]
+    degree = control_points.shape[1] - 1
+    if degree < 1:
+        raise ValueError("Bezier curves need at least 2 control points")
+    # The distance between a Bezier and a chord over an interval of h in t is
+    # bounded by degree * (degree - 1) / 8 * h^2 * the largest second difference
+    # of the control points
+    second_differences = np.diff(control_points, n=2, axis=1)
+    bound = (
+        np.hypot(*second_differences.transpose(2, 0, 1)).max(axis=1, initial=0)
+        * degree
+        * (degree - 1)
+        / 8
+    )
+    counts = np.maximum(np.ceil(np.sqrt(bound / tolerance)), 1).astype(np.intp)
+    _, t, is_first = _sample(counts)
+    # Convert each curve to a polynomial in t, then evaluate every point at once
+    to_power_basis = np.array(
+        [
+            [
+                math.comb(degree, j) * math.comb(j, i) * (-1) ** (j - i)
+                for i in range(degree + 1)
+            ]
+            for j in range(degree + 1)
+        ]
+    )
+    coefficients = np.repeat(
+        np.einsum("ji,nid->njd", to_power_basis, control_points), counts + 1, axis=0
+    )
+    t = t[:, np.newaxis]
+    xy = coefficients[:, degree]
+    for j in range(degree - 1, -1, -1):
+        xy = xy * t + coefficients[:, j]
+    return _polylines(xy, is_first)
+
+
+def catmull_rom(
+    points: np.ndarray,
+    closed: bool = False,
+    scale: float = 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> np.ndarray:
+    """A smooth spline through (M, 2) `points`, flattened to lines"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        raise ValueError("A spline needs at least 2 points")
+    if closed:
+        padded = np.vstack((points[-1], points, points[:2]))
+    else:
+        padded = np.vstack((points[0], points, points[-1]))
+    p0, p1, p2, p3 = (padded[i : len(padded) - 3 + i] for i in range(4))
+    control_points = np.stack((p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2), axis=1)
+    segments = beziers(control_points, scale, tolerance)
+    # Join the pieces into one path, keeping only the first jump
+    is_piece_start = segments["opcode"] == Opcode.JUMP
+    is_piece_start[0] = False
+    return segments[~is_piece_start]
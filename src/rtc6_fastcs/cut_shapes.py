@@ -9,9 +9,15 @@ await RTC.connect()
 
 # need to find the conversion of bits to distance. Then can do cylinder(length, width, passes)
 def cut_cylinder_200l_100w(passes: int):
-    shape = [(-100,100,False),(0,50,True),(200,50,True),(200,-50,True),(0,-50,True),(-100,-100,True)] * passes
-    RE(draw_polygon(RTC, shape)
+    shape = [(-100,100,False),(0,50,True),(200,50,True),(200,-50,True),(0,-50,True),(-100,-100,True)]
+    RE(draw_polygon(RTC, shape, passes))
+
+def cylinder_shape(width: int, length: int):
+    return [(-width,width,False),(0,(width/2),True),(length,(width/2),True),(length,(-width/2),True),(0,(-width/2),True),(-width,-width,True)]
 
 def cut_cylinder(width: int, length: int, passes: int):
-    shape = [(-width,width,False),(0,(width/2),True),(length,(width/2),True),(length,(-width/2),True),(0,(-width/2),True),(-width,-width,True)] * passes
-    RE(draw_polygon(RTC, shape))
+    RE(draw_polygon(RTC, cylinder_shape(width, length), passes))
+
+# sites are the (x, y) positions in um to cut a cylinder at, e.g. the wells of a plate
+def cut_cylinders(width: int, length: int, passes: int, sites: list[tuple[int, int]]):
+    RE(draw_step_and_repeat(RTC, cylinder_shape(width, length), sites, passes))
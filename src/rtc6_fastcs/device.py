@@ -1,4 +1,7 @@
-from ophyd_async.core import StandardReadable, AsyncStageable
+import asyncio
+
+import numpy as np
+from ophyd_async.core import Array1D, StandardReadable, AsyncStageable
 from bluesky.protocols import Triggerable
 from ophyd_async.epics.core import (
     epics_signal_rw,
@@ -6,7 +9,12 @@ from ophyd_async.epics.core import (
     epics_signal_x,
     epics_signal_w,
 )
-from ophyd_async.core import AsyncStatus
+from ophyd_async.core import AsyncStatus, wait_for_value
+
+from rtc6_fastcs.settings_profiles import SettingsProfile
+
+# Settings applied by staging, in one put
+STAGE_PROFILE = SettingsProfile(laser_mode="YAG5", laser_control=0)
 
 
 class Rtc6ControlSettings(StandardReadable):
@@ -22,6 +30,11 @@ class Rtc6ControlSettings(StandardReadable):
             self.jump_delay = epics_signal_rw(int, prefix + "JumpDelay")
             self.mark_delay = epics_signal_rw(int, prefix + "MarkDelay")
             self.polygon_delay = epics_signal_rw(int, prefix + "PolygonDelay")
+            self.last_profile = epics_signal_r(str, prefix + "LastProfile")
+        # A profile name or a JSON object of settings, see SettingsProfile
+        self.profile = epics_signal_w(str, prefix + "Profile")
+        self.profile_names = epics_signal_r(str, prefix + "ProfileNames")
+        self.settings_sent = epics_signal_r(int, prefix + "SettingsSent")
 
 
 class Rtc6Info(StandardReadable):
@@ -34,6 +47,88 @@ class Rtc6Info(StandardReadable):
             self.is_acquired = epics_signal_r(str, prefix + "IsAcquired")
 
 
+class Rtc6Transform(StandardReadable):
+    def __init__(self, prefix: str = "TRANSFORM:", name: str = "") -> None:
+        """The coordinate transform applied by the IOC, reloadable from a file"""
+        super().__init__(name)
+        with self.add_children_as_readables():
+            self.transform_file = epics_signal_rw(
+                str, prefix + "TransformFile_RBV", prefix + "TransformFile"
+            )
+            self.description = epics_signal_r(str, prefix + "Description")
+        self.reload = epics_signal_x(prefix + "Reload")
+
+
+class Rtc6Position(StandardReadable):
+    def __init__(self, prefix: str = "POSITION:", name: str = "") -> None:
+        """Immediate jumps, outside of a list"""
+        super().__init__(name)
+        with self.add_children_as_readables():
+            self.x = epics_signal_rw(int, prefix + "X_RBV", prefix + "X")
+            self.y = epics_signal_rw(int, prefix + "Y_RBV", prefix + "Y")
+        self.goto = epics_signal_x(prefix + "Goto")
+
+
+class Rtc6Capture(StandardReadable):
+    def __init__(self, prefix: str = "CAPTURE:", name: str = "") -> None:
+        """Scanner positions and laser state recorded while a list executes"""
+        super().__init__(name)
+        with self.add_children_as_readables():
+            self.capturing = epics_signal_r(bool, prefix + "Capturing")
+            self.samples = epics_signal_r(int, prefix + "Samples")
+            self.following_error_rms = epics_signal_r(
+                float, prefix + "FollowingErrorRms"
+            )
+            self.following_error_max = epics_signal_r(
+                float, prefix + "FollowingErrorMax"
+            )
+        self.period = epics_signal_rw(int, prefix + "Period_RBV", prefix + "Period")
+        self.actual_x = epics_signal_r(Array1D[np.float64], prefix + "ActualX")
+        self.actual_y = epics_signal_r(Array1D[np.float64], prefix + "ActualY")
+        self.target_x = epics_signal_r(Array1D[np.float64], prefix + "TargetX")
+        self.target_y = epics_signal_r(Array1D[np.float64], prefix + "TargetY")
+        self.laser_on = epics_signal_r(Array1D[np.float64], prefix + "LaserOn")
+        self.save_file = epics_signal_rw(
+            str, prefix + "SaveFile_RBV", prefix + "SaveFile"
+        )
+        self.arm = epics_signal_x(prefix + "Arm")
+        # stop is a bluesky verb, which ophyd-async won't let a signal shadow
+        self.stop_ = epics_signal_x(prefix + "Stop")
+        self.save = epics_signal_x(prefix + "Save")
+
+
+class Rtc6Connection(StandardReadable):
+    def __init__(self, prefix: str = "CONNECTION:", name: str = "") -> None:
+        """Health of the connection between the IOC and the eth box"""
+        super().__init__(name)
+        with self.add_children_as_readables():
+            self.state = epics_signal_r(str, prefix + "State")
+            self.latency = epics_signal_r(float, prefix + "Latency")
+            self.reconnects = epics_signal_r(int, prefix + "Reconnects")
+            self.last_error = epics_signal_r(str, prefix + "LastError")
+
+
+class Rtc6Diagnostics(StandardReadable):
+    def __init__(self, prefix: str = "DIAG:", name: str = "") -> None:
+        """Timing of bindings calls and IOC handlers"""
+        super().__init__(name)
+        with self.add_children_as_readables():
+            self.bindings_calls = epics_signal_r(int, prefix + "BindingsCalls")
+            self.bindings_time = epics_signal_r(float, prefix + "BindingsTime")
+            self.bindings_histogram = epics_signal_r(
+                Array1D[np.float64], prefix + "BindingsHistogram"
+            )
+            self.handler_calls = epics_signal_r(int, prefix + "HandlerCalls")
+            self.handler_time = epics_signal_r(float, prefix + "HandlerTime")
+            self.slowest_call = epics_signal_r(str, prefix + "SlowestCall")
+            self.slowest_call_p99 = epics_signal_r(float, prefix + "SlowestCallP99")
+        self.dump_file = epics_signal_rw(
+            str, prefix + "DumpFile_RBV", prefix + "DumpFile"
+        )
+        self.dump = epics_signal_x(prefix + "Dump")
+        self.reset = epics_signal_x(prefix + "Reset")
+
+
 class Rtc6List(StandardReadable):
     class AddArc(StandardReadable):
         def __init__(self, prefix: str = "ADDARC:", name: str = "") -> None:
@@ -63,15 +158,99 @@ class Rtc6List(StandardReadable):
                 self.y = epics_signal_w(int, prefix + "Y")
                 self.proc = epics_signal_x(prefix + "Proc")
 
+    class AddPolygon(StandardReadable):
+        def __init__(self, prefix: str = "ADDPOLYGON:", name: str = "") -> None:
+            """Used to load a whole shape with one write of each waveform, with
+            opcodes from `rtc6_fastcs.segments.Opcode`"""
+            super().__init__(name)
+            with self.add_children_as_readables():
+                self.x = epics_signal_w(Array1D[np.float64], prefix + "X")
+                self.y = epics_signal_w(Array1D[np.float64], prefix + "Y")
+                self.opcode = epics_signal_w(Array1D[np.float64], prefix + "Opcode")
+                self.angle_deg = epics_signal_w(Array1D[np.float64], prefix + "Angle")
+                self.passes = epics_signal_w(int, prefix + "Passes")
+                self.proc = epics_signal_x(prefix + "Proc")
+                self.append = epics_signal_x(prefix + "Append")
+
+    class StepAndRepeat(StandardReadable):
+        def __init__(self, prefix: str = "STEPREPEAT:", name: str = "") -> None:
+            """Used to draw one shape, written as for `AddPolygon`, at many sites,
+            with the shape loaded into the card only once"""
+            super().__init__(name)
+            with self.add_children_as_readables():
+                self.x = epics_signal_w(Array1D[np.float64], prefix + "X")
+                self.y = epics_signal_w(Array1D[np.float64], prefix + "Y")
+                self.opcode = epics_signal_w(Array1D[np.float64], prefix + "Opcode")
+                self.angle_deg = epics_signal_w(Array1D[np.float64], prefix + "Angle")
+                self.passes = epics_signal_w(int, prefix + "Passes")
+                self.site_x = epics_signal_w(Array1D[np.float64], prefix + "SiteX")
+                self.site_y = epics_signal_w(Array1D[np.float64], prefix + "SiteY")
+                self.shape_loaded = epics_signal_r(bool, prefix + "ShapeLoaded")
+                self.proc = epics_signal_x(prefix + "Proc")
+
     def __init__(self, prefix: str = "LIST:", name: str = "") -> None:
         super().__init__(name)
         with self.add_children_as_readables():
             self.add_arc = self.AddArc(prefix + "ADDARC:")
             self.add_line = self.AddLine(prefix + "ADDLINE:")
             self.add_jump = self.AddJump(prefix + "ADDJUMP:")
+            self.add_polygon = self.AddPolygon(prefix + "ADDPOLYGON:")
+            self.step_and_repeat = self.StepAndRepeat(prefix + "STEPREPEAT:")
             self.init_list = epics_signal_x(prefix + "InitList")
             self.end_list = epics_signal_x(prefix + "EndList")
             self.execute_list = epics_signal_x(prefix + "ExecuteList")
+            self.list_status = epics_signal_r(str, prefix + "ListStatus")
+            self.busy = epics_signal_r(bool, prefix + "Busy")
+            self.estimated_time = epics_signal_r(float, prefix + "EstimatedTime")
+            self.input_pointer = epics_signal_r(int, prefix + "ListPointerPosition")
+            self.output_position = epics_signal_r(int, prefix + "OutputPosition")
+            self.stream_chunk_size = epics_signal_rw(
+                int, prefix + "StreamChunkSize_RBV", prefix + "StreamChunkSize"
+            )
+            self.stream_pending_segments = epics_signal_r(
+                int, prefix + "StreamPendingSegments"
+            )
+            self.stream_chunks_loaded = epics_signal_r(
+                int, prefix + "StreamChunksLoaded"
+            )
+            self.stream_chunks_total = epics_signal_r(int, prefix + "StreamChunksTotal")
+            self.streaming = epics_signal_r(bool, prefix + "Streaming")
+            self.stream_estimated_time = epics_signal_r(
+                float, prefix + "StreamEstimatedTime"
+            )
+            self.stream_list = epics_signal_x(prefix + "StreamList")
+            self.clear_stream = epics_signal_x(prefix + "ClearStream")
+            self.job_file = epics_signal_rw(
+                str, prefix + "JobFile_RBV", prefix + "JobFile"
+            )
+            self.job_segments = epics_signal_r(int, prefix + "JobSegments")
+            self.job_description = epics_signal_r(str, prefix + "JobDescription")
+            self.load_job = epics_signal_x(prefix + "LoadJob")
+            self.queue_job_file = epics_signal_rw(
+                str, prefix + "QueueJobFile_RBV", prefix + "QueueJobFile"
+            )
+            self.queue_job_id = epics_signal_rw(
+                str, prefix + "QueueJobId_RBV", prefix + "QueueJobId"
+            )
+            self.queue_job_priority = epics_signal_rw(
+                int, prefix + "QueueJobPriority_RBV", prefix + "QueueJobPriority"
+            )
+            self.queue_depth = epics_signal_r(int, prefix + "QueueDepth")
+            self.queued_job_ids = epics_signal_r(str, prefix + "QueuedJobIds")
+            self.queue_running = epics_signal_r(bool, prefix + "QueueRunning")
+            self.current_job_id = epics_signal_r(str, prefix + "CurrentJobId")
+            self.jobs_completed = epics_signal_r(int, prefix + "JobsCompleted")
+            self.last_job_id = epics_signal_r(str, prefix + "LastJobId")
+            self.last_job_wait_time = epics_signal_r(float, prefix + "LastJobWaitTime")
+            self.last_job_upload_time = epics_signal_r(
+                float, prefix + "LastJobUploadTime"
+            )
+            self.last_job_execution_time = epics_signal_r(
+                float, prefix + "LastJobExecutionTime"
+            )
+            self.submit_job = epics_signal_x(prefix + "SubmitJob")
+            self.cancel_job = epics_signal_x(prefix + "CancelJob")
+            self.clear_queue = epics_signal_x(prefix + "ClearQueue")
 
 
 class Rtc6Eth(StandardReadable, AsyncStageable, Triggerable):
@@ -81,25 +260,39 @@ class Rtc6Eth(StandardReadable, AsyncStageable, Triggerable):
             self.info = Rtc6Info(prefix + "INFO:")
             self.control_settings = Rtc6ControlSettings(prefix + "CONTROL:")
             self.list = Rtc6List(prefix + "LIST:")
+            self.transform = Rtc6Transform(prefix + "TRANSFORM:")
+            self.position = Rtc6Position(prefix + "POSITION:")
+        self.diag = Rtc6Diagnostics(prefix + "DIAG:")
+        self.connection = Rtc6Connection(prefix + "CONNECTION:")
+        self.capture = Rtc6Capture(prefix + "CAPTURE:")
 
     @AsyncStatus.wrap
     async def stage(self):
-        """Set things up to start writing list commands"""
-        await self.control_settings.laser_mode.set("YAG5")
-        await self.control_settings.laser_control.set(0)
-        await self.list.init_list.trigger()
+        """Set things up to start writing list commands. The IOC only sends the
+        settings and list configuration to the card if they have changed, so this is
+        cheap to repeat."""
+        await asyncio.gather(
+            self.control_settings.profile.set(STAGE_PROFILE.to_json()),
+            self.list.init_list.trigger(),
+        )
 
     @AsyncStatus.wrap
     async def trigger(self):
+        """Execute the list and wait for it to finish"""
+        await self.kickoff()
+        await self.complete()
+
+    @AsyncStatus.wrap
+    async def kickoff(self):
         """Set the end of the list at the current position and set it to execute"""
         await self.list.end_list.trigger()
         await self.list.execute_list.trigger()
 
     @AsyncStatus.wrap
     async def complete(self):
-        """Wait for the current list execution to complete"""
-        # Todo add a signal for this with get_status
-        # and change trigger to kickoff
+        """Wait for the current list execution to complete. The IOC reports busy as
+        soon as the list is executed, so this resolves on the transition to idle"""
+        await wait_for_value(self.list.busy, False, timeout=None)
 
     @AsyncStatus.wrap
     async def unstage(self): ...
@@ -0,0 +1,146 @@
+"""Timing of bindings calls and IOC handlers, published under DIAG:
+
+Every call made through `RtcConnection.call` and every decorated handler is timed.
+Per name, the count, total time and a histogram are kept since the last reset, and
+the most recent latencies are kept in a fixed-size ring buffer for percentiles, so
+memory use doesn't grow however long the IOC runs.
+"""
+
+import json
+import logging
+import time
+from bisect import bisect_right
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, ParamSpec, TypeVar
+
+import numpy as np
+
+RING_SIZE = 1024
+# Histogram bucket upper edges in seconds; the last bucket is everything slower
+HISTOGRAM_EDGES = [1e-6 * 10 ** (i / 2) for i in range(13)]  # 1 us to 1 s
+HISTOGRAM_BUCKETS = len(HISTOGRAM_EDGES) + 1
+# Log one in this many of each sampled event
+LOG_SAMPLE_EVERY = 100
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class LatencyStats:
+    """Count, total and histogram of latencies, plus a ring buffer of recent ones"""
+
+    def __init__(self, ring_size: int = RING_SIZE) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self._recent = np.zeros(ring_size)
+
+    def record(self, seconds: float) -> None:
+        self._recent[self.count % len(self._recent)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.histogram[bisect_right(HISTOGRAM_EDGES, seconds)] += 1
+
+    @property
+    def recent(self) -> np.ndarray:
+        """The most recent latencies, up to the ring size, in no particular order"""
+        return self._recent[: min(self.count, len(self._recent))]
+
+    def percentile(self, q: float) -> float:
+        recent = self.recent
+        return float(np.percentile(recent, q)) if len(recent) else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "histogram": self.histogram,
+        }
+
+
+class Diagnostics:
+    """Latency statistics for each named call or handler"""
+
+    def __init__(self) -> None:
+        self.stats: dict[str, LatencyStats] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        if (stats := self.stats.get(name)) is None:
+            stats = self.stats[name] = LatencyStats()
+        stats.record(seconds)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def matching(self, prefix: str) -> list[LatencyStats]:
+        return [stats for name, stats in self.stats.items() if name.startswith(prefix)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "histogram_edges": HISTOGRAM_EDGES,
+            "stats": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def timed_handler(
+    fn: Callable[P, Awaitable[T]],
+) -> Callable[P, Awaitable[T]]:
+    """Time a method of a `ConnectedSubController` as handler:<Class>.<method>"""
+    name = f"handler:{fn.__qualname__}"
+
+    @wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        with args[0].timed(name):  # type: ignore
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+class SampledLogger:
+    """Log the first and then one in every `every` occurrences of each event, with
+    the event name, occurrence count and fields in the record's `extra`"""
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_SAMPLE_EVERY) -> None:
+        self.logger = logger
+        self.every = every
+        self._counts: dict[str, int] = {}
+
+    def log(self, level: int, event: str, **fields: Any) -> None:
+        count = self._counts.get(event, 0)
+        self._counts[event] = count + 1
+        if count % self.every or not self.logger.isEnabledFor(level):
+            return
+        message = " ".join(
+            [event, *(f"{key}={value}" for key, value in fields.items())]
+        )
+        self.logger.log(
+            level,
+            f"{message} (occurrence {count + 1})",
+            extra={"event": event, "occurrence": count + 1, **fields},
+        )
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.log(logging.INFO, event, **fields)
@@ -0,0 +1,78 @@
+"""Estimates of how long the RTC6 will take to execute a segment array
+
+The model is the one the simulated card uses: each segment takes its length over the
+jump or mark speed, plus the delay which follows it. It ignores acceleration of the
+scanners, so it is a good estimate for long jobs rather than an exact one.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from rtc6_fastcs.segments import Opcode, segment_ends
+
+DEFAULT_JUMP_SPEED = 1000.0  # bits/ms
+DEFAULT_MARK_SPEED = 250.0  # bits/ms
+DELAY_UNIT = 1e-5  # scanner delays are set in 10us increments
+
+
+@dataclass
+class ControlSettings:
+    """The settings which affect execution time, as set on the card"""
+
+    jump_speed: float = DEFAULT_JUMP_SPEED  # bits/ms
+    mark_speed: float = DEFAULT_MARK_SPEED  # bits/ms
+    jump_delay: int = 0  # 10us
+    mark_delay: int = 0  # 10us
+    polygon_delay: int = 0  # 10us
+
+
+def segment_times(
+    segments: np.ndarray,
+    settings: ControlSettings,
+    start: tuple[float, float] = (0, 0),
+) -> tuple[np.ndarray, tuple[float, float]]:
+    """Time in seconds to execute each segment, starting from `start`, and the
+    position at the end"""
+    if not len(segments):
+        return np.zeros(0), start
+    x = segments["x"].astype(np.float64)
+    y = segments["y"].astype(np.float64)
+    opcode = segments["opcode"]
+    is_arc = opcode == Opcode.ARC
+    ends = segment_ends(segments, start)
+    starts = np.vstack(([start], ends[:-1]))
+    length = np.where(
+        is_arc,
+        np.hypot(starts[:, 0] - x, starts[:, 1] - y)
+        * np.abs(np.deg2rad(segments["angle"])),
+        np.hypot(*(ends - starts).T),
+    )
+    end = (float(ends[-1, 0]), float(ends[-1, 1]))
+    is_jump = opcode == Opcode.JUMP
+    speed = np.where(is_jump, settings.jump_speed, settings.mark_speed)
+    seconds = length / speed / 1000
+    # Marks are followed by the polygon delay if another mark follows, or the
+    # mark delay at the end of a run of marks
+    next_is_mark = np.concatenate((~is_jump[1:], [False]))
+    delay = np.where(
+        is_jump,
+        settings.jump_delay,
+        np.where(next_is_mark, settings.polygon_delay, settings.mark_delay),
+    )
+    return seconds + delay * DELAY_UNIT, end
+
+
+def estimate_time(
+    segments: np.ndarray,
+    settings: ControlSettings,
+    start: tuple[float, float] = (0, 0),
+    passes: int = 1,
+) -> float:
+    """Total time in seconds to execute a segment array `passes` times"""
+    times, end = segment_times(segments, settings, start)
+    if passes > 1:
+        # Later passes start from where the first one ended
+        repeat_times, _ = segment_times(segments, settings, end)
+        return float(times.sum() + repeat_times.sum() * (passes - 1))
+    return float(times.sum())
@@ -0,0 +1,148 @@
+"""Compiled jobs on disk, so they can be prepared offline and loaded with np.memmap
+
+A job file is the magic bytes, a little-endian uint32 header length, a JSON header,
+then the segments (see `rtc6_fastcs.segments`) in RTC6 bits, with any coordinate
+transform already applied. The header is padded so the segments are aligned, and
+the body can be mapped straight into memory and streamed without reading it all.
+"""
+
+import json
+import struct
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from rtc6_fastcs.coordinates import CoordinateTransform
+from rtc6_fastcs.segments import SEGMENT_DTYPE
+from rtc6_fastcs.settings_profiles import SettingsProfile
+
+MAGIC = b"RTC6JOB\x00"
+FORMAT_VERSION = 1
+HEADER_ALIGNMENT = 64
+FILE_DTYPE = SEGMENT_DTYPE.newbyteorder("<")
+
+
+def _describe(dtype: np.dtype) -> dict:
+    assert dtype.fields is not None
+    return {
+        "names": list(dtype.names or ()),
+        "formats": [dtype.fields[name][0].str for name in dtype.names or ()],
+        "offsets": [dtype.fields[name][1] for name in dtype.names or ()],
+        "itemsize": dtype.itemsize,
+    }
+
+
+@dataclass
+class JobHeader:
+    segment_count: int
+    # How the job was compiled, for reference; the segments are always in bits
+    bits_per_um: float | None = None
+    transform: list[list[float]] | None = None
+    # CoordinateTransform.key of the transform applied, which includes any grid
+    transform_key: str | None = None
+    # Speeds and delays to set before running the job, leaving the rest as they are
+    settings: SettingsProfile | None = None
+    description: str = ""
+    version: int = FORMAT_VERSION
+    dtype: dict = field(default_factory=lambda: _describe(FILE_DTYPE))
+
+    def to_json(self) -> bytes:
+        fields = asdict(self)
+        if self.settings is not None:
+            fields["settings"] = self.settings.to_dict()
+        return json.dumps(fields).encode()
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "JobHeader":
+        fields = json.loads(data)
+        if fields.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported job file version {fields.get('version')}")
+        if fields["settings"] is not None:
+            fields["settings"] = SettingsProfile.from_dict(fields["settings"])
+        if np.dtype(fields["dtype"]) != FILE_DTYPE:
+            raise ValueError(f"Job file has unexpected segment dtype {fields['dtype']}")
+        return cls(**fields)
+
+
+@dataclass
+class Job:
+    header: JobHeader
+    segments: np.ndarray  # read-only, memory mapped when loaded from a file
+
+
+def _body_offset(header_length: int) -> int:
+    unpadded = len(MAGIC) + 4 + header_length
+    return -(-unpadded // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+
+
+def write_job(
+    path: str | Path,
+    segments: np.ndarray,
+    settings: SettingsProfile | None = None,
+    bits_per_um: float | None = None,
+    transform: "np.ndarray | CoordinateTransform | None" = None,
+    description: str = "",
+) -> JobHeader:
+    """Write a segment array in bits, and how it was made, to a job file"""
+    if transform is not None and not isinstance(transform, CoordinateTransform):
+        transform = CoordinateTransform(transform)
+    header = JobHeader(
+        segment_count=len(segments),
+        bits_per_um=bits_per_um,
+        transform=None if transform is None else transform.affine.tolist(),
+        transform_key=None if transform is None else transform.key.hex(),
+        settings=settings,
+        description=description,
+    )
+    header_json = header.to_json()
+    offset = _body_offset(len(header_json))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_json)))
+        f.write(header_json.ljust(offset - len(MAGIC) - 4, b" "))
+        body = np.asarray(segments, dtype=SEGMENT_DTYPE)
+        body.astype(FILE_DTYPE, copy=False).tofile(f)
+    return header
+
+
+def read_job(path: str | Path) -> Job:
+    """Open a job file, mapping the segments into memory rather than reading them"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an RTC6 job file")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = JobHeader.from_json(f.read(header_length))
+    offset = _body_offset(header_length)
+    expected_size = offset + header.segment_count * SEGMENT_DTYPE.itemsize
+    if Path(path).stat().st_size != expected_size:
+        raise ValueError(
+            f"{path} should be {expected_size} bytes for {header.segment_count} "
+            "segments, the file may be truncated"
+        )
+    if not header.segment_count:
+        return Job(header, np.zeros(0, dtype=SEGMENT_DTYPE))
+    segments = np.memmap(
+        path,
+        dtype=FILE_DTYPE,
+        mode="r",
+        offset=offset,
+        shape=(header.segment_count,),
+    )
+    return Job(header, segments)
+
+
+def check_transform(header: JobHeader, transform: CoordinateTransform) -> None:
+    """Raise ValueError unless a job was compiled with `transform`, as its segments
+    are sent to the card as they are"""
+    if header.transform_key is not None:
+        key = bytes.fromhex(header.transform_key)
+    else:
+        # Compiled without a transform, or before the key was recorded
+        affine = np.eye(2) if header.transform is None else header.transform
+        key = CoordinateTransform(np.asarray(affine)).key
+    if key != transform.key:
+        raise ValueError(
+            "The job was compiled with a different coordinate transform to the "
+            f"IOC's {transform.describe()} one, compile it again with --transform"
+        )
@@ -0,0 +1,72 @@
+"""Jobs waiting to be run by the IOC, one after another without the card going idle
+
+Clients submit job files (see `rtc6_fastcs.job_file`) with an ID and a priority.
+Higher priorities run first, and jobs of the same priority run in the order they
+were submitted.
+"""
+
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class QueuedJob:
+    job_id: str
+    path: str
+    priority: int = 0
+    submitted: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class JobTiming:
+    """How long a job spent at each stage, in seconds"""
+
+    job_id: str
+    waited: float = 0.0  # from being submitted until its upload started
+    upload: float = 0.0  # loading its segments, not waiting for a list to be free
+    execution: float = 0.0  # from its first list starting until the card moved on
+    started: float | None = None  # time.monotonic() its first list started
+
+
+class JobQueue:
+    def __init__(self) -> None:
+        self._heap: list[tuple[int, int, QueuedJob]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, job_id: str) -> bool:
+        return any(job.job_id == job_id for *_, job in self._heap)
+
+    def submit(self, job: QueuedJob) -> None:
+        if not job.job_id:
+            raise ValueError("A job needs an ID")
+        if job.job_id in self:
+            raise ValueError(f"Job {job.job_id} is already queued")
+        heapq.heappush(self._heap, (-job.priority, next(self._order), job))
+
+    def pop(self) -> QueuedJob | None:
+        """Take the job to run next, or None if there aren't any"""
+        if not self._heap:
+            return None
+        *_, job = heapq.heappop(self._heap)
+        return job
+
+    def remove(self, job_id: str) -> bool:
+        """Take a job out of the queue, returning whether it was there"""
+        remaining = [entry for entry in self._heap if entry[2].job_id != job_id]
+        if len(remaining) == len(self._heap):
+            return False
+        heapq.heapify(remaining)
+        self._heap = remaining
+        return True
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+    def job_ids(self) -> list[str]:
+        """IDs of the queued jobs, in the order they will run"""
+        return [job.job_id for *_, job in sorted(self._heap)]
@@ -1,15 +1,31 @@
+import logging
 from typing import Generator
+
+import numpy as np
 import bluesky.plan_stubs as bps
 import bluesky.preprocessors as bpp
 from rtc6_fastcs.device import Rtc6Eth
+from rtc6_fastcs.estimation import DEFAULT_JUMP_SPEED, ControlSettings, estimate_time
+from rtc6_fastcs.hatching import hatch
+from rtc6_fastcs.segments import ArcInput, JumpOrLineInput
+from rtc6_fastcs.path_optimisation import optimise_path
+from rtc6_fastcs.settings_profiles import SettingsProfile
+from rtc6_fastcs.shape_cache import ShapeCache, cache_key, compile_shape
 from blueapi.core import MsgGenerator
 from dodal.common.beamlines.beamline_utils import device_factory
 from bluesky.run_engine import call_in_bluesky_event_loop
 
+BITS_PER_UM = 33  # estimated
+MAX_POLYGON_LENGTH = 10000  # length of the ADDPOLYGON waveforms on the IOC
+# Repeated shapes, e.g. from cut_shapes, are only converted to bits once
+SHAPE_CACHE = ShapeCache()
+
+LOGGER = logging.getLogger(__name__)
+
+
 def convert_um_to_bits(um_in: int) -> int:
     """RTC operates in bits. Convert um to bits for drawing"""
-    bits_per_um = 33 # estimated
-    return int(um_in * bits_per_um)
+    return int(um_in * BITS_PER_UM)
 
 def line(rtc6: Rtc6Eth, x: int, y: int):
     """add an instruction to draw a line to x, y"""
@@ -39,6 +55,200 @@ def arc(rtc6: Rtc6Eth, x: int, y: int, angle_deg: float):
     yield from bps.trigger(rtc6.list.add_arc.proc, wait=True)
 
 
+def _compile_optimised(points: list[JumpOrLineInput | ArcInput]):
+    segments = compile_shape(points, BITS_PER_UM)
+    optimised = optimise_path(segments)
+    saved_um = (
+        optimised.jump_length_before - optimised.jump_length_after
+    ) / BITS_PER_UM
+    LOGGER.info(
+        f"Path optimisation shortened jumps by {saved_um:.0f} um, saving an "
+        f"estimated {optimised.time_saved(DEFAULT_JUMP_SPEED) * 1000:.1f} ms per pass "
+        "at the default jump speed"
+    )
+    return optimised.segments
+
+
+def _write_polygon(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    passes: int,
+    optimise: bool = False,
+):
+    if optimise:
+        # The card's jump speed can't be read back, so the time saved is only
+        # estimated at the default
+        segments = SHAPE_CACHE.get_or_compile(
+            cache_key(repr(points), BITS_PER_UM, "optimised"),
+            lambda: _compile_optimised(points),
+        )
+    else:
+        segments = SHAPE_CACHE.compile_shape(points, BITS_PER_UM)
+    yield from _write_segments(rtc6, segments, passes)
+
+
+def _write_segments(rtc6: Rtc6Eth, segments: np.ndarray, passes: int):
+    yield from bps.abs_set(rtc6.list.add_polygon.passes, passes, wait=True)
+    yield from bps.abs_set(rtc6.list.add_polygon.x, segments["x"], wait=True)
+    yield from bps.abs_set(rtc6.list.add_polygon.y, segments["y"], wait=True)
+    yield from bps.abs_set(rtc6.list.add_polygon.opcode, segments["opcode"], wait=True)
+    yield from bps.abs_set(
+        rtc6.list.add_polygon.angle_deg, segments["angle"], wait=True
+    )
+
+
+def polygon(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    passes: int = 1,
+    optimise: bool = False,
+):
+    """add instructions for a whole shape of jumps, lines and arcs in one upload,
+    which the RTC6 repeats `passes` times. With `optimise`, the separate contours
+    (each starting with a jump) are reordered to minimise jumping between them"""
+    yield from _write_polygon(rtc6, points, passes, optimise)
+    yield from bps.trigger(rtc6.list.add_polygon.proc, wait=True)
+
+
+def polygon_segments(rtc6: Rtc6Eth, segments: np.ndarray, passes: int = 1):
+    """add a segment array already in bits, e.g. from `rtc6_fastcs.curves`, in one
+    upload, which the RTC6 repeats `passes` times"""
+    yield from _write_segments(rtc6, segments, passes)
+    yield from bps.trigger(rtc6.list.add_polygon.proc, wait=True)
+
+
+def append_polygon(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    passes: int = 1,
+    optimise: bool = False,
+):
+    """queue a whole shape on the IOC, to be sent by `stream_list`"""
+    yield from _write_polygon(rtc6, points, passes, optimise)
+    yield from bps.trigger(rtc6.list.add_polygon.append, wait=True)
+
+
+def step_and_repeat(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    sites: list[tuple[int, int]],
+    passes: int = 1,
+):
+    """add instructions to draw a shape with its origin at each of `sites`, all in
+    um. The shape is loaded into the RTC6 once, and each site only adds an offset
+    and a call of it to the list"""
+    segments = SHAPE_CACHE.compile_shape(
+        [(*points[0][:2], False), *points[1:]], BITS_PER_UM
+    )
+    site_bits = np.trunc(np.array(sites, dtype=np.float64).reshape(-1, 2) * BITS_PER_UM)
+    device = rtc6.list.step_and_repeat
+    yield from bps.abs_set(device.passes, passes, wait=True)
+    yield from bps.abs_set(device.x, segments["x"], wait=True)
+    yield from bps.abs_set(device.y, segments["y"], wait=True)
+    yield from bps.abs_set(device.opcode, segments["opcode"], wait=True)
+    yield from bps.abs_set(device.angle_deg, segments["angle"], wait=True)
+    yield from bps.abs_set(device.site_x, site_bits[:, 0].astype(np.int32), wait=True)
+    yield from bps.abs_set(device.site_y, site_bits[:, 1].astype(np.int32), wait=True)
+    yield from bps.trigger(device.proc, wait=True)
+
+
+def estimate_polygon_time(
+    points: list[JumpOrLineInput | ArcInput],
+    settings: ControlSettings | None = None,
+    passes: int = 1,
+) -> float:
+    """estimated time in seconds for the RTC6 to draw a shape, at the given speeds
+    and delays (by default the card's defaults), without needing the IOC"""
+    segments = SHAPE_CACHE.compile_shape(points, BITS_PER_UM)
+    return estimate_time(segments, settings or ControlSettings(), passes=passes)
+
+
+def read_estimated_time(rtc6: Rtc6Eth):
+    """the IOC's estimate of how long the list loaded since staging will take, using
+    the speeds and delays it last set"""
+    return (yield from bps.rd(rtc6.list.estimated_time))
+
+
+def append_segments(rtc6: Rtc6Eth, segments: np.ndarray):
+    """queue a segment array already in bits on the IOC, to be sent by
+    `stream_list`. Arrays longer than one upload are queued in pieces."""
+    for start in range(0, len(segments), MAX_POLYGON_LENGTH):
+        yield from _write_segments(
+            rtc6, segments[start : start + MAX_POLYGON_LENGTH], 1
+        )
+        yield from bps.trigger(rtc6.list.add_polygon.append, wait=True)
+
+
+def append_hatch(
+    rtc6: Rtc6Eth, rings: list[np.ndarray], pitch: float, angle_deg: float = 0
+):
+    """queue lines filling the region inside `rings` of (x, y) vertices in um, with
+    holes, at `pitch` um apart, to be sent by `stream_list`"""
+    yield from append_segments(rtc6, hatch(rings, pitch, angle_deg, scale=BITS_PER_UM))
+
+
+def load_job(rtc6: Rtc6Eth, job_file: str):
+    """queue a job file made with `rtc6-fastcs compile-job`, to be sent by
+    `stream_list`. The path is opened by the IOC."""
+    yield from bps.abs_set(rtc6.list.job_file, job_file, wait=True)
+    yield from bps.trigger(rtc6.list.load_job, wait=True)
+
+
+def submit_job(rtc6: Rtc6Eth, job_file: str, job_id: str, priority: int = 0):
+    """add a job file made with `rtc6-fastcs compile-job` to the IOC's queue. Queued
+    jobs run back to back, highest priority first, each loaded while the one before
+    executes. The path is opened by the IOC."""
+    yield from bps.abs_set(rtc6.list.queue_job_file, job_file, wait=True)
+    yield from bps.abs_set(rtc6.list.queue_job_id, job_id, wait=True)
+    yield from bps.abs_set(rtc6.list.queue_job_priority, priority, wait=True)
+    yield from bps.trigger(rtc6.list.submit_job, wait=True)
+
+
+def cancel_job(rtc6: Rtc6Eth, job_id: str):
+    """take a job out of the IOC's queue, if it hasn't started loading yet"""
+    yield from bps.abs_set(rtc6.list.queue_job_id, job_id, wait=True)
+    yield from bps.trigger(rtc6.list.cancel_job, wait=True)
+
+
+def stream_list(rtc6: Rtc6Eth):
+    """send everything queued by `append_polygon`, alternating between both lists"""
+    yield from bps.trigger(rtc6.list.stream_list, wait=True)
+
+
+def apply_profile(rtc6: Rtc6Eth, profile: str | SettingsProfile):
+    """apply a named settings profile from the IOC's profiles file, or the settings
+    given, in one put. Only the values which have changed are sent to the card."""
+    if isinstance(profile, SettingsProfile):
+        profile = profile.to_json()
+    yield from bps.abs_set(rtc6.control_settings.profile, profile, wait=True)
+
+
+def goto(rtc6: Rtc6Eth, x: int, y: int):
+    """jump straight to x, y, without building a list. Fails if a list is running."""
+    yield from bps.abs_set(rtc6.position.x, convert_um_to_bits(x), wait=True)
+    yield from bps.abs_set(rtc6.position.y, convert_um_to_bits(y), wait=True)
+    yield from bps.trigger(rtc6.position.goto, wait=True)
+
+
+def arm_capture(rtc6: Rtc6Eth, period_10us: int = 10):
+    """record scanner positions and laser state every period from this point in the
+    list, to be read from the CAPTURE waveforms once it has executed"""
+    yield from bps.abs_set(rtc6.capture.period, period_10us, wait=True)
+    yield from bps.trigger(rtc6.capture.arm, wait=True)
+
+
+def stop_capture(rtc6: Rtc6Eth):
+    """stop recording at this point in the list"""
+    yield from bps.trigger(rtc6.capture.stop_, wait=True)
+
+
+def save_capture(rtc6: Rtc6Eth, path: str):
+    """save the last capture on the IOC, to a .npz file which can be read with
+    `rtc6_fastcs.capture.load_capture`"""
+    yield from bps.abs_set(rtc6.capture.save_file, path, wait=True)
+    yield from bps.trigger(rtc6.capture.save, wait=True)
+
+
 def rectangle(rtc6: Rtc6Eth, x: int, y: int, origin: tuple[int, int] = (0, 0)):
     """add instructions to draw a rectangle with dimensions x, y and lower left corner at origin"""
     yield from jump(rtc6, *origin)
@@ -55,48 +265,50 @@ def draw_square(rtc6: Rtc6Eth, size: int):
     yield from bps.trigger(rtc6)
 
 
-JumpOrLineInput = tuple[int, int, bool]  # x, y, laser_on
-ArcInput = tuple[int, int, float]
+@bpp.run_decorator()
+def draw_polygon(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput],
+    passes: int = 1,
+    optimise: bool = False,
+):
+    yield from bps.stage(rtc6)
+    # always start with a jump to the first point
+    yield from polygon(rtc6, [(*points[0][:2], False), *points[1:]], passes, optimise)
+    yield from bps.trigger(rtc6)
 
 
 @bpp.run_decorator()
-def draw_polygon(rtc6: Rtc6Eth, points: list[JumpOrLineInput]):
+def draw_polygon_with_arcs(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    passes: int = 1,
+    optimise: bool = False,
+):
     yield from bps.stage(rtc6)
-    yield from jump(rtc6, *points[0][:-1])
-    for point in points[1:]:
-        if point[2]:
-            yield from line(rtc6, *point[:-1])
-        else:
-            yield from jump(rtc6, *point[:-1])
+    yield from polygon(rtc6, [(*points[0][:2], False), *points[1:]], passes, optimise)
     yield from bps.trigger(rtc6)
 
 
 @bpp.run_decorator()
-def draw_polygon_with_arcs(rtc6: Rtc6Eth, points: list[JumpOrLineInput | ArcInput]):
+def draw_step_and_repeat(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput | ArcInput],
+    sites: list[tuple[int, int]],
+    passes: int = 1,
+):
     yield from bps.stage(rtc6)
-    yield from jump(rtc6, *points[0][:-1])
-    for point in points[1:]:
-        if isinstance(point[2], bool):
-            if point[2]:
-                yield from line(rtc6, *point[:-1])
-            else:
-                yield from jump(rtc6, *point[:-1])
-        else:
-            yield from arc(rtc6, *point)
+    yield from step_and_repeat(rtc6, points, sites, passes)
     yield from bps.trigger(rtc6)
 
 
 @bpp.run_decorator()
 def go_to_home(rtc6: Rtc6Eth):
-    yield from bps.stage(rtc6)
-    yield from jump(rtc6, 0, 0)
-    yield from bps.trigger(rtc6)
+    yield from goto(rtc6, 0, 0)
 
 @bpp.run_decorator()
 def go_to_x_y(rtc6: Rtc6Eth, x: int, y: int):
-    yield from bps.stage(rtc6)
-    yield from jump(rtc6, x, y)
-    yield from bps.trigger(rtc6)
+    yield from goto(rtc6, x, y)
 
 # For BlueAPI
 
@@ -0,0 +1,103 @@
+"""Packed arrays of list segments, so that whole shapes can be sent to the RTC6 at once
+
+A segment array is a 1D numpy structured array with `SEGMENT_DTYPE`, one entry per
+list command. The layout matches the C struct used by the bindings.
+"""
+
+from collections.abc import Sequence
+from enum import IntEnum
+
+import numpy as np
+
+JumpOrLineInput = tuple[int, int, bool]  # x, y, laser_on
+ArcInput = tuple[int, int, float]  # x, y, angle_deg
+
+
+class Opcode(IntEnum):
+    JUMP = 0  # jump_abs
+    LINE = 1  # mark_abs
+    ARC = 2  # arc_abs
+
+
+SEGMENT_DTYPE = np.dtype(
+    [
+        ("opcode", np.int32),
+        ("x", np.int32),
+        ("y", np.int32),
+        ("angle", np.float64),
+    ],
+    align=True,
+)
+
+
+def make_segments(
+    x: np.ndarray,
+    y: np.ndarray,
+    opcode: np.ndarray,
+    angle: np.ndarray | None = None,
+) -> np.ndarray:
+    """Pack separate x, y, opcode (and optionally angle) arrays into a segment array"""
+    x, y, opcode = np.asarray(x), np.asarray(y), np.asarray(opcode)
+    if not len(x) == len(y) == len(opcode):
+        raise ValueError(
+            f"Segment arrays must all be the same length, got x: {len(x)}, "
+            f"y: {len(y)}, opcode: {len(opcode)}"
+        )
+    if angle is not None and len(angle) != len(x):
+        raise ValueError(
+            f"Angle array has length {len(angle)} but there are {len(x)} segments"
+        )
+    if len(opcode) and (opcode.min() < min(Opcode) or opcode.max() > max(Opcode)):
+        raise ValueError(f"Unknown opcode in {np.unique(opcode)}")
+    segments = np.zeros(len(x), dtype=SEGMENT_DTYPE)
+    segments["opcode"] = opcode
+    segments["x"] = x
+    segments["y"] = y
+    if angle is not None:
+        segments["angle"] = angle
+    return segments
+
+
+def segments_from_points(
+    points: Sequence[JumpOrLineInput | ArcInput], scale: float = 1
+) -> np.ndarray:
+    """Convert a list of point tuples, as used by the plan stubs, to a segment array.
+
+    A boolean third element means a line (True) or jump (False) to x, y; a float is
+    the angle in degrees of an arc around x, y. Coordinates are multiplied by `scale`
+    and truncated towards zero, e.g. to convert from um to bits.
+    """
+    opcode = np.array(
+        [
+            (Opcode.LINE if p[2] else Opcode.JUMP)
+            if isinstance(p[2], bool)
+            else Opcode.ARC
+            for p in points
+        ],
+        dtype=np.int32,
+    )
+    coords = np.array([p[:2] for p in points], dtype=np.float64).reshape(-1, 2)
+    coords = np.trunc(coords * scale)
+    angle = np.array(
+        [0.0 if isinstance(p[2], bool) else p[2] for p in points], dtype=np.float64
+    )
+    return make_segments(coords[:, 0], coords[:, 1], opcode, angle)
+
+
+def segment_ends(
+    segments: np.ndarray, start: tuple[float, float] = (0, 0)
+) -> np.ndarray:
+    """Position at the end of each segment, as an (N, 2) float array, when starting
+    from `start`. Jumps and lines end at (x, y); arcs turn about (x, y) from wherever
+    the previous segment ended, clockwise for positive angles."""
+    ends = np.column_stack((segments["x"], segments["y"])).astype(np.float64)
+    # Arc ends depend on any arc before them, so these are done one at a time
+    for i in np.flatnonzero(segments["opcode"] == Opcode.ARC):
+        previous = ends[i - 1] if i else np.asarray(start, dtype=np.float64)
+        angle = -np.deg2rad(segments["angle"][i])
+        rotation = np.array(
+            [[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]
+        )
+        centre = np.array([segments["x"][i], segments["y"][i]], dtype=np.float64)
+        ends[i] = centre + rotation @ (previous - centre)
+    return ends
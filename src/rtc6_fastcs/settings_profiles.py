@@ -0,0 +1,106 @@
+"""Named sets of control settings, applied to the card in one go
+
+A profile gives values for any of the speeds, delays, laser mode and sky writing
+mode, and leaves the rest as they are. The IOC compares a profile with the values it
+last sent and only sends the ones which have changed, so applying the same profile
+before every job costs nothing on the card.
+"""
+
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any
+
+from rtc6_fastcs.estimation import ControlSettings
+
+# Bindings function which sets each value, apart from the delays which are all set by
+# set_scanner_delays
+SETTING_COMMANDS = {
+    "laser_mode": "set_laser_mode",
+    "laser_control": "set_laser_control",
+    "jump_speed": "set_jump_speed_ctrl",
+    "mark_speed": "set_mark_speed_ctrl",
+    "sky_writing_mode": "set_sky_writing_mode",
+}
+DELAYS = ("jump_delay", "mark_delay", "polygon_delay")
+
+
+@dataclass(frozen=True)
+class SettingsProfile:
+    """Values to set on the card, where None leaves a value unchanged"""
+
+    laser_mode: str | None = None
+    laser_control: int | None = None
+    jump_speed: float | None = None  # bits/ms
+    mark_speed: float | None = None  # bits/ms
+    jump_delay: int | None = None  # 10us
+    mark_delay: int | None = None  # 10us
+    polygon_delay: int | None = None  # 10us
+    sky_writing_mode: int | None = None
+
+    @classmethod
+    def from_dict(cls, values: dict[str, Any]) -> "SettingsProfile":
+        unknown = set(values) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown settings in profile: {sorted(unknown)}")
+        return cls(**values)
+
+    @classmethod
+    def from_control_settings(cls, settings: ControlSettings) -> "SettingsProfile":
+        return cls(**asdict(settings))
+
+    def to_dict(self) -> dict[str, Any]:
+        """The values which are set, leaving out the ones left unchanged"""
+        return {
+            name: value for name, value in asdict(self).items() if value is not None
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def changes_from(self, applied: "SettingsProfile") -> "SettingsProfile":
+        """The values in this profile which differ from those `applied`"""
+        return SettingsProfile(
+            **{
+                name: value
+                for name, value in self.to_dict().items()
+                if getattr(applied, name) != value
+            }
+        )
+
+    def updated_with(self, other: "SettingsProfile") -> "SettingsProfile":
+        """This profile with the values set in `other` replacing its own"""
+        return replace(self, **other.to_dict())
+
+    def control_settings(self, base: ControlSettings) -> ControlSettings:
+        """`base` with the speeds and delays set in this profile"""
+        names = {f.name for f in fields(ControlSettings)}
+        return replace(
+            base,
+            **{name: value for name, value in self.to_dict().items() if name in names},
+        )
+
+
+def load_profiles(path: str | Path) -> dict[str, SettingsProfile]:
+    """Read named profiles from a JSON file of {name: {setting: value}}"""
+    with open(path) as f:
+        profiles = json.load(f)
+    return {
+        name: SettingsProfile.from_dict(values) for name, values in profiles.items()
+    }
+
+
+def parse_profile(value: str, profiles: dict[str, SettingsProfile]) -> SettingsProfile:
+    """Look up a named profile, or parse a JSON object of settings"""
+    if value in profiles:
+        return profiles[value]
+    try:
+        values = json.loads(value)
+    except json.JSONDecodeError:
+        raise ValueError(
+            f"{value!r} is not a profile name (one of {sorted(profiles)}) or a JSON "
+            "object of settings"
+        ) from None
+    if not isinstance(values, dict):
+        raise ValueError(f"Profile must be a JSON object, got {value!r}")
+    return SettingsProfile.from_dict(values)
@@ -0,0 +1,104 @@
+"""Cache of compiled shapes, so that repeated jobs skip unit conversion and correction
+
+A compiled shape is a read-only segment array (see `rtc6_fastcs.segments`) in RTC6
+bits, ready to be loaded into a list.
+"""
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+import numpy as np
+
+from rtc6_fastcs.coordinates import CoordinateTransform, correct_points
+from rtc6_fastcs.segments import ArcInput, JumpOrLineInput, segments_from_points
+
+DEFAULT_MAX_SEGMENTS = 1000000
+
+
+def cache_key(*parts: np.ndarray | float | str | bytes | None) -> bytes:
+    """Hash arrays (by dtype, shape and contents) and scalars into a cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"{part.dtype.str}{part.shape}".encode())
+            digest.update(part.data)
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.digest()
+
+
+def compile_shape(
+    points: Sequence[JumpOrLineInput | ArcInput],
+    bits_per_um: float,
+    transform: np.ndarray | CoordinateTransform | None = None,
+) -> np.ndarray:
+    """Convert a shape in um to a segment array in bits, optionally also applying a
+    coordinate transform as the IOC does"""
+    segments = segments_from_points(points, scale=bits_per_um)
+    if transform is not None:
+        corrected = correct_points(
+            np.column_stack((segments["x"], segments["y"])), transform
+        )
+        segments["x"], segments["y"] = corrected.T
+    return segments
+
+
+class ShapeCache:
+    """LRU cache of compiled segment arrays, capped at a total number of segments"""
+
+    def __init__(self, max_segments: int = DEFAULT_MAX_SEGMENTS) -> None:
+        self.max_segments = max_segments
+        self.hits = 0
+        self.misses = 0
+        self._segments = 0
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def segments(self) -> int:
+        """Total number of segments currently cached"""
+        return self._segments
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._segments = 0
+
+    def get_or_compile(
+        self, key: bytes, compile: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """Return the cached segments for `key`, or compile and cache them"""
+        if (segments := self._cache.get(key)) is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return segments
+        self.misses += 1
+        segments = compile()
+        segments.setflags(write=False)
+        if len(segments) <= self.max_segments:
+            self._cache[key] = segments
+            self._segments += len(segments)
+            while self._segments > self.max_segments:
+                _, evicted = self._cache.popitem(last=False)
+                self._segments -= len(evicted)
+        return segments
+
+    def compile_shape(
+        self,
+        points: Sequence[JumpOrLineInput | ArcInput],
+        bits_per_um: float,
+        transform: np.ndarray | CoordinateTransform | None = None,
+    ) -> np.ndarray:
+        """Cached version of `compile_shape`"""
+        key = cache_key(
+            repr(points),
+            bits_per_um,
+            transform.key if isinstance(transform, CoordinateTransform) else transform,
+        )
+        return self.get_or_compile(
+            key, lambda: compile_shape(points, bits_per_um, transform)
+        )
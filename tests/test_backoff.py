@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from rtc6_fastcs.backoff import Backoff
+
+
+def test_delays_grow_exponentially_up_to_the_maximum():
+    backoff = Backoff(initial=1, maximum=10, factor=2, jitter=0)
+    assert [backoff.next_delay() for _ in range(6)] == [1, 2, 4, 8, 10, 10]
+    backoff.reset()
+    assert backoff.next_delay() == 1
+
+
+def test_jitter_only_shortens_delays():
+    backoff = Backoff(initial=4, maximum=4, jitter=0.5, rng=random.Random(0))
+    delays = [backoff.next_delay() for _ in range(100)]
+    assert min(delays) >= 2
+    assert max(delays) <= 4
+    assert len(set(delays)) > 1
+    assert sum(delays) / len(delays) == pytest.approx(3, abs=0.2)
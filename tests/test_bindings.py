@@ -99,3 +99,13 @@ def test_get_error():
     last_error = bindings.get_last_error()
     bit_list = [int(x) for x in f"{last_error:032b}"]
     assert bit_list[19]
+
+
+@pytest.mark.needs_librtc6
+def test_load_segments_rejects_wrong_dtype():
+    import numpy as np
+
+    from rtc6_fastcs.bindings import rtc6_bindings as bindings
+
+    with pytest.raises(bindings.RtcListError):
+        bindings.load_segments(np.zeros(10, dtype=np.int32))
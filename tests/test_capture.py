@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.capture import (
+    CAPTURE_FIELDS,
+    CaptureBuffer,
+    following_error,
+    load_capture,
+    save_capture,
+)
+
+
+def counting_reader(out: np.ndarray, first: int):
+    """Fills each row with the index of the sample in the trace"""
+    out[:] = np.arange(first, first + out.shape[1])
+
+
+def test_buffer_keeps_the_last_samples_in_order():
+    buffer = CaptureBuffer(10)
+    buffer.extend_from(4, counting_reader)
+    np.testing.assert_array_equal(buffer.field("laser_on"), np.arange(4))
+    buffer.extend_from(9, counting_reader)
+    assert len(buffer) == 10
+    assert buffer.total == 13
+    np.testing.assert_array_equal(buffer.samples()[0], np.arange(3, 13))
+
+
+def test_buffer_only_reads_what_fits():
+    buffer = CaptureBuffer(10)
+    reads = []
+
+    def reader(out: np.ndarray, first: int):
+        reads.append((first, out.shape[1]))
+
+    buffer.extend_from(25, reader)
+    assert sum(count for _, count in reads) == 10
+    assert reads[0][0] == 15
+
+
+def test_following_error_and_save(tmp_path):
+    samples = np.zeros((len(CAPTURE_FIELDS), 3), dtype=np.int32)
+    samples[0] = [0, 3, 6]  # actual x
+    samples[3] = [0, 4, 8]  # target y
+    np.testing.assert_allclose(following_error(samples), [0, 5, 10])
+    save_capture(tmp_path / "capture.npz", samples, 1e-4)
+    loaded, period = load_capture(tmp_path / "capture.npz")
+    np.testing.assert_array_equal(loaded, samples)
+    assert period == pytest.approx(1e-4)
@@ -8,3 +8,49 @@ def test_cli_version():
     cmd = [sys.executable, "-m", "rtc6_fastcs", "--version"]
     output = subprocess.check_output(cmd).decode().strip()
     assert output == __version__
+
+
+def test_cli_imports_nothing_heavy_until_a_command_runs():
+    cmd = [
+        sys.executable,
+        "-c",
+        "import sys, rtc6_fastcs.__main__; "
+        "print(sorted({'fastcs', 'numpy'} & set(sys.modules)))",
+    ]
+    assert subprocess.check_output(cmd).decode().strip() == "[]"
+
+
+def test_ui_is_only_generated_when_the_controller_changes(tmp_path):
+    from fastcs.attributes import AttrR, AttrRW
+    from fastcs.controller import Controller
+    from fastcs.datatypes import Int
+
+    from rtc6_fastcs.__main__ import controller_schema_hash, create_ui_and_docs
+
+    class Small(Controller):
+        x = AttrR(Int())
+
+    class Bigger(Small):
+        y = AttrRW(Int(), group="Extra")
+
+    assert create_ui_and_docs(Small(), "TEST", tmp_path)
+    assert (tmp_path / "index.bob").exists()
+    assert not create_ui_and_docs(Small(), "TEST", tmp_path)
+    assert create_ui_and_docs(Small(), "TEST", tmp_path, force=True)
+    assert create_ui_and_docs(Bigger(), "TEST", tmp_path)
+    assert controller_schema_hash(Small(), "A") != controller_schema_hash(Small(), "B")
+
+
+def test_compile_job_only_stores_the_settings_given(tmp_path):
+    from rtc6_fastcs.job_file import read_job
+    from rtc6_fastcs.settings_profiles import SettingsProfile
+
+    shape = tmp_path / "shape.txt"
+    shape.write_text("[(0, 0, False), (100, 0, True)]")
+    cmd = [sys.executable, "-m", "rtc6_fastcs", "compile-job", str(shape)]
+    subprocess.check_call(cmd + [str(tmp_path / "a.rtc6job"), "--jump-delay", "5"])
+    subprocess.check_call(cmd + [str(tmp_path / "b.rtc6job")])
+    assert read_job(tmp_path / "a.rtc6job").header.settings == SettingsProfile(
+        jump_delay=5
+    )
+    assert read_job(tmp_path / "b.rtc6job").header.settings is None
@@ -0,0 +1,379 @@
+import asyncio
+import random
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.backoff import Backoff
+from rtc6_fastcs.bindings import simulated_bindings as bindings
+from rtc6_fastcs.capture import load_capture
+from rtc6_fastcs.controller import rtc_controller
+from rtc6_fastcs.controller.connection_supervisor import (
+    ConnectionState,
+    ConnectionSupervisor,
+)
+from rtc6_fastcs.controller.rtc_connection import RtcConnection
+from rtc6_fastcs.controller.rtc_controller import RtcController
+from rtc6_fastcs.estimation import segment_times
+from rtc6_fastcs.job_file import write_job
+from rtc6_fastcs.segments import Opcode, make_segments
+from rtc6_fastcs.settings_profiles import SettingsProfile
+
+FAST = '{"jump_speed": 100000, "mark_speed": 100000}'
+
+
+@pytest.fixture(autouse=True)
+def simulator():
+    bindings.reset()
+    yield
+    bindings.reset()
+
+
+async def put(attr, value):
+    """Write to an attribute as a client would, through its handler"""
+    if hasattr(attr, "set"):
+        await attr.set(value)
+    await attr.sender.put(attr, value)
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting"
+        await asyncio.sleep(0.01)
+
+
+async def wait_until_idle(card: int = 1):
+    busy = {bindings.ListStatus.BUSY1, bindings.ListStatus.BUSY2}
+    await wait_until(lambda: not busy & set(bindings.get_list_statuses(card)))
+
+
+async def connected(box_ip: str = "127.0.0.1") -> RtcController:
+    controller = RtcController(box_ip, "", "", simulate=True)
+    await controller.initialise()
+    await controller.attribute_initialise()
+    await controller.connect()
+    return controller
+
+
+async def set_shape(shape, points: np.ndarray, opcodes: np.ndarray):
+    await asyncio.gather(
+        shape.x.set(points[:, 0].astype(np.float64)),
+        shape.y.set(points[:, 1].astype(np.float64)),
+        shape.opcode.set(opcodes.astype(np.float64)),
+        shape.angle.set(np.zeros(len(points))),
+    )
+
+
+def line_segments(n: int, step: int = 100) -> np.ndarray:
+    x = (np.arange(n) % 2) * step
+    return make_segments(x, np.arange(n), np.full(n, Opcode.LINE))
+
+
+def test_stream_list_sends_chunks_through_both_lists():
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        list_ops = controller.get_sub_controllers()["LIST"]
+        polygon = list_ops.get_sub_controllers()["ADDPOLYGON"]
+        await control.apply_profile(FAST)
+        points = np.column_stack((np.arange(250) * 10, np.zeros(250)))
+        await set_shape(polygon, points, np.full(250, Opcode.LINE))
+        await list_ops.stream_chunk_size.set(100)
+        await polygon.append()
+        assert list_ops.stream_pending_segments.get() == 250
+        assert list_ops.stream_estimated_time.get() > 0
+
+        await list_ops.stream_list()
+        with pytest.raises(RuntimeError):
+            await list_ops.stream_list()
+        await list_ops._stream_task
+        assert list_ops.stream_chunks_loaded.get() == 3
+        assert list_ops.stream_chunks_total.get() == 3
+        assert list_ops.stream_pending_segments.get() == 0
+        assert not list_ops.streaming.get()
+        card = bindings.get_simulated_card()
+        assert card.used == {1: True, 2: True}
+        assert card.position == (2490, 0)
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_control_settings_only_send_what_changed():
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        card = bindings.get_simulated_card()
+        sends = controller.cards[0].conn.diagnostics.stats
+
+        await put(control.profile, '{"mark_speed": 500, "jump_delay": 4}')
+        # The other delays are sent with the one which changed
+        assert control.settings_sent.get() == 4
+        assert (card.mark_speed, card.jump_delay) == (500, 4)
+        assert control.jump_delay.get() == 4
+        calls = sends["bindings:_send_settings"].count
+
+        await put(control.profile, '{"mark_speed": 500}')
+        assert control.settings_sent.get() == 0
+        assert sends["bindings:_send_settings"].count == calls
+
+        await put(control.jump_speed, 2000.0)
+        assert (card.jump_speed, card.mark_speed) == (2000, 500)
+        await put(control.mark_speed, 750.0)
+        assert (card.jump_speed, card.mark_speed) == (2000, 750)
+        await put(control.mark_delay, 7)
+        assert (card.jump_delay, card.mark_delay) == (4, 7)
+        assert controller.cards[0].conn.settings.mark_delay == 7
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_step_and_repeat_loads_the_shape_once():
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        list_ops = controller.get_sub_controllers()["LIST"]
+        step_repeat = list_ops.get_sub_controllers()["STEPREPEAT"]
+        await control.apply_profile(FAST)
+        shape = np.array([[0, 0], [100, 0], [100, 100]])
+        opcodes = np.array([Opcode.JUMP, Opcode.LINE, Opcode.LINE])
+        await set_shape(step_repeat, shape, opcodes)
+        await step_repeat.site_x.set(np.array([0.0, 1000.0, 2000.0]))
+        await step_repeat.site_y.set(np.zeros(3))
+
+        await list_ops.init_list()
+        assert bindings.get_config_list() == (
+            rtc_controller.LIST_MEMORY - 1 - rtc_controller.SUBROUTINE_MEMORY
+        )
+        await step_repeat.proc()
+        assert step_repeat.shape_loaded.get()
+        await step_repeat.proc()
+        assert not step_repeat.shape_loaded.get()
+        assert list_ops.estimated_time.get() > 0
+        card = bindings.get_simulated_card()
+        assert len(card.subroutines[rtc_controller.STEP_AND_REPEAT_SUBROUTINE]) == 3
+
+        await list_ops.end_list()
+        await list_ops.execute_list()
+        await wait_until_idle()
+        assert card.position == (2100, 100)
+
+        await set_shape(step_repeat, shape[1:], opcodes[1:])
+        with pytest.raises(ValueError):
+            await step_repeat.proc()
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_job_queue_runs_jobs_by_priority_and_times_them(tmp_path):
+    speed = 2000.0  # bits/ms
+    segments = {"a": line_segments(100, 2000), "b": line_segments(20, 2000)}
+    segments["c"] = segments["b"]
+    for job_id, job in segments.items():
+        write_job(tmp_path / f"{job_id}.rtc6job", job)
+    write_job(
+        tmp_path / "d.rtc6job",
+        line_segments(20, 2000),
+        SettingsProfile(mark_speed=speed / 2),
+    )
+
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        list_ops = controller.get_sub_controllers()["LIST"]
+        await control.apply_profile(f'{{"mark_speed": {speed}}}')
+        await list_ops.stream_chunk_size.set(60)
+        started = []
+        job_started = list_ops._job_started
+
+        async def record(timing, chunk):
+            if chunk == 0:
+                started.append(timing.job_id)
+            await job_started(timing, chunk)
+
+        list_ops.streamer.on_list_started = record
+
+        async def submit(job_id: str, priority: int = 0):
+            await list_ops.queue_job_id.set(job_id)
+            await list_ops.queue_job_file.set(str(tmp_path / f"{job_id}.rtc6job"))
+            await list_ops.queue_job_priority.set(priority)
+            await list_ops.submit_job()
+
+        await submit("a")
+        await wait_until(lambda: list_ops.current_job_id.get() == "a")
+        for job_id, priority in [("b", 0), ("c", 5), ("d", 0)]:
+            await submit(job_id, priority)
+        assert list_ops.queued_job_ids.get() == "c b d"
+        with pytest.raises(ValueError):
+            await submit("d")
+
+        await wait_until(lambda: not list_ops.queue_running.get())
+        assert started == ["a", "c", "b", "d"]
+        assert list_ops.jobs_completed.get() == 4
+        assert list_ops.queue_depth.get() == 0
+        assert list_ops.last_job_id.get() == "d"
+        assert bindings.get_simulated_card().mark_speed == speed / 2
+        # d changes the speed, so it can only be loaded once c has finished
+        expected, _ = segment_times(
+            line_segments(20, 2000), controller.cards[0].conn.settings, (2000, 19)
+        )
+        assert list_ops.last_job_execution_time.get() == pytest.approx(
+            expected.sum(), abs=0.03
+        )
+        assert (
+            list_ops.last_job_wait_time.get() > list_ops.last_job_execution_time.get()
+        )
+        assert list_ops.last_job_upload_time.get() > 0
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_supervisor_reconnects_and_restores_settings(monkeypatch):
+    connect = bindings.connect
+    failures = []
+
+    def flaky_connect(*args, **kwargs):
+        if failures:
+            raise bindings.RtcConnectionError(failures.pop())
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(bindings, "connect", flaky_connect)
+
+    async def run():
+        conn = RtcConnection("127.0.0.1", "", "", simulate=True)
+        await conn.connect()
+        await conn.apply_settings(SettingsProfile(mark_speed=321, jump_delay=4))
+        supervisor = ConnectionSupervisor(
+            conn, period=0.01, backoff=Backoff(initial=0.01, rng=random.Random(0))
+        )
+        assert await supervisor.check()
+        assert supervisor.state == ConnectionState.CONNECTED
+
+        # The box restarts and forgets its settings, then refuses connections
+        card = bindings.get_simulated_card()
+        card.connected = False
+        card.mark_speed, card.jump_delay = 0, 0
+        failures.extend(["no route", "no route"])
+        supervisor.start()
+        await wait_until(lambda: supervisor.reconnects == 1)
+        await wait_until(lambda: supervisor.state == ConnectionState.CONNECTED)
+        assert supervisor.last_error == "no route"
+        assert not failures
+        assert (card.mark_speed, card.jump_delay) == (321, 4)
+        await supervisor.stop()
+        await conn.close()
+
+    asyncio.run(run())
+
+
+def test_capture_is_recorded_and_saved(tmp_path):
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        list_ops = controller.get_sub_controllers()["LIST"]
+        polygon = list_ops.get_sub_controllers()["ADDPOLYGON"]
+        capture = controller.get_sub_controllers()["CAPTURE"]
+        await control.apply_profile('{"jump_speed": 1000, "mark_speed": 1000}')
+        points = np.array([[0, 0], [20, 0], [20, 20]])
+        await set_shape(polygon, points, np.full(3, Opcode.LINE))
+        await capture.period.set(1)
+        await list_ops.init_list()
+        await capture.arm()
+        await polygon.proc()
+        await capture.stop()
+        await list_ops.end_list()
+        await list_ops.execute_list()
+        await wait_until_idle()
+        while capture.capturing.get():
+            await capture.update()
+        assert capture.samples.get() > 0
+
+        await capture.save_file.set(str(tmp_path / "capture.npz"))
+        await capture.save()
+        samples, period = load_capture(tmp_path / "capture.npz")
+        np.testing.assert_array_equal(samples, capture.buffer.samples())
+        assert period == pytest.approx(1e-5)
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_each_arm_captures_a_new_trace():
+    async def run():
+        controller = await connected()
+        control = controller.get_sub_controllers()["CONTROL"]
+        list_ops = controller.get_sub_controllers()["LIST"]
+        polygon = list_ops.get_sub_controllers()["ADDPOLYGON"]
+        capture = controller.get_sub_controllers()["CAPTURE"]
+        await control.apply_profile('{"jump_speed": 1000, "mark_speed": 1000}')
+        await capture.period.set(1)
+
+        async def trace_line_to(x: int):
+            await set_shape(
+                polygon, np.array([[0, 0], [x, 0]]), np.full(2, Opcode.LINE)
+            )
+            await list_ops.init_list()
+            await capture.arm()
+            await polygon.proc()
+            await capture.stop()
+            await list_ops.end_list()
+            # The card still reports the last trace until this list starts one
+            await capture.update()
+            assert capture.capturing.get()
+            await list_ops.execute_list()
+            await wait_until_idle()
+            while capture.capturing.get():
+                await capture.update()
+            return capture.buffer.field("target_x")
+
+        first = await trace_line_to(20)
+        second = await trace_line_to(60)
+        assert first.max() <= 20 < second.max()
+        assert len(second) > len(first)
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_cards_are_under_their_own_prefix():
+    async def run():
+        controller = await connected("10.0.0.1, 10.0.0.2")
+        assert set(controller.get_sub_controllers()) == {"CARD1", "CARD2"}
+        card_2 = controller.get_sub_controllers()["CARD2"]
+        list_ops = card_2.get_sub_controllers()["LIST"]
+        polygon = list_ops.get_sub_controllers()["ADDPOLYGON"]
+        assert card_2.get_sub_controllers()["INFO"].ip_address.get() == "10.0.0.2"
+        assert bindings.get_simulated_card(1).ip_address == "10.0.0.1"
+
+        await card_2.get_sub_controllers()["CONTROL"].apply_profile(FAST)
+        points = np.array([[0, 0], [500, 0], [500, 500]])
+        await set_shape(polygon, points, np.full(3, Opcode.LINE))
+        for card in controller.cards:
+            await card.list_controller.init_list()
+        await polygon.proc()
+        for card in controller.cards:
+            await card.list_controller.end_list()
+        assert bindings.get_input_pointer(card=1) == 0
+        assert bindings.get_input_pointer(card=2) == 3
+
+        await controller.execute_all()
+        await wait_until_idle(card=2)
+        assert bindings.get_simulated_card(2).position == (500, 500)
+        assert bindings.get_simulated_card(1).position == (0, 0)
+        await controller.close()
+
+    asyncio.run(run())
+
+
+def test_one_card_is_at_the_top_level():
+    controller = RtcController("10.0.0.1", "", "", simulate=True)
+    assert "LIST" in controller.get_sub_controllers()
+    assert "CARD1" not in controller.get_sub_controllers()
+    with pytest.raises(ValueError):
+        RtcController("10.0.0.1,10.0.0.1", "", "", simulate=True)
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.coordinates import (
+    RTC_MAX_BITS,
+    RTC_MIN_BITS,
+    CoordinateTransform,
+    DistortionGrid,
+    correct_points,
+)
+
+
+def test_correct_points_applies_matrix_and_rounds():
+    swap_xy = np.array([[0, 1], [1, 0]])
+    corrected = correct_points(np.array([[1.4, 2.6], [-3, 4]]), swap_xy)
+    assert corrected.dtype == np.int32
+    np.testing.assert_array_equal(corrected, [[3, 1], [4, -3]])
+
+
+def test_correct_points_applies_affine_offset():
+    transform = np.array([[2, 0, 10], [0, 2, -10]])
+    corrected = correct_points(np.array([[1, 1]]), transform)
+    np.testing.assert_array_equal(corrected, [[12, -8]])
+
+
+def test_correct_points_clips_to_rtc_range():
+    corrected = correct_points(np.array([[1e9, -1e9]]), np.eye(2))
+    np.testing.assert_array_equal(corrected, [[RTC_MAX_BITS, RTC_MIN_BITS]])
+
+
+def test_correct_points_rejects_bad_transform():
+    with pytest.raises(ValueError):
+        correct_points(np.array([[1, 1]]), np.eye(3))
+
+
+def test_transform_grid_interpolates_bilinearly():
+    offsets = np.zeros((2, 2, 2))
+    offsets[1, 1] = [4, -8]  # at (10, 10)
+    grid = DistortionGrid((0, 0), (10, 10), offsets)
+    transform = CoordinateTransform(np.eye(2), grid)
+    np.testing.assert_allclose(
+        transform.transform(np.array([[0, 0], [10, 10], [5, 5], [10, 5]])),
+        [[0, 0], [14, 2], [6, 3], [12, 1]],
+    )
+
+
+def test_transform_grid_is_constant_outside_its_edges():
+    offsets = np.arange(18, dtype=float).reshape(3, 3, 2)
+    grid = DistortionGrid((0, 0), (1, 1), offsets)
+    np.testing.assert_allclose(
+        grid.offsets_at(np.array([[-5, -5], [50, 50], [50, -5]])),
+        [offsets[0, 0], offsets[2, 2], offsets[0, 2]],
+    )
+
+
+def test_invert_undoes_transform():
+    rng = np.random.default_rng(0)
+    grid = DistortionGrid((-1000, -1000), (250, 250), rng.normal(0, 5, (9, 9, 2)))
+    transform = CoordinateTransform(np.array([[0.9, 0.1, 30], [-0.1, 1.1, -20]]), grid)
+    points = rng.uniform(-800, 800, (100, 2))
+    np.testing.assert_allclose(
+        transform.invert(transform.transform(points)), points, atol=1e-6
+    )
+
+
+def test_transform_loads_from_text_and_npz(tmp_path):
+    np.savetxt(tmp_path / "matrix", [[2, 0, 1], [0, 2, 1]])
+    assert CoordinateTransform.load(tmp_path / "matrix").describe() == "affine"
+    np.savez(
+        tmp_path / "grid.npz",
+        affine=np.eye(2),
+        origin=[0, 0],
+        spacing=[10, 10],
+        offsets=np.ones((3, 4, 2)),
+    )
+    transform = CoordinateTransform.load(tmp_path / "grid.npz")
+    assert transform.describe() == "linear with 4x3 distortion grid"
+    np.testing.assert_array_equal(transform.apply(np.array([[5, 5]])), [[6, 6]])
+    assert transform.key != CoordinateTransform.identity().key
+
+
+def test_site_offsets_move_a_transformed_shape_to_each_site():
+    transform = CoordinateTransform(np.array([[2, 1, 30], [0, 3, -20]]))
+    shape = np.array([[0, 0], [10, 0], [10, 5]])
+    sites = np.array([[100, 0], [-50, 200]])
+    offsets = transform.site_offsets(sites)
+    for site, offset in zip(sites, offsets, strict=True):
+        np.testing.assert_array_equal(
+            transform.apply(shape) + offset, transform.apply(shape + site)
+        )
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.curves import beziers, catmull_rom, circles, ellipses
+from rtc6_fastcs.segments import Opcode, segment_ends
+
+
+def chord_midpoints(segments: np.ndarray) -> np.ndarray:
+    points = np.column_stack((segments["x"], segments["y"])).astype(np.float64)
+    return (points[1:] + points[:-1]) / 2
+
+
+def test_circles_are_native_arcs_by_default():
+    segments = circles([[0, 0], [100, 50]], [10, 20], scale=2)
+    assert list(segments["opcode"]) == [Opcode.JUMP, Opcode.ARC] * 2
+    np.testing.assert_allclose(
+        segment_ends(segments), [[20, 0], [20, 0], [240, 100], [240, 100]], atol=1e-9
+    )
+    assert list(segments["angle"][1::2]) == [360, 360]
+
+
+def test_flattened_circles_are_within_tolerance():
+    segments = circles([[0, 0]], 1000, tolerance=0.5)
+    assert segments["opcode"][0] == Opcode.JUMP
+    assert (segments["opcode"][1:] == Opcode.LINE).all()
+    assert (segments["x"][0], segments["y"][0]) == (
+        segments["x"][-1],
+        segments["y"][-1],
+    )
+    # chords are within the tolerance, plus rounding to whole bits
+    assert 1000 - np.hypot(*chord_midpoints(segments).T).min() < 0.5 + np.sqrt(0.5)
+
+
+def test_ellipses_are_vectorised_over_many_curves():
+    centres = np.arange(200).reshape(100, 2) * 100
+    segments = ellipses(centres, 30, 10, rotation_deg=90)
+    jumps = segments[segments["opcode"] == Opcode.JUMP]
+    assert len(jumps) == 100
+    # rotated by 90 degrees, so each starts above its centre
+    np.testing.assert_array_equal(jumps["x"], centres[:, 0])
+    np.testing.assert_array_equal(jumps["y"], centres[:, 1] + 30)
+
+
+def test_cubic_bezier_passes_through_its_end_points():
+    control_points = np.array([[[0, 0], [0, 1000], [1000, 1000], [1000, 0]]])
+    segments = beziers(control_points, tolerance=0.5)
+    assert (segments["x"][0], segments["y"][0]) == (0, 0)
+    assert (segments["x"][-1], segments["y"][-1]) == (1000, 0)
+    # the curve peaks at t = 0.5, at 3/4 of the height of the control points
+    assert segments["y"].max() == 750
+
+
+def test_straight_bezier_is_a_single_line():
+    segments = beziers([[0, 0], [50, 50], [100, 100]])
+    assert list(segments["opcode"]) == [Opcode.JUMP, Opcode.LINE]
+
+
+def test_catmull_rom_passes_through_its_points_as_one_path():
+    points = np.array([[0, 0], [100, 100], [200, 0], [300, 100]])
+    segments = catmull_rom(points, scale=10)
+    assert list(segments["opcode"]).count(Opcode.JUMP) == 1
+    path = {(x, y) for x, y in zip(segments["x"], segments["y"], strict=True)}
+    assert {(x, y) for x, y in points * 10} <= path
+
+
+def test_catmull_rom_needs_two_points():
+    with pytest.raises(ValueError):
+        catmull_rom([[0, 0]])
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+import pytest
+
+from rtc6_fastcs.diagnostics import (
+    HISTOGRAM_BUCKETS,
+    Diagnostics,
+    LatencyStats,
+    SampledLogger,
+    timed_handler,
+)
+
+
+def test_latency_stats_ring_buffer_keeps_only_recent_latencies():
+    stats = LatencyStats(ring_size=4)
+    for seconds in [1.0, 1.0, 1.0, 1.0, 0.5, 0.5]:
+        stats.record(seconds)
+    assert stats.count == 6
+    assert stats.total == pytest.approx(5.0)
+    assert stats.max == 1.0
+    assert sorted(stats.recent) == [0.5, 0.5, 1.0, 1.0]
+    assert len(stats.histogram) == HISTOGRAM_BUCKETS
+    assert sum(stats.histogram) == 6
+
+
+def test_histogram_buckets_by_order_of_magnitude():
+    stats = LatencyStats()
+    stats.record(2e-6)
+    stats.record(2e-3)
+    stats.record(100)
+    assert stats.histogram[1] == 1
+    assert stats.histogram[7] == 1
+    assert stats.histogram[-1] == 1
+
+
+def test_diagnostics_dump_as_json(tmp_path):
+    diagnostics = Diagnostics()
+    with diagnostics.timed("bindings:add_jump_to"):
+        pass
+    diagnostics.record("handler:AddJump.proc", 0.001)
+    assert [s.count for s in diagnostics.matching("bindings:")] == [1]
+    dump = tmp_path / "diag.json"
+    diagnostics.dump(str(dump))
+    assert '"handler:AddJump.proc"' in dump.read_text()
+    diagnostics.reset()
+    assert diagnostics.to_dict()["stats"] == {}
+
+
+def test_timed_handler_records_under_the_method_name():
+    class Handlers:
+        def __init__(self):
+            self.diagnostics = Diagnostics()
+
+        def timed(self, name):
+            return self.diagnostics.timed(name)
+
+        @timed_handler
+        async def proc(self):
+            return 1
+
+    handlers = Handlers()
+    assert asyncio.run(handlers.proc()) == 1
+    name = "handler:test_timed_handler_records_under_the_method_name.<locals>"
+    assert handlers.diagnostics.stats[f"{name}.Handlers.proc"].count == 1
+
+
+def test_sampled_logger_logs_one_in_n(caplog):
+    logger = SampledLogger(logging.getLogger("test_sampled"), every=10)
+    with caplog.at_level(logging.DEBUG):
+        for x in range(25):
+            logger.debug("added_jump", x=x)
+    assert [record.x for record in caplog.records] == [0, 10, 20]  # type: ignore
+    assert caplog.records[1].occurrence == 11  # type: ignore
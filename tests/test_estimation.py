@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.estimation import ControlSettings, estimate_time, segment_times
+from rtc6_fastcs.segments import segments_from_points
+
+
+def test_segment_times_use_speeds_and_delays():
+    settings = ControlSettings(
+        jump_speed=2000, mark_speed=100, jump_delay=10, mark_delay=20, polygon_delay=5
+    )
+    segments = segments_from_points(
+        [(1000, 0, False), (1000, 100, True), (1100, 100, True), (0, 0, False)]
+    )
+    times, end = segment_times(segments, settings)
+    np.testing.assert_allclose(
+        times,
+        [
+            1000 / 2000e3 + 10e-5,
+            100 / 100e3 + 5e-5,  # followed by a mark
+            100 / 100e3 + 20e-5,  # end of the marks
+            np.hypot(1100, 100) / 2000e3 + 10e-5,
+        ],
+    )
+    assert end == (0, 0)
+
+
+def test_arcs_are_timed_along_their_length():
+    settings = ControlSettings(mark_speed=1000)
+    segments = segments_from_points([(100, 0, False), (0, 0, 180.0)])
+    times, end = segment_times(segments, settings)
+    assert times[1] == pytest.approx(np.pi * 100 / 1000e3)
+    assert end == pytest.approx((-100, 0))
+
+
+def test_repeated_passes_start_from_the_end_of_the_first():
+    settings = ControlSettings(jump_speed=1000, mark_speed=1000)
+    segments = segments_from_points([(0, 100, False), (100, 100, True)])
+    once = estimate_time(segments, settings)
+    assert once == pytest.approx(0.2e-3)
+    assert estimate_time(segments, settings, passes=3) == pytest.approx(
+        once + 2 * (np.hypot(100, 0) + 100) / 1000e3
+    )
+
+
+def test_empty_segments_take_no_time():
+    assert estimate_time(segments_from_points([]), ControlSettings()) == 0
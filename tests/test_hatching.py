@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.hatching import hatch, hatch_lines
+from rtc6_fastcs.segments import Opcode
+
+SQUARE = np.array([[0, 0], [10, 0], [10, 10], [0, 10]])
+HOLE = np.array([[4, 4], [6, 4], [6, 6], [4, 6]])
+
+
+def test_hatch_lines_alternate_direction():
+    lines = hatch_lines([SQUARE], pitch=1)
+    assert len(lines) == 10
+    np.testing.assert_allclose(lines[0], [[0, 0.5], [10, 0.5]])
+    np.testing.assert_allclose(lines[1], [[10, 1.5], [0, 1.5]])
+
+
+def test_holes_are_not_filled():
+    lines = hatch_lines([SQUARE, HOLE], pitch=1)
+    assert len(lines) == 12
+    # the line through the hole is split in two, drawn right to left
+    np.testing.assert_allclose(lines[6], [[10, 5.5], [6, 5.5]])
+    np.testing.assert_allclose(lines[7], [[4, 5.5], [0, 5.5]])
+    filled = np.abs(lines[:, 1, 0] - lines[:, 0, 0]).sum()
+    assert filled == pytest.approx(100 - 4)
+
+
+def test_hatch_angle_rotates_lines():
+    lines = hatch_lines([SQUARE], pitch=1, angle_deg=90)
+    directions = lines[:, 1] - lines[:, 0]
+    np.testing.assert_allclose(directions[:, 0], 0, atol=1e-9)
+    np.testing.assert_allclose(np.abs(directions[:, 1]), 10)
+
+
+def test_hatch_segments_jump_then_mark():
+    segments = hatch([SQUARE], pitch=1, scale=10)
+    assert list(segments["opcode"][:4]) == [Opcode.JUMP, Opcode.LINE] * 2
+    assert list(segments["x"][:4]) == [0, 100, 100, 0]
+    assert list(segments["y"][:4]) == [5, 5, 15, 15]
+
+
+def test_degenerate_input():
+    assert len(hatch([], pitch=1)) == 0
+    with pytest.raises(ValueError):
+        hatch([SQUARE], pitch=0)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.coordinates import CoordinateTransform
+from rtc6_fastcs.job_file import (
+    HEADER_ALIGNMENT,
+    MAGIC,
+    check_transform,
+    read_job,
+    write_job,
+)
+from rtc6_fastcs.segments import SEGMENT_DTYPE, segments_from_points
+from rtc6_fastcs.settings_profiles import SettingsProfile
+
+
+@pytest.fixture
+def segments() -> np.ndarray:
+    return segments_from_points(
+        [(0, 0, False), (1000, 0, True), (1000, 1000, 90.0), (-5, 7, True)]
+    )
+
+
+def test_job_round_trips_through_a_file(tmp_path, segments):
+    settings = SettingsProfile(jump_speed=2000, mark_speed=100, mark_delay=3)
+    path = tmp_path / "shape.rtc6job"
+    write_job(path, segments, settings, 33, np.eye(2), "a shape")
+    job = read_job(path)
+    assert job.header.segment_count == len(segments)
+    assert job.header.settings == settings
+    assert job.header.bits_per_um == 33
+    assert job.header.transform == [[1, 0, 0], [0, 1, 0]]
+    assert job.header.description == "a shape"
+    np.testing.assert_array_equal(job.segments, segments)
+
+
+def test_segments_are_memory_mapped_and_aligned(tmp_path, segments):
+    path = tmp_path / "shape.rtc6job"
+    write_job(path, segments)
+    job = read_job(path)
+    assert isinstance(job.segments, np.memmap)
+    assert job.segments.dtype == SEGMENT_DTYPE
+    assert not job.segments.flags.writeable
+    assert job.segments.offset % HEADER_ALIGNMENT == 0
+    assert job.header.settings is None
+
+
+def test_empty_job(tmp_path):
+    path = tmp_path / "empty.rtc6job"
+    write_job(path, segments_from_points([]))
+    assert len(read_job(path).segments) == 0
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "not_a_job"
+    path.write_bytes(b"something else entirely")
+    with pytest.raises(ValueError, match="not an RTC6 job file"):
+        read_job(path)
+
+
+def test_truncated_files_are_rejected(tmp_path, segments):
+    path = tmp_path / "shape.rtc6job"
+    write_job(path, segments)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        read_job(path)
+
+
+def test_unknown_versions_are_rejected(tmp_path, segments):
+    path = tmp_path / "shape.rtc6job"
+    write_job(path, segments)
+    data = path.read_bytes().replace(b'"version": 1', b'"version": 9')
+    path.write_bytes(data)
+    assert data.startswith(MAGIC)
+    with pytest.raises(ValueError, match="version 9"):
+        read_job(path)
+
+
+def test_jobs_must_match_the_iocs_transform(tmp_path, segments):
+    identity = CoordinateTransform.identity()
+    shifted = CoordinateTransform(np.array([[1, 0, 5], [0, 1, 0]]))
+    write_job(tmp_path / "plain.rtc6job", segments)
+    write_job(tmp_path / "shifted.rtc6job", segments, transform=shifted)
+    plain = read_job(tmp_path / "plain.rtc6job").header
+    check_transform(plain, identity)
+    with pytest.raises(ValueError, match="different coordinate transform"):
+        check_transform(plain, shifted)
+    check_transform(read_job(tmp_path / "shifted.rtc6job").header, shifted)
+    with pytest.raises(ValueError, match="different coordinate transform"):
+        check_transform(read_job(tmp_path / "shifted.rtc6job").header, identity)
@@ -0,0 +1,34 @@
+import pytest
+
+from rtc6_fastcs.job_queue import JobQueue, QueuedJob
+
+
+def test_higher_priorities_run_first_then_in_submission_order():
+    queue = JobQueue()
+    for job_id, priority in [("a", 0), ("b", 1), ("c", 0), ("d", 1)]:
+        queue.submit(QueuedJob(job_id, f"{job_id}.rtc6job", priority))
+    assert queue.job_ids() == ["b", "d", "a", "c"]
+    assert len(queue) == 4
+    assert [queue.pop().job_id for _ in range(4)] == ["b", "d", "a", "c"]  # type: ignore
+    assert queue.pop() is None
+
+
+def test_ids_must_be_given_and_unique():
+    queue = JobQueue()
+    queue.submit(QueuedJob("a", "a.rtc6job"))
+    with pytest.raises(ValueError):
+        queue.submit(QueuedJob("a", "other.rtc6job", priority=5))
+    with pytest.raises(ValueError):
+        queue.submit(QueuedJob("", "a.rtc6job"))
+
+
+def test_remove_keeps_the_order_of_the_rest():
+    queue = JobQueue()
+    for job_id, priority in [("a", 0), ("b", 2), ("c", 1)]:
+        queue.submit(QueuedJob(job_id, f"{job_id}.rtc6job", priority))
+    assert queue.remove("c")
+    assert not queue.remove("c")
+    assert "c" not in queue
+    assert queue.job_ids() == ["b", "a"]
+    queue.clear()
+    assert not queue
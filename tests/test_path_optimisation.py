@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.path_optimisation import optimise_path
+from rtc6_fastcs.segments import Opcode, segment_ends, segments_from_points
+
+
+def square(x: int, y: int) -> list:
+    return [
+        (x, y, False),
+        (x + 10, y, True),
+        (x + 10, y + 10, True),
+        (x, y + 10, True),
+        (x, y, True),
+    ]
+
+
+def marked_edges(segments: np.ndarray) -> list:
+    """Each mark as an undirected pair of end points, to compare what gets drawn"""
+    ends = np.round(segment_ends(segments), 6)
+    starts = np.vstack(([0, 0], ends[:-1]))
+    return sorted(
+        tuple(sorted((tuple(starts[i]), tuple(ends[i]))))
+        for i in np.flatnonzero(segments["opcode"] != Opcode.JUMP)
+    )
+
+
+def test_segment_ends_follow_arcs():
+    segments = segments_from_points([(10, 0, False), (0, 0, 90.0), (0, 0, -90.0)])
+    np.testing.assert_allclose(
+        segment_ends(segments), [[10, 0], [0, -10], [10, 0]], atol=1e-9
+    )
+
+
+def test_contours_are_reordered_to_shorten_jumps():
+    points = square(0, 0) + square(1000, 0) + square(20, 0) + square(1020, 0)
+    segments = segments_from_points(points)
+    optimised = optimise_path(segments)
+    jumps = optimised.segments[optimised.segments["opcode"] == Opcode.JUMP]
+    assert list(jumps["x"]) == [0, 20, 1000, 1020]
+    assert optimised.jump_length_after < optimised.jump_length_before
+    assert optimised.time_saved(jump_speed=1000) == pytest.approx(
+        (optimised.jump_length_before - optimised.jump_length_after) / 1e6
+    )
+    assert optimised.time_saved(jump_speed=0) == 0
+    assert marked_edges(optimised.segments) == marked_edges(segments)
+
+
+def test_open_contours_with_arcs_are_drawn_backwards_when_allowed():
+    points = [
+        (0, 0, False),
+        (100, 0, True),
+        (0, 0, False),
+        (0, 50, True),
+        (0, 60, 90.0),
+        (100, 20, False),
+        (100, 60, True),
+    ]
+    segments = segments_from_points(points)
+    optimised = optimise_path(segments)
+    assert optimised.jump_length_after < optimised.jump_length_before
+    assert marked_edges(optimised.segments) == marked_edges(segments)
+
+    forwards_only = optimise_path(segments, allow_reverse=False)
+    contours = np.split(
+        forwards_only.segments,
+        np.flatnonzero(forwards_only.segments["opcode"] == Opcode.JUMP)[1:],
+    )
+    assert sorted(len(contour) for contour in contours) == [2, 2, 3]
+    assert marked_edges(forwards_only.segments) == marked_edges(segments)
+
+
+def test_marks_before_the_first_jump_stay_first():
+    points = [(5, 5, True)] + square(1000, 0) + square(10, 0)
+    optimised = optimise_path(segments_from_points(points))
+    assert optimised.segments[0]["opcode"] == Opcode.LINE
+    assert optimised.segments[1]["x"] == 10
+
+
+def test_single_contour_is_unchanged():
+    segments = segments_from_points(square(0, 0))
+    optimised = optimise_path(segments)
+    np.testing.assert_array_equal(optimised.segments, segments)
+    assert optimised.jump_length_before == optimised.jump_length_after == 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.segments import (
+    SEGMENT_DTYPE,
+    Opcode,
+    make_segments,
+    segments_from_points,
+)
+
+
+def test_segment_dtype_matches_c_struct_layout():
+    assert SEGMENT_DTYPE.itemsize == 24
+    assert SEGMENT_DTYPE.fields["angle"][1] == 16
+
+
+def test_segments_from_points():
+    segments = segments_from_points(
+        [(0, 0, False), (10, 0, True), (10, 10, 90.0), (0.5, -0.5, True)], scale=33
+    )
+    assert list(segments["opcode"]) == [
+        Opcode.JUMP,
+        Opcode.LINE,
+        Opcode.ARC,
+        Opcode.LINE,
+    ]
+    assert list(segments["x"]) == [0, 330, 330, 16]
+    assert list(segments["y"]) == [0, 0, 330, -16]
+    assert list(segments["angle"]) == [0, 0, 90, 0]
+
+
+def test_make_segments_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        make_segments(np.zeros(3), np.zeros(2), np.zeros(3))
+
+
+def test_make_segments_rejects_unknown_opcodes():
+    with pytest.raises(ValueError):
+        make_segments(np.zeros(2), np.zeros(2), np.array([0, 7]))
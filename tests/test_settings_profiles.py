@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from rtc6_fastcs.estimation import ControlSettings
+from rtc6_fastcs.settings_profiles import (
+    SettingsProfile,
+    load_profiles,
+    parse_profile,
+)
+
+
+def test_changes_leave_out_values_already_applied():
+    applied = SettingsProfile(laser_mode="YAG5", jump_speed=1000, mark_delay=3)
+    profile = SettingsProfile(laser_mode="YAG5", jump_speed=2000, polygon_delay=1)
+    assert profile.changes_from(applied) == SettingsProfile(
+        jump_speed=2000, polygon_delay=1
+    )
+    assert not profile.changes_from(applied.updated_with(profile)).to_dict()
+
+
+def test_control_settings_take_speeds_and_delays():
+    profile = SettingsProfile(laser_mode="CO2", mark_speed=50, jump_delay=4)
+    assert profile.control_settings(ControlSettings(jump_speed=10)) == ControlSettings(
+        jump_speed=10, mark_speed=50, jump_delay=4
+    )
+
+
+def test_profiles_load_by_name_or_from_json(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"cut": {"mark_speed": 100, "laser_control": 0}}))
+    profiles = load_profiles(path)
+    assert parse_profile("cut", profiles) == SettingsProfile(
+        mark_speed=100, laser_control=0
+    )
+    assert parse_profile('{"jump_delay": 2}', profiles) == SettingsProfile(jump_delay=2)
+    round_tripped = SettingsProfile.from_dict(json.loads(profiles["cut"].to_json()))
+    assert round_tripped == profiles["cut"]
+
+
+@pytest.mark.parametrize("value", ["unknown", "[1, 2]", '{"laser_power": 3}'])
+def test_bad_profiles_are_rejected(value):
+    with pytest.raises(ValueError):
+        parse_profile(value, {})
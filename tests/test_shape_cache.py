@@ -0,0 +1,41 @@
+import numpy as np
+
+from rtc6_fastcs.shape_cache import ShapeCache, cache_key, compile_shape
+
+SQUARE = [(0, 0, False), (10, 0, True), (10, 10, True), (0, 10, True), (0, 0, True)]
+
+
+def test_compile_shape_converts_units_and_applies_transform():
+    segments = compile_shape(SQUARE, 2, np.array([[0, 1], [1, 0]]))
+    assert list(segments["x"]) == [0, 0, 20, 20, 0]
+    assert list(segments["y"]) == [0, 20, 20, 0, 0]
+
+
+def test_repeated_shapes_are_cache_hits():
+    cache = ShapeCache()
+    first = cache.compile_shape(SQUARE, 33)
+    second = cache.compile_shape(list(SQUARE), 33)
+    assert second is first
+    assert not first.flags.writeable
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.compile_shape(SQUARE, 34)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_shapes_are_evicted_over_the_size_cap():
+    cache = ShapeCache(max_segments=10)
+    cache.compile_shape(SQUARE, 1)
+    cache.compile_shape(SQUARE, 2)
+    cache.compile_shape(SQUARE, 1)
+    cache.compile_shape(SQUARE, 3)
+    assert len(cache) == 2
+    assert cache.segments == 10
+    cache.compile_shape(SQUARE, 1)
+    assert cache.hits == 2
+
+
+def test_cache_key_depends_on_array_contents_and_dtype():
+    a = np.arange(4, dtype=np.int32)
+    assert cache_key(a) == cache_key(a.copy())
+    assert cache_key(a) != cache_key(a.astype(np.int64))
+    assert cache_key(a) != cache_key(a[::-1])
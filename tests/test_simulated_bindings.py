@@ -0,0 +1,196 @@
+import time
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.bindings import simulated_bindings as bindings
+from rtc6_fastcs.segments import Opcode, make_segments
+
+
+@pytest.fixture(autouse=True)
+def card():
+    bindings.reset()
+    bindings.connect("127.0.0.1", "", "")
+    yield bindings.get_simulated_card()
+    bindings.reset()
+
+
+def line_segments(n: int, step: int = 100) -> np.ndarray:
+    x = np.arange(1, n + 1) * step
+    return make_segments(x, np.zeros(n), np.full(n, Opcode.LINE))
+
+
+def wait_until_idle(timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    statuses = bindings.get_list_statuses()
+    while (
+        bindings.ListStatus.BUSY1 in statuses or bindings.ListStatus.BUSY2 in statuses
+    ):
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+        statuses = bindings.get_list_statuses()
+    return statuses
+
+
+def test_card_info_and_close():
+    info = bindings.get_card_info()
+    assert info.ip_address == "127.0.0.1"
+    assert info.is_acquired
+    bindings.close()
+    with pytest.raises(bindings.RtcConnectionError):
+        bindings.check_connection()
+
+
+def test_cards_are_independent(card):
+    bindings.connect("127.0.0.2", "", "", card=2)
+    assert bindings.get_card_info(card=2).ip_address == "127.0.0.2"
+    bindings.set_mark_speed_ctrl(1000, card=2)
+    bindings.init_list_loading(1, card=2)
+    bindings.load_segments(line_segments(10), card=2)
+    assert bindings.get_input_pointer(card=2) == 10
+    assert bindings.get_input_pointer() == 0
+    assert card.mark_speed != 1000
+    bindings.close()
+    bindings.check_connection(card=2)
+
+
+def test_unknown_laser_mode_raises():
+    bindings.set_laser_mode("YAG1")
+    with pytest.raises(bindings.RtcError):
+        bindings.set_laser_mode("NOT_A_MODE")
+
+
+def test_list_executes_for_the_time_the_card_would_take(card):
+    bindings.set_mark_speed_ctrl(1000)  # bits/ms
+    bindings.init_list_loading(1)
+    assert bindings.load_segments(line_segments(100)) == 100  # 10000 bits, 10ms
+    bindings.set_end_of_list()
+    assert bindings.ListStatus.READY1 in bindings.get_list_statuses()
+    start = time.monotonic()
+    bindings.execute_list(1)
+    assert bindings.ListStatus.BUSY1 in bindings.get_list_statuses()
+    statuses = wait_until_idle()
+    assert time.monotonic() - start >= 0.01
+    assert bindings.ListStatus.USED1 in statuses
+    assert card.position == (10000, 0)
+
+
+def test_delays_and_repeats_are_included_in_the_execution_time(card):
+    bindings.set_mark_speed_ctrl(1000)
+    bindings.set_scanner_delays(10, 100, 10)
+    bindings.load_list(1, 0)
+    bindings.add_list_repeat()
+    bindings.load_segments(line_segments(10))
+    bindings.add_list_until(3)
+    # 1ms of marking, 9 polygon delays of 0.1ms and a mark delay of 1ms, 3 times
+    assert card.list_duration(1, (0, 0))[0] == pytest.approx(3 * 2.9e-3)
+
+
+def test_arcs_end_rotated_about_their_centre(card):
+    bindings.load_list(1, 0)
+    bindings.add_jump_to(100, 0)
+    bindings.add_arc_to(0, 0, 90)
+    bindings.add_line_to(0, 0)
+    times, end = card.segment_times(np.concatenate(card.lists[1]), (0, 0))
+    assert end == (0, 0)
+    # quarter circle of radius 100 then back to the centre
+    assert times[1] == pytest.approx(np.pi * 50 / card.mark_speed / 1000)
+    assert times[2] == pytest.approx(100 / card.mark_speed / 1000)
+
+
+def test_load_segments_stops_when_the_list_is_full():
+    bindings.config_list_memory(50, 50)
+    bindings.load_list(1, 0)
+    assert bindings.load_segments(line_segments(80)) == 50
+    assert bindings.get_list_space() == 0
+    assert bindings.get_input_pointer() == 50
+
+
+def test_load_segments_rejects_wrong_dtype():
+    with pytest.raises(bindings.RtcListError):
+        bindings.load_segments(np.zeros(10, dtype=np.int32))
+
+
+def test_auto_change_starts_the_other_list(card):
+    bindings.set_mark_speed_ctrl(1000)
+    bindings.load_list(1, 0)
+    bindings.load_segments(line_segments(100))
+    bindings.set_end_of_list()
+    bindings.execute_list(1)
+    assert bindings.load_list(1, 0) == 0  # can't load the executing list
+    assert bindings.load_list(2, 0) == 2
+    bindings.load_segments(line_segments(100, step=-100))
+    bindings.set_end_of_list()
+    bindings.auto_change()
+    statuses = wait_until_idle()
+    assert {bindings.ListStatus.USED1, bindings.ListStatus.USED2} <= set(statuses)
+    assert card.position == (-10000, 0)
+
+
+def test_goto_xy_moves_straight_away_unless_busy(card):
+    bindings.goto_xy(100, -200)
+    assert card.position == (100, -200)
+    bindings.set_mark_speed_ctrl(1)
+    bindings.load_list(1, 0)
+    bindings.load_segments(line_segments(10))
+    bindings.set_end_of_list()
+    bindings.execute_list(1)
+    bindings.goto_xy(0, 0)
+    assert card.position == (100, -200)
+    assert bindings.get_error() & bindings.ERROR_BUSY
+
+
+def test_subroutine_calls_draw_the_shape_at_each_offset(card):
+    bindings.set_mark_speed_ctrl(1000)
+    bindings.load_list(1, 0)
+    shape = np.concatenate((make_segments([0], [0], [Opcode.JUMP]), line_segments(10)))
+    bindings.load_subroutine(0, shape)  # 1000 bits of marking, 1ms
+    offsets = np.array([[0, 0], [2000, 0], [4000, 0]], dtype=np.int32)
+    assert bindings.load_subroutine_calls(0, offsets, 2) == 3
+    # An offset and two calls per site, and resetting the offset
+    assert bindings.get_input_pointer() == 10
+    duration, end = card.list_duration(1, (0, 0))
+    # Six passes of marking, each after a 1000 bit jump apart from the first
+    assert duration == pytest.approx(6e-3 + 5 * 1000 / card.jump_speed / 1000)
+    assert end == (5000, 0)
+
+
+def test_subroutine_calls_stop_when_the_list_is_full():
+    bindings.config_list_memory(10, 10)
+    bindings.load_list(1, 0)
+    bindings.load_subroutine(0, line_segments(10))
+    offsets = np.zeros((5, 2), dtype=np.int32)
+    assert bindings.load_subroutine_calls(0, offsets, 2) == 3
+    with pytest.raises(bindings.RtcListError):
+        bindings.load_subroutine_calls(1, offsets, 1)
+
+
+def test_trace_records_positions_and_laser_state(card):
+    bindings.set_mark_speed_ctrl(100)
+    bindings.load_list(1, 0)
+    bindings.add_trace_start(10, [7, 1, 4])  # target x, actual x, laser on
+    bindings.load_segments(line_segments(10))  # 1000 bits at 100 bits/ms, 10ms
+    bindings.set_end_of_list()
+    bindings.execute_list(1)
+    wait_until_idle()
+    busy, recorded = bindings.get_trace_status()
+    assert not busy
+    assert recorded == 101  # every 100us, including both ends
+    target, actual, laser = (np.zeros(recorded, dtype=np.int32) for _ in range(3))
+    for channel, out in enumerate((target, actual, laser), start=1):
+        bindings.read_trace(channel, 0, out)
+    np.testing.assert_array_equal(target[:3], [0, 10, 20])
+    # The scan head follows behind the positions sent to it
+    assert actual[50] == target[50 - round(bindings.TRACKING_DELAY / 1e-4)]
+    assert laser[1:].all()
+
+
+def test_lists_and_subroutines_must_fit_in_the_list_memory():
+    with pytest.raises(bindings.RtcListError):
+        bindings.config_list_memory(10000000, 1)
+    bindings.config_list_memory(bindings.LIST_MEMORY - 11, 1)
+    assert bindings.get_config_list() == bindings.LIST_MEMORY - 11
+    bindings.load_subroutine(0, line_segments(9))
+    with pytest.raises(bindings.RtcListError):
+        bindings.load_subroutine(1, line_segments(1))
+    bindings.load_subroutine(0, line_segments(8))  # replaces the first